@@ -0,0 +1,62 @@
+"""
+Compare the packets needed to decode typical payloads with each compression.
+The count is the mean count of LT packets consumed before the payload is
+recovered, starting from several offsets of the stream as in a cropped file.
+The report is written as a table on the standard output.
+
+    python benchmarks/compression.py [trials]
+"""
+
+import json
+import sys
+
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.compression import compress
+from steganodf.lt.decode import LtDecoder
+
+PAYLOADS = {
+    "short id": b"customer-000421",
+    "recipient": json.dumps(
+        {"id": "c0421", "name": "Alice Martin", "email": "alice.martin@example.com"}
+    ).encode(),
+    "license": json.dumps(
+        {
+            "id": "LIC-2024-000421",
+            "company": "Example Corp",
+            "recipient": "Alice Martin",
+            "email": "alice.martin@example.com",
+            "issued": "2024-06-01",
+            "expires": "2025-06-01",
+            "license": "Internal use only. Copyright Example Corp, all rights reserved.",
+            "url": "https://www.example.com/licenses/LIC-2024-000421",
+        }
+    ).encode(),
+    "text": b"This copy was issued to Alice Martin of Example Corp. " * 8,
+}
+
+METHODS = [None, "zlib", "lzma", "zdict"]
+
+
+def packets_to_decode(payload: bytes, method: str, trials: int) -> float:
+    algo = BitPool(packet_version=2, compression=method)
+    packets = algo.build_packets(payload, 1000 + trials)
+    total = 0
+    for offset in range(trials):
+        decoder = LtDecoder()
+        for count, packet in enumerate(packets[offset:], 1):
+            algo.consume_packet(decoder, packet.tobytes())
+            if decoder.is_done():
+                break
+        total += count
+    return total / trials
+
+
+if __name__ == "__main__":
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'payload':<12}{'method':<8}{'bytes':>8}{'blocks':>8}{'packets':>10}")
+    for name, payload in PAYLOADS.items():
+        for method in METHODS:
+            size = len(compress(payload, method)[0])
+            blocks = size // BitPool()._data_size + 1
+            count = packets_to_decode(payload, method, trials)
+            print(f"{name:<12}{method or '-':<8}{size:>8}{blocks:>8}{count:>10.1f}")
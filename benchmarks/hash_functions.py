@@ -0,0 +1,32 @@
+"""
+Measure the speed of the fingerprint functions in rows/s.
+
+    python benchmarks/hash_functions.py [row count]
+"""
+
+import sys
+import time
+
+import numpy as np
+import polars as pl
+
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.hashing import HASH_FUNCTIONS
+
+
+def measure(df: pl.DataFrame, hash_function: str, password: str = None, repeat: int = 3) -> float:
+    algo = BitPool(hash_function=hash_function, password=password)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        algo.compute_hash(df)
+        timings.append(time.perf_counter() - start)
+    return len(df) / min(timings)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = pl.DataFrame({"a": np.random.rand(count), "b": np.random.rand(count)})
+    print(f"{'function':<10} {'rows/s':>12} {'rows/s keyed':>14}")
+    for name in HASH_FUNCTIONS:
+        print(f"{name:<10} {measure(df, name):12,.0f} {measure(df, name, 'secret'):14,.0f}")
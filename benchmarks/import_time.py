@@ -0,0 +1,30 @@
+"""
+Measure the start time of the command line.
+
+    python benchmarks/import_time.py
+"""
+
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "python": [sys.executable, "-c", "pass"],
+    "import polars": [sys.executable, "-c", "import polars"],
+    "import steganodf": [sys.executable, "-c", "import steganodf"],
+    "steganodf --help": [sys.executable, "-m", "steganodf", "--help"],
+}
+
+
+def measure(command, repeat=10):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    for name, command in COMMANDS.items():
+        print(f"{name:<20} {measure(command) * 1000:8.1f} ms")
@@ -0,0 +1,29 @@
+"""
+Measure the decoding success rate and time of BitPool configurations under attacks.
+The report is written as JSON on the standard output.
+
+    python benchmarks/robustness.py [row count] [trials] > robustness.json
+"""
+
+import json
+import sys
+
+import numpy as np
+import polars as pl
+
+from steganodf.attacks import evaluate_robustness
+
+CONFIGS = {
+    "default": {},
+    "2 bits": {"bit_per_row": 2},
+    "4 bits": {"bit_per_row": 4},
+    "more correction": {"data_size": 16, "correction_size": 16},
+}
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    trials = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    df = pl.DataFrame({"a": np.random.rand(count), "b": np.random.rand(count)})
+    report = evaluate_robustness(df, CONFIGS, trials=trials)
+    json.dump(report, sys.stdout, indent=2)
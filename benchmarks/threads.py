@@ -0,0 +1,43 @@
+"""
+Measure the speed of the row hashing in rows/s with a growing count of threads.
+
+    python benchmarks/threads.py [row count]
+
+The rows are serialized by polars without the GIL. hashlib only releases the
+GIL for buffers of 2048 bytes or more, so the hash of short rows only scales
+on a free-threaded Python build.
+"""
+
+import os
+import sys
+import sysconfig
+import time
+
+import numpy as np
+import polars as pl
+
+from steganodf.algorithms.bitpool import BitPool
+
+
+def measure(df: pl.DataFrame, threads: int, hash_function: str, repeat: int = 3) -> float:
+    algo = BitPool(hash_function=hash_function, password="secret", threads=threads)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        algo.compute_hash(df)
+        timings.append(time.perf_counter() - start)
+    return len(df) / min(timings)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = pl.DataFrame({"a": np.random.rand(count), "b": np.random.rand(count)})
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(f"{os.cpu_count()} cores, free-threaded Python: {free_threaded}")
+    counts = [1, 2, 4, 8, 16, 32]
+    print(f"{'threads':>8} {'md5 rows/s':>14} {'blake2b rows/s':>16}")
+    base = None
+    for threads in counts:
+        md5, blake2b = measure(df, threads, "md5"), measure(df, threads, "blake2b")
+        base = base or md5
+        print(f"{threads:>8} {md5:14,.0f} {blake2b:16,.0f}  x{md5 / base:.2f}")
@@ -1,18 +1,28 @@
-import polars as pl
+from typing import TYPE_CHECKING
 
 from steganodf.algorithms.algorithm import Algorithm
-from .algorithms import ALGORITHMS, BitPool
+from .algorithms import ALGORITHMS
 
+if TYPE_CHECKING:
+    import polars as pl
 
-def encode(df: pl.DataFrame, payload: bytes, algorithm: str = "bitpool", **kwargs) -> pl.DataFrame:
+
+def encode(df: "pl.DataFrame", payload: bytes, algorithm: str = "bitpool", **kwargs) -> "pl.DataFrame":
 
     Algo = ALGORITHMS[algorithm]
     algo = Algo(**kwargs)
     return algo.encode(df, payload)
 
 
-def decode(df: pl.DataFrame, algorithm: str = "bitpool", **kwargs) -> bytes:
+def decode(df: "pl.DataFrame", algorithm: str = "bitpool", **kwargs) -> bytes:
 
     Algo = ALGORITHMS[algorithm]
     algo = Algo(**kwargs)
     return algo.decode(df)
+
+
+def __getattr__(name: str):
+    # Heavy modules are imported on first access
+    if name == "BitPool":
+        return ALGORITHMS["bitpool"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
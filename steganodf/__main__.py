@@ -1,41 +1,52 @@
 import os
 import sys
 import argparse
-import polars as pl
-import steganodf as st
+import hashlib
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import steganodf as st
 from steganodf.algorithms import ALGORITHMS
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.hashing import HASH_FUNCTIONS
+from steganodf.formats import (
+    STDIO,
+    get_format,
+    get_input_suffixes,
+    get_output_suffixes,
+    scan,
+    sink,
+)
+
+# polars and the algorithms are imported once the arguments are checked
+if TYPE_CHECKING:
+    import polars as pl
 
-SUPPORTED_FORMATS_IO = {
-    ".csv": (pl.read_csv, pl.DataFrame.write_csv),
-    ".parquet": (pl.read_parquet, pl.DataFrame.write_parquet),
-}
+    from steganodf.algorithms.geometry import Geometry
 
 
 def get_supported_input_format():
-    return tuple(i for i, _ in SUPPORTED_FORMATS_IO if i and callable(i))
+    return get_input_suffixes()
 
 
 def get_supported_output_format():
-    return tuple(o for _, o in SUPPORTED_FORMATS_IO if o and callable(o))
+    return get_output_suffixes()
 
 
-def read_file(path: Path) -> pl.DataFrame:
-    reader, _ = SUPPORTED_FORMATS_IO[path.suffix]
-    return reader(path)
+def read_file(path: Path) -> "pl.DataFrame":
+    return scan(path).collect(engine="streaming")
 
 
-def write_file(df: pl.DataFrame, path: Path):
-    _, writer = SUPPORTED_FORMATS_IO[path.suffix]
-    writer(df, path)
+def write_file(df: "pl.DataFrame", path: Path):
+    sink(df, path)
 
 
 def ap_input_file(fname: str) -> Path:
     fname = Path(fname)
-    if not os.path.exists(fname):
+    if str(fname) != STDIO and not os.path.exists(fname):
         raise argparse.ArgumentTypeError(f"{fname} does not exists")
-    if not SUPPORTED_FORMATS_IO.get(fname.suffix, (None, None))[0]:
+    format = get_format(fname)
+    if not format or not format.reader:
         raise argparse.ArgumentTypeError(
             f"{fname} of format {fname.suffix} is not supported. Supported input file format are {', '.join(get_supported_input_format())}"
         )
@@ -44,7 +55,8 @@ def ap_input_file(fname: str) -> Path:
 
 def ap_output_file(fname: str) -> Path:
     fname = Path(fname)
-    if not SUPPORTED_FORMATS_IO.get(fname.suffix, (None, None))[1]:
+    format = get_format(fname)
+    if not format or not format.writer:
         raise argparse.ArgumentTypeError(
             f"{fname} of format {fname.suffix} is not supported. Supported output file format are {', '.join(get_supported_output_format())}"
         )
@@ -58,7 +70,9 @@ def parse_cli(args=None) -> argparse.Namespace:
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     def add_common_args(subparser):
-        subparser.add_argument("input", type=ap_input_file, help="Input file")
+        subparser.add_argument(
+            "input", type=ap_input_file, help="Input file. Use - to read CSV from stdin"
+        )
         subparser.add_argument("--password", "-p", type=str, required=False, help="Password to use")
         subparser.add_argument(
             "--algorithm",
@@ -68,6 +82,40 @@ def parse_cli(args=None) -> argparse.Namespace:
             help="Algorithm to use",
             default="bitpool",
         )
+        subparser.add_argument(
+            "--hash-function",
+            type=str,
+            choices=list(HASH_FUNCTIONS.keys()),
+            default=None,
+            help="Fingerprint function of the rows. Default is md5",
+        )
+        subparser.add_argument(
+            "--threads", type=int, default=None, help="Threads hashing the rows. Default is 1"
+        )
+        subparser.add_argument(
+            "--fingerprint-cache",
+            type=Path,
+            default=None,
+            help="Directory caching the row hashes of the input, reused while it is unchanged",
+        )
+        subparser.add_argument(
+            "--packet-version",
+            type=int,
+            choices=[1, 2],
+            default=None,
+            help="Format of the packet header. 2 is compact. Default is 1",
+        )
+        subparser.add_argument(
+            "--crc-size", type=int, default=None, help="Bytes of CRC checking a packet. Default is 4"
+        )
+        subparser.add_argument(
+            "--stream", type=int, default=None, help="Identifier of the stream to encode or decode"
+        )
+        subparser.add_argument(
+            "--raw",
+            action="store_true",
+            help="Permute the lines of a CSV file without parsing them. The output keeps the bytes of the input",
+        )
 
     # command "encode"
     encode_parser = subparsers.add_parser(
@@ -77,31 +125,355 @@ def parse_cli(args=None) -> argparse.Namespace:
     encode_parser.add_argument(
         "output",
         type=ap_output_file,
-        help="File in which to write the data with message encoded in it",
+        help="File in which to write the data with message encoded in it. Use - to write CSV to stdout",
     )
-    encode_parser.add_argument("--message", "-m", type=str, required=True, help="Message to encode")
+    encode_parser.add_argument(
+        "--message",
+        "-m",
+        type=str,
+        required=True,
+        action="append",
+        help="Message to encode. Repeat it to encode independent streams, needs --packet-version 2",
+    )
+    encode_parser.add_argument(
+        "--deletion-rate",
+        type=float,
+        default=None,
+        help="Expected fraction of deleted rows. Tune the packet geometry accordingly",
+    )
+    encode_parser.add_argument(
+        "--edit-rate",
+        type=float,
+        default=None,
+        help="Expected fraction of edited rows. Tune the packet geometry accordingly",
+    )
+    encode_parser.add_argument(
+        "--geometry",
+        "-g",
+        type=Path,
+        default=None,
+        help="Where to record the tuned geometry. Default is next to the output file",
+    )
+
+    encode_parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the encoder. The same seed gives the same output",
+    )
+    encode_parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help="Directory caching the results of seeded encodings",
+    )
+    encode_parser.add_argument(
+        "--compression",
+        type=str,
+        choices=["auto", "zlib", "lzma", "zdict"],
+        default=None,
+        help="Compress the message. Needs --packet-version 2",
+    )
+    encode_parser.add_argument(
+        "--systematic",
+        action="store_true",
+        help="Write the message blocks as is before the repair packets. Needs --packet-version 2",
+    )
+    encode_parser.add_argument(
+        "--registry",
+        "-r",
+        type=Path,
+        default=None,
+        help="Watermark registry in which to record the issued payload",
+    )
+    encode_parser.add_argument("--label", "-l", type=str, default=None, help="Recipient of the copy")
 
     # command "decode"
     decode_parser = subparsers.add_parser("decode", help="Decode a file with a hidden message")
     add_common_args(decode_parser)
+    decode_parser.add_argument(
+        "--geometry",
+        "-g",
+        type=Path,
+        default=None,
+        help="Geometry file recorded by the encoder. Default is next to the input file",
+    )
+    decode_parser.add_argument(
+        "--detect",
+        action="store_true",
+        help="Find the packet geometry of the input when it is unknown",
+    )
+    decode_parser.add_argument(
+        "--password-file",
+        type=Path,
+        default=None,
+        help="File of candidate passwords, one per line. The one decoding the input is reported",
+    )
+    decode_parser.add_argument(
+        "--state",
+        "-s",
+        type=Path,
+        default=None,
+        help="Decoder state file. It is resumed if it exists and updated with the packets of the input",
+    )
+
+    # command "attribute"
+    attribute_parser = subparsers.add_parser(
+        "attribute", help="Find the issued payloads whose packets are in the input file"
+    )
+    attribute_parser.add_argument(
+        "input", type=ap_input_file, help="Input file. Use - to read CSV from stdin"
+    )
+    attribute_parser.add_argument("--password", "-p", type=str, required=False, help="Password to use")
+    attribute_parser.add_argument(
+        "--registry", "-r", type=Path, required=True, help="Watermark registry"
+    )
+    attribute_parser.add_argument(
+        "--state",
+        "-s",
+        type=Path,
+        default=None,
+        help="Decoder state file to match instead of the input file",
+    )
+    attribute_parser.add_argument("--top", type=int, default=10, help="Count of candidates to show")
 
     return parser.parse_args(args)
 
 
+def file_digest(path: Path) -> str:
+    """
+    Return an identifier of a file from its content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def packet_params(args: argparse.Namespace) -> dict:
+    """
+    Return the BitPool parameters of the packet format and hashing options
+    """
+    params = {}
+    if args.threads is not None:
+        params["threads"] = args.threads
+    if args.fingerprint_cache is not None:
+        params["fingerprint_cache"] = args.fingerprint_cache
+    if args.packet_version is not None:
+        params["packet_version"] = args.packet_version
+    if args.crc_size is not None:
+        params["crc_size"] = args.crc_size
+    if args.stream is not None:
+        params["stream"] = args.stream
+    return params
+
+
+def print_payload(payload: bytes):
+    """
+    Print a decoded payload, exit with an error if none was recovered
+    """
+    if not payload:
+        sys.exit("steganodf: no payload found")
+    print(payload.decode())
+
+
+def save_geometry(geometry: "Geometry", args: argparse.Namespace):
+    """
+    Record the geometry of an encoding, next to the output by default
+    """
+    from steganodf.algorithms.geometry import sidecar_path
+
+    if args.geometry:
+        geometry.save(args.geometry)
+    elif str(args.output) != STDIO:
+        geometry.save(sidecar_path(args.output))
+    else:
+        print("steganodf: use --geometry to record the geometry", file=sys.stderr)
+
+
+def detect_params(df: "pl.DataFrame", args: argparse.Namespace, params: dict) -> dict:
+    """
+    Return the decoding parameters with the detected packet geometry
+    """
+    from steganodf.algorithms.detection import DEFAULT_PACKET_VERSIONS, detect_geometry
+
+    if args.algorithm != "bitpool":
+        sys.exit(f"steganodf: --detect is not supported by {args.algorithm}")
+    # The detected values replace the ones of a geometry file
+    params = {
+        key: value
+        for key, value in params.items()
+        if key not in ("bit_per_row", "data_size", "correction_size")
+    }
+    versions = [params.pop("packet_version")] if "packet_version" in params else DEFAULT_PACKET_VERSIONS
+    try:
+        geometry = detect_geometry(df, packet_versions=versions, password=args.password, **params)
+    except AlgorithmError as e:
+        sys.exit(f"steganodf: {e}")
+    found = ", ".join(f"{key}={value}" for key, value in geometry.params().items())
+    print(f"steganodf: detected {found}", file=sys.stderr)
+    return {**params, **geometry.params()}
+
+
+def decode_keys(df: "pl.DataFrame", args: argparse.Namespace, params: dict):
+    """
+    Decode the input with each candidate password of a file
+    """
+    if args.algorithm != "bitpool":
+        sys.exit(f"steganodf: --password-file is not supported by {args.algorithm}")
+    passwords = [line for line in args.password_file.read_text().splitlines() if line]
+    result = st.BitPool(**params).decode_keys(df, passwords)
+    if not result["success"]:
+        sys.exit("steganodf: no candidate password decodes the input")
+    print(f"steganodf: decoded with password {result['password']!r}", file=sys.stderr)
+    print(result["payload"].decode())
+
+
+def decode_fragment(df: "pl.DataFrame", args: argparse.Namespace, params: dict):
+    """
+    Add the packets of a fragment to a saved decoder state
+    """
+    from steganodf.algorithms.bitpool import BitPool
+    from steganodf.lt.decode import LtDecoder
+
+    algo = ALGORITHMS[args.algorithm](password=args.password, **params)
+    if not isinstance(algo, BitPool):
+        sys.exit(f"steganodf: --state is not supported by {args.algorithm}")
+
+    decoder = LtDecoder.load(args.state) if args.state.exists() else None
+    source = None if str(args.input) == STDIO else file_digest(args.input)
+    result = algo._decode(df, decoder=decoder, source=source)
+    result["decoder"].save(args.state)
+
+    if result["success"]:
+        print(result["payload"].decode())
+    else:
+        print(
+            f"steganodf: {result['decoder'].ratio():.0%} of the payload recovered, state saved to {args.state}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
 def main():
     args = parse_cli()
 
+    from steganodf.algorithms.geometry import Geometry, sidecar_path, tune_geometry
+
+    if getattr(args, "raw", False):
+        from steganodf import rawcsv
+
+        paths = [args.input, args.output] if args.command == "encode" else [args.input]
+        if any(get_format(path).name != "csv" for path in paths):
+            sys.exit("steganodf: --raw needs CSV files")
+        if args.algorithm != "bitpool" or getattr(args, "registry", None) or getattr(args, "state", None):
+            sys.exit("steganodf: --raw only supports the bitpool algorithm")
+
     if args.command == "encode":
 
-        df = read_file(args.input)
-        new_df = st.encode(
-            df, payload=args.message.encode(), algorithm=args.algorithm, password=args.password
-        )
+        df = None if args.raw else read_file(args.input)
+        payloads = [message.encode() for message in args.message]
+        payload = payloads[0]
+        if len(payloads) > 1 and (args.raw or args.registry or args.algorithm != "bitpool"):
+            sys.exit("steganodf: several messages are only supported by the bitpool algorithm")
+        params = {}
+        if args.hash_function:
+            params["hash_function"] = args.hash_function
+        params.update(packet_params(args))
+        if args.deletion_rate is not None or args.edit_rate is not None:
+            try:
+                geometry = tune_geometry(
+                    rawcsv.count_rows(args.input) if args.raw else len(df),
+                    sum(map(len, payloads)),
+                    deletion_rate=args.deletion_rate or 0.0,
+                    edit_rate=args.edit_rate or 0.0,
+                    **params,
+                )
+            except AlgorithmError as e:
+                sys.exit(f"steganodf: {e}")
+            save_geometry(geometry, args)
+            params.update(geometry.params())
+        elif args.algorithm == "bitpool":
+            # The decoder reads the fingerprint function and the packet format in the geometry file
+            geometry = Geometry.from_algorithm(st.BitPool(**params))
+            if args.hash_function or geometry.extra:
+                save_geometry(geometry, args)
+
+        if args.seed is not None:
+            params["seed"] = args.seed
+        if args.cache:
+            params["cache"] = args.cache
+        if args.compression:
+            params["compression"] = args.compression
+        if args.systematic:
+            params["systematic"] = True
+        if args.raw:
+            rawcsv.encode_csv(args.input, args.output, payload, password=args.password, **params)
+            return
+        if args.registry:
+            from steganodf.watermarks import WatermarkRegistry
+
+            if args.algorithm != "bitpool":
+                sys.exit(f"steganodf: --registry is not supported by {args.algorithm}")
+            with WatermarkRegistry(args.registry) as registry:
+                new_df, _ = registry.issue(
+                    df, payload, label=args.label, password=args.password, **params
+                )
+        elif len(payloads) > 1:
+            try:
+                new_df = st.BitPool(password=args.password, **params).encode_streams(df, payloads)
+            except AlgorithmError as e:
+                sys.exit(f"steganodf: {e}")
+        else:
+            new_df = st.encode(
+                df, payload=payload, algorithm=args.algorithm, password=args.password, **params
+            )
         write_file(new_df, args.output)
 
     elif args.command == "decode":
+        params = {}
+        if args.hash_function:
+            params["hash_function"] = args.hash_function
+        params.update(packet_params(args))
+        geometry_path = args.geometry
+        if geometry_path is None and str(args.input) != STDIO:
+            geometry_path = sidecar_path(args.input)
+        if geometry_path and geometry_path.exists():
+            params = {**Geometry.load(geometry_path).params(), **params}
+
+        if args.raw:
+            print_payload(rawcsv.decode_csv(args.input, password=args.password, **params))
+            return
+
         df = read_file(args.input)
-        print(st.decode(df, algorithm=args.algorithm, password=args.password).decode())
+        if args.detect:
+            params = detect_params(df, args, params)
+        if args.password_file:
+            decode_keys(df, args, params)
+        elif args.state:
+            decode_fragment(df, args, params)
+        else:
+            print_payload(st.decode(df, algorithm=args.algorithm, password=args.password, **params))
+
+    elif args.command == "attribute":
+        from steganodf.watermarks import WatermarkRegistry
+
+        with WatermarkRegistry(args.registry) as registry:
+            if args.state:
+                from steganodf.lt.decode import LtDecoder
+
+                candidates = registry.match_decoder(LtDecoder.load(args.state), top=args.top)
+            else:
+                candidates = registry.attribute(read_file(args.input), password=args.password, top=args.top)
+
+        if not candidates:
+            sys.exit("steganodf: no issued payload found")
+        for candidate in candidates:
+            print(
+                f"{candidate['matches']}/{candidate['packet_count']}\t{candidate['id']}\t"
+                f"{candidate['label'] or ''}\t{candidate['payload'].decode(errors='replace')}"
+            )
 
 
 if __name__ == "__main__":
@@ -1,8 +1,106 @@
+from importlib import import_module
+from typing import Dict, Iterator, Mapping, Union
 
-from .bitpool import BitPool
+"""
+Algorithms are resolved on first access, so listing them (for the command line
+choices for instance) imports neither polars nor the algorithm modules.
 
-ALGORITHMS = {
-    "bitpool" : BitPool
+Third-party packages can provide algorithms with an entry point:
+
+    [project.entry-points."steganodf.algorithms"]
+    myalgo = "mypackage.module:MyAlgorithm"
+"""
+
+ENTRY_POINT_GROUP = "steganodf.algorithms"
+
+# Lazy attributes of this package
+_EXPORTS = {
+    "BitPool": "steganodf.algorithms.bitpool:BitPool",
+    "BitChunk": "steganodf.algorithms.bitchunk:BitChunk",
+    "LowDigit": "steganodf.algorithms.lowdigit:LowDigit",
+    "Geometry": "steganodf.algorithms.geometry:Geometry",
+    "tune_geometry": "steganodf.algorithms.geometry:tune_geometry",
 }
 
 
+def _resolve(target: str):
+    module, _, name = target.partition(":")
+    return getattr(import_module(module), name)
+
+
+class AlgorithmRegistry(Mapping):
+    """
+    A read-only mapping from algorithm names to algorithm classes.
+    Values are given as "module:Class" strings and imported when accessed.
+
+    >>> registry = AlgorithmRegistry({"bitpool": "steganodf.algorithms.bitpool:BitPool"})
+    >>> "bitpool" in registry
+    True
+    >>> registry["bitpool"].__name__
+    'BitPool'
+    """
+
+    def __init__(self, targets: Dict[str, Union[str, type]], entry_points: bool = False):
+        self._targets = dict(targets)
+        self._entry_points = entry_points
+        self._loaded = {}
+
+    def register(self, name: str, target: Union[str, type]):
+        """
+        Add an algorithm, as a class or a "module:Class" string
+        """
+        self._targets[name] = target
+        self._loaded.pop(name, None)
+
+    def _discover(self):
+        """
+        Add algorithms declared by installed packages. Entry points are loaded on access.
+        """
+        if not self._entry_points:
+            return
+        self._entry_points = False
+
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            self._targets.setdefault(entry_point.name, entry_point)
+
+    def __getitem__(self, name: str):
+        if name not in self._loaded:
+            self._discover()
+            target = self._targets[name]
+            if isinstance(target, str):
+                target = _resolve(target)
+            elif not isinstance(target, type):
+                # An entry point
+                target = target.load()
+            self._loaded[name] = target
+        return self._loaded[name]
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(self._targets)
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._targets)
+
+    def __contains__(self, name) -> bool:
+        self._discover()
+        return name in self._targets
+
+
+ALGORITHMS = AlgorithmRegistry(
+    {
+        "bitpool": _EXPORTS["BitPool"],
+        "bitchunk": _EXPORTS["BitChunk"],
+        "lowdigit": _EXPORTS["LowDigit"],
+    },
+    entry_points=True,
+)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return _resolve(_EXPORTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,73 @@
+import hashlib
+from typing import List
+
+import numpy as np
+import polars as pl
 
 from .algorithm import Algorithm
 
+# Column types an alteration algorithm can modify
+NUMERIC_TYPES = (
+    pl.Float64,
+    pl.Int8,
+    pl.Int16,
+    pl.Int32,
+    pl.Int64,
+    pl.UInt8,
+    pl.UInt16,
+    pl.UInt32,
+    pl.UInt64,
+)
+
+
+def mix(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized splitmix64 finalizer. Return a well distributed 64 bits hash of each value.
+
+    >>> mix(np.array([0, 1], dtype=np.uint64)).tolist()
+    [0, 6238072747940578789]
+    """
+    values = values.astype(np.uint64)
+    with np.errstate(over="ignore"):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
 
 class AlterationAlgorithm(Algorithm):
+    """
+    Base class of algorithms hiding the payload by modifying the cells values.
+    Rows are not located by their position, so the payload survives row shuffling.
+    """
 
-    def __init__(self, **kwargs):
+    def __init__(self, columns: List[str] = None, password: str = None, **kwargs):
+        """
+        Args:
+            columns (list, optional): Columns to alter. Default is all numeric columns.
+            password (str, optional): Password used to select the altered cells.
+        """
         super().__init__(**kwargs)
+        self._columns = columns
+        self._password = password
+
+        digest = hashlib.blake2b((password or "").encode(), digest_size=8).digest()
+        self._key = np.uint64(int.from_bytes(digest, "big"))
+
+    def get_columns(self, df: pl.DataFrame) -> List[str]:
+        """
+        Return the columns to alter
+
+        >>> algo = AlterationAlgorithm()
+        >>> algo.get_columns(pl.DataFrame({"a": [1.0], "b": ["x"], "c": [1]}))
+        ['a', 'c']
+        """
+        if self._columns is not None:
+            return list(self._columns)
+        return [name for name, dtype in df.schema.items() if dtype in NUMERIC_TYPES]
 
+    def column_key(self, name: str) -> np.uint64:
+        """
+        Return a key specific to the password and the column name
+        """
+        salt = hashlib.blake2b(name.encode(), digest_size=8).digest()
+        return self._key ^ np.uint64(int.from_bytes(salt, "big"))
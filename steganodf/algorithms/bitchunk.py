@@ -1,18 +1,226 @@
+import binascii
+import math
+from typing import Tuple
 
+import numpy as np
 import polars as pl
 
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import pack_bits, unpack_bits
 from steganodf.algorithms.permutation_algorithm import PermutationAlgorithm
 
+"""
+This algorithm split the dataframe into blocks of `block_size` consecutive rows.
+Inside a block, rows sorted by hash give a reference order and the block is
+written using the nth permutation of this order. A block of 6 rows has 6! = 720
+permutations and holds 9 bits.
+
+The payload length is written first, 5 times. Then the payload is framed as
+follow and repeated until the blocks are exhausted :
+
+ +-------------+---------------------+---------+
+ |  LENGTH x 5 |     PAYLOAD         |  CRC    |  PAYLOAD | CRC | ...
+ |  10 bytes   |   LENGTH bytes      | 4 bytes |
+ +-------------+---------------------+---------+
+
+The decoder reads all blocks in a single pass and keeps, for each bit, the value
+seen in the majority of the copies.
+"""
+
+HEADER_COPIES = 5
+
+
 class BitChunk(PermutationAlgorithm):
 
+    def __init__(self, block_size: int = 6, **kwargs):
+        """
+        Initialize an instance of BitChunk
 
-    def __init__(self, **kwargs):
+        Args:
+            block_size (int): Rows count per block. Default is 6.
+            hash_function (str|Callable): Name of the fingerprint function (see `steganodf.hashing`). Default is MD5.
+            password (str, optional) : Password used as the key of the fingerprint function.
+        """
         super().__init__(**kwargs)
-        
+        if not 2 <= block_size <= 20:
+            raise AlgorithmError("block_size must be between 2 and 20")
+
+        self._block_size = block_size
+        self._bit_per_block = int(math.log2(math.factorial(block_size)))
+        self._factorials = np.array(
+            [math.factorial(block_size - 1 - i) for i in range(block_size)], dtype=np.uint64
+        )
+
+    def compute_hash(self, df: pl.DataFrame) -> np.ndarray:
+        """
+        Return a 64 bits fingerprint for each row
+
+        >>> algo = BitChunk()
+        >>> algo.compute_hash(pl.DataFrame({"a": range(4)})).shape
+        (4,)
+        """
+        rows = self.serialize_rows(df).to_list()
+        return np.array(
+            [int.from_bytes(self.digest(row)[:8], "big") for row in rows], dtype=np.uint64
+        )
+
+    def get_blocks(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the hash of usable blocks as a matrix (block count x block_size).
+        Blocks containing duplicated rows are skipped because their order cannot be read.
+
+        Returns:
+            A tuple with the block indexes and the hash matrix
+        """
+        count = len(hashes) // self._block_size
+        blocks = hashes[: count * self._block_size].reshape(count, self._block_size)
+        ordered = np.sort(blocks, axis=1)
+        usable = np.all(ordered[:, 1:] != ordered[:, :-1], axis=1)
+        return np.flatnonzero(usable), blocks[usable]
+
+    def rank(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Return the permutation index of each block using the Lehmer code.
+        The reference permutation is the one with rows sorted by hash.
+
+        >>> algo = BitChunk(block_size=3)
+        >>> algo.rank(np.array([[1, 2, 3], [3, 2, 1], [2, 1, 3]], dtype=np.uint64)).tolist()
+        [0, 5, 2]
+        """
+        # Lehmer code: count of smaller values on the right of each position
+        smaller = blocks[:, None, :] < blocks[:, :, None]
+        right = np.triu(np.ones((self._block_size, self._block_size), dtype=bool), k=1)
+        lehmer = np.sum(smaller & right, axis=2, dtype=np.uint64)
+        return lehmer @ self._factorials
+
+    def unrank(self, values: np.ndarray) -> np.ndarray:
+        """
+        Return the permutations of each permutation index.
+        permutation[i, j] is the rank (in the sorted order) of the row to write at position j.
+
+        >>> algo = BitChunk(block_size=3)
+        >>> algo.unrank(np.array([0, 5, 2])).tolist()
+        [[0, 1, 2], [2, 1, 0], [1, 0, 2]]
+        """
+        values = values.astype(np.uint64)
+        count = len(values)
+        available = np.ones((count, self._block_size), dtype=bool)
+        permutations = np.zeros((count, self._block_size), dtype=np.int64)
+        for j in range(self._block_size):
+            digit = (values // self._factorials[j]) % np.uint64(self._block_size - j)
+            # Take the `digit`th available rank
+            position = np.cumsum(available, axis=1) == (digit.astype(np.int64) + 1)[:, None]
+            chosen = np.argmax(position & available, axis=1)
+            permutations[:, j] = chosen
+            available[np.arange(count), chosen] = False
+        return permutations
+
+    def majority(self, values: np.ndarray, width: int) -> np.ndarray:
+        """
+        Return, for each column, the bitwise majority of the values over the rows
+
+        >>> BitChunk().majority(np.array([[1, 6], [3, 4], [1, 0]]), 3).tolist()
+        [1, 4]
+        """
+        values = values.astype(np.uint64)
+        shifts = np.arange(width, dtype=np.uint64)
+        bits = (values[:, :, None] >> shifts) & np.uint64(1)
+        majority = (2 * bits.sum(axis=0) > len(values)).astype(np.uint64)
+        return majority @ (np.uint64(1) << shifts)
+
+    def header(self, payload: bytes) -> np.ndarray:
+        """
+        Return block values holding the payload length
+        """
+        if len(payload) >= 2**16:
+            raise AlgorithmError("payload is too large")
+        return np.array(
+            unpack_bits(len(payload).to_bytes(2, "big") * HEADER_COPIES, self._bit_per_block),
+            dtype=np.uint64,
+        )
+
+    def frame(self, payload: bytes) -> np.ndarray:
+        """
+        Return block values holding the payload and its CRC
+        """
+        data = payload + binascii.crc32(payload).to_bytes(4, "big")
+        return np.array(unpack_bits(data, self._bit_per_block), dtype=np.uint64)
+
+    def get_max_payload_size(self, df: pl.DataFrame) -> int:
+        """
+        Return the maximum payload size in bytes.
+        """
+        blocks, _ = self.get_blocks(self.compute_hash(df))
+        header = len(self.header(b""))
+        return max(0, (len(blocks) - header) * self._bit_per_block // 8 - 4)
+
     def encode(self, df: pl.DataFrame, payload: bytes) -> pl.DataFrame:
-        return df
+        """
+        Encode a payload in dataframe by permutation
+
+        Args:
+            df(pl.DataFrame): The host dataframe
+            payload(bytes): the payload message to hide in the host dataframe
+
+        Return:
+            Return the stego dataframe
+        """
+        hashes = self.compute_hash(df)
+        indexes, blocks = self.get_blocks(hashes)
+
+        header = self.header(payload)
+        frame = self.frame(payload)
+        copies = (len(blocks) - len(header)) // len(frame)
+        if copies <= 0:
+            raise AlgorithmError("Not enough rows to encode the payload")
+
+        values = np.concatenate([header, np.tile(frame, copies)])
+        indexes = indexes[: len(values)]
+        blocks = blocks[: len(values)]
+
+        # Rows of each block sorted by hash, then reordered by the permutation
+        order = np.argsort(blocks, axis=1)
+        permutations = self.unrank(values)
+        sources = np.take_along_axis(order, permutations, axis=1)
+
+        rows = np.arange(len(df))
+        starts = indexes * self._block_size
+        rows[starts[:, None] + np.arange(self._block_size)] = starts[:, None] + sources
+        return df[rows]
 
-        
     def decode(self, df: pl.DataFrame) -> bytes:
+        """
+        Decode the payload from the cover dataframe
+
+        Args:
+            df(pl.DataFrame): The host dataframe
+
+        Return:
+            Return the payload in bytes
+        """
+        _, blocks = self.get_blocks(self.compute_hash(df))
+        # A damaged block can rank above 2**bit_per_block - 1: keep its low
+        # bits so it does not overflow into the next value when packed.
+        values = self.rank(blocks) & np.uint64((1 << self._bit_per_block) - 1)
+
+        header_size = len(self.header(b""))
+        if len(values) < header_size:
+            return b""
+        lengths = pack_bits(values[:header_size].tolist(), self._bit_per_block, 2 * HEADER_COPIES)
+        lengths = np.frombuffer(lengths, dtype=np.uint8).reshape(HEADER_COPIES, 2)
+        length = int.from_bytes(bytes(self.majority(lengths, 8).astype(np.uint8)), "big")
+
+        values = values[header_size:]
+        frame_size = len(self.frame(bytes(length)))
+        copies = len(values) // frame_size
+        if copies == 0:
+            return b""
+
+        frames = values[: copies * frame_size].reshape(copies, frame_size)
+        voted = self.majority(frames, self._bit_per_block)
+        for candidate in [voted, *frames]:
+            frame = pack_bits(candidate.tolist(), self._bit_per_block, length + 4)
+            if binascii.crc32(frame[:-4]).to_bytes(4, "big") == frame[-4:]:
+                return frame[:-4]
 
-        return b"hello"
+        return b""
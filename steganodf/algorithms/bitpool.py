@@ -1,17 +1,28 @@
-from typing import Callable, List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Dict, Iterable, Iterator, Tuple, Union
 import polars as pl
+import numpy as np
 import logging
-import hashlib
-from reedsolo import RSCodec
-import hmac
-from struct import unpack
-import io
-import copy
 import random
 import binascii
 from steganodf.algorithms.algorithm import AlgorithmError
 from steganodf.algorithms.permutation_algorithm import PermutationAlgorithm
 from steganodf import lt
+from steganodf.compression import check_compression, compress, decompress
+from steganodf.hashing import DEFAULT_HASH_FUNCTION
+from steganodf.packet import (
+    MAX_STREAMS,
+    STREAM_SHIFT,
+    SYSTEMATIC_FLAG,
+    get_packet_format,
+    packet_stream,
+)
+from steganodf.progress import Cancelled, CancelToken, Monitor, Progress
+from steganodf.rs import BatchRSCodec
+
+if TYPE_CHECKING:
+    from steganodf.cache import FingerprintCache, PermutationCache
 
 """
 This algorithm encode bits on each row of a dataframe by permutation.
@@ -26,13 +37,75 @@ A packet is composed as follow :
  |   12 bytes   |       20 bytes      | 4 b  | 10 bytes          |
  +--------------+----------------------------+-------------------+
 
+The header is 12 bytes with `packet_version=1` and 5 bytes with
+`packet_version=2`, see `steganodf.packet`. The CRC is the first `crc_size`
+bytes of a CRC32.
+
 """
 
 
+# md5 digests are 16 bytes long. Wider values would need a longer digest
+MAX_BIT_PER_ROW = 16
+
+# Count of windows decoded together by the Reed-Solomon codec
+WINDOW_BATCH = 1024
+
+# Count of rows hashed, and of packets written, between two progress reports
+HASH_BATCH = 65536
+PACKET_BATCH = 256
+
+
 class NotEnoughBitException(Exception):
     pass
 
 
+def unpack_bits(data: bytes, width: int) -> List[int]:
+    """
+    Split bytes into a list of `width` bits values.
+    Bits are read from the least significant bit of the first byte. The last
+    value is padded with zeros if `8 * len(data)` is not a multiple of `width`.
+
+    Args:
+        data(bytes): bytes to split
+        width(int): bits count per value
+
+    Returns:
+        A list of integers between 0 and 2**width - 1
+
+    >>> unpack_bits(b"\\x2d", 2)
+    [1, 3, 2, 0]
+    >>> unpack_bits(b"\\xff\\x01", 3)
+    [7, 7, 7, 0, 0, 0]
+    """
+    stream = int.from_bytes(data, "little")
+    mask = (1 << width) - 1
+    count = -(-len(data) * 8 // width)
+    return [(stream >> (i * width)) & mask for i in range(count)]
+
+
+def pack_bits(values: List[int], width: int, size: int = None) -> bytes:
+    """
+    Concatenate a list of `width` bits values into bytes.
+    This is the inverse of `unpack_bits`.
+
+    Args:
+        values(list): integers between 0 and 2**width - 1
+        width(int): bits count per value
+        size(int, optional): bytes count to return. Default is all complete bytes.
+
+    >>> pack_bits([1, 3, 2, 0], 2)
+    b'-'
+    >>> pack_bits(unpack_bits(b"hello", 5), 5, 5)
+    b'hello'
+    """
+    stream = 0
+    for i, v in enumerate(values):
+        stream |= v << (i * width)
+    if size is None:
+        size = len(values) * width // 8
+    return (stream & ((1 << (size * 8)) - 1)).to_bytes(size, "little")
+
+
 class BitPool(PermutationAlgorithm):
 
     def __init__(
@@ -40,9 +113,20 @@ class BitPool(PermutationAlgorithm):
         bit_per_row: int = 1,
         data_size: int = 20,
         correction_size: int = 10,
-        hash_function: Callable = hashlib.md5,
+        hash_function: Union[str, Callable] = DEFAULT_HASH_FUNCTION,
         password: str = None,
         reverse_reading: bool = False,
+        seed: Union[int, random.Random] = None,
+        cache: Union[str, "PermutationCache"] = None,
+        progress: Callable[[Progress], None] = None,
+        cancel: CancelToken = None,
+        packet_version: int = 1,
+        crc_size: int = 4,
+        compression: str = None,
+        systematic: bool = False,
+        stream: int = 0,
+        threads: int = 1,
+        fingerprint_cache: Union[str, "FingerprintCache"] = None,
         **kwargs,
     ):
         """
@@ -52,28 +136,75 @@ class BitPool(PermutationAlgorithm):
             bit_per_row (int): Number of bits per line. Default is 1.
             data_size (int): Data size of the packet in byte. Defaut is 20.
             correction_size (int): Correction size of the packet in byte. Default is 10.
-            hash_function (Callable): Hash function to use. Default is MD5.
-            password (str, optional) : Password used for hashing function with a HMAC algorithm.
+            hash_function (str|Callable): Name of the fingerprint function (see `steganodf.hashing`). Default is MD5.
+            password (str, optional) : Password used as the key of the fingerprint function.
             reverse_reading (bool): Read the dataframe also in the reverse direction. It doubles the computation time.
+            seed (int|random.Random, optional): Seed of the LT stream and of the order of the unused rows.
+                The same seed gives the same stego dataframe. Default is the global random generator.
+            cache (str|PermutationCache, optional): Directory caching the permutations of seeded encodings.
+            progress (Callable, optional): Called with a `Progress` after each batch of rows or windows.
+            cancel (CancelToken, optional): Stop the decoding, returning a partial result, or the encoding,
+                raising `Cancelled`.
+            packet_version (int): Format of the packet header, 1 or 2 (compact). Default is 1.
+            crc_size (int): Bytes of CRC32 checking a packet, between 1 and 4. Default is 4.
+            compression (str, optional): Compress the payload, see `steganodf.compression`.
+                Needs `packet_version=2`. The decoder finds the method in the packets.
+            systematic (bool): Write the source blocks as is before the LT combinations, an undamaged
+                file decodes with the fewest packets. Needs `packet_version=2`.
+            stream (int): Identifier of the stream to encode or decode, between 0 and 7, see
+                `encode_streams`. Other streams are ignored. Default is 0.
+            threads (int): Threads serializing and hashing the batches of rows. Default is 1.
+            fingerprint_cache (str|FingerprintCache, optional): Directory caching the row hashes of
+                the covers, see `steganodf.cache`. Not used with a callable `hash_function`.
         """
-        super().__init__(**kwargs)
+        super().__init__(hash_function=hash_function, password=password, **kwargs)
 
-        self._hash_function = hash_function
-        self._password = password
         self._bit_per_row = bit_per_row
 
         self._data_size = data_size
         self._correction_size = correction_size
-        # cannot be change.. Value from lt-decode
-        self._header_size = 12
-        # cannot be change .. Value from CRC32
-        self._crc_size = 4
+        self._codec = BatchRSCodec(correction_size)
+        self._packet_format = get_packet_format(packet_version)
+        self._header_size = self._packet_format.header_size
+        # Truncated CRC32
+        self._crc_size = crc_size
+        self._compression = compression
+        self._systematic = systematic
+        self._stream = stream
+        self._threads = threads
 
         # Read also in reverse
         self._reverse_reading = reverse_reading
 
-        if self._bit_per_row not in (1, 2, 4):
-            raise AlgorithmError("bit_per_row must be 1,2 or 4")
+        self._seed = seed
+        if isinstance(cache, (str, Path)):
+            from steganodf.cache import PermutationCache
+
+            cache = PermutationCache(cache)
+        self._cache = cache
+        if isinstance(fingerprint_cache, (str, Path)):
+            from steganodf.cache import FingerprintCache
+
+            fingerprint_cache = FingerprintCache(fingerprint_cache)
+        self._fingerprint_cache = fingerprint_cache
+        self._progress = progress
+        self._cancel = cancel
+
+        if not 1 <= self._bit_per_row <= MAX_BIT_PER_ROW:
+            raise AlgorithmError(f"bit_per_row must be between 1 and {MAX_BIT_PER_ROW}")
+        if not 1 <= self._crc_size <= 4:
+            raise AlgorithmError("crc_size must be between 1 and 4")
+        check_compression(compression)
+        if compression is not None and self._packet_format.version < 2:
+            raise AlgorithmError("Compression is flagged in the packets and needs packet_version=2")
+        if systematic and self._packet_format.version < 2:
+            raise AlgorithmError("Systematic streams are flagged in the packets and need packet_version=2")
+        if threads < 1:
+            raise AlgorithmError("threads must be at least 1")
+        if not 0 <= stream < MAX_STREAMS:
+            raise AlgorithmError(f"stream must be between 0 and {MAX_STREAMS - 1}")
+        if stream and self._packet_format.version < 2:
+            raise AlgorithmError("Streams are flagged in the packets and need packet_version=2")
 
     def hash(self, text: str) -> int:
         """
@@ -91,17 +222,24 @@ class BitPool(PermutationAlgorithm):
         >>> algo = BitPool(bit_per_row = 2)
         >>> algo.hash("hello") in (0,1,2,3)
         True
+        >>> BitPool(bit_per_row = 12).hash("hello") < 2**12
+        True
 
         """
 
-        if self._password:
-            # Use HMAC if password is set
-            hash = hmac.new(self._password.encode(), text.encode(), self._hash_function)
-        else:
-            hash = self._hash_function(text.encode())
+        return self.hash_bytes(text.encode())
 
-        digest = hash.digest()[0]
-        digest = digest >> (8 - self._bit_per_row)
+    def hash_bytes(self, data: bytes) -> int:
+        """
+        Same as `hash` for bytes
+
+        >>> BitPool(bit_per_row=2).hash_bytes(b"hello") == BitPool(bit_per_row=2).hash("hello")
+        True
+        """
+        # Use as many digest bytes as required by bit_per_row
+        size = (self._bit_per_row + 7) // 8
+        digest = int.from_bytes(self._digest(data)[:size], "big")
+        digest = digest >> (8 * size - self._bit_per_row)
         return digest
 
     def get_packet_size(self) -> int:
@@ -140,19 +278,21 @@ class BitPool(PermutationAlgorithm):
         estimate_size = int(max_size // 3)
         return estimate_size
 
-    def find_packet(self, df: pl.DataFrame, max_window=100) -> Tuple[int, int, int]:
+    def monitor(self) -> Monitor:
         """
-        TODO
+        Return the progress monitor of a new call
         """
-        pass
+        return Monitor(self._progress, self._cancel)
 
-    def compute_hash(self, df: pl.DataFrame) -> pl.DataFrame:
+    def compute_hash(self, df: pl.DataFrame, monitor: Monitor = None) -> pl.DataFrame:
         """
         Add a 'hash' column containing the hash fingerprint of the row
-        The result depend on the bit_per_row.
+        The result depend on the bit_per_row. The batches of rows are serialized
+        and hashed by `threads` threads, or read from the `fingerprint_cache`.
 
         Args:
             df (pl.DataFrame): a a cover Dataframe
+            monitor (Monitor, optional): progress of the current call. Raise `Cancelled` if it is cancelled.
 
         Return:
             A new dataframe with the 'hash' column computed.
@@ -165,13 +305,63 @@ class BitPool(PermutationAlgorithm):
 
         """
 
-        df = df.with_columns(
-            df.cast(pl.Utf8())
-            .sum_horizontal()
-            .map_elements(self.hash, return_dtype=pl.UInt32)
-            .alias("hash")
-        )
-        return df
+        monitor = monitor or self.monitor()
+        monitor.set(stage="hashing", row_count=len(df))
+
+        cache, key = self._fingerprint_cache, None
+        if cache is not None and isinstance(self._hash_function, str):
+            key = cache.key(df, self._hash_function, self._password, self._bit_per_row, self._columns)
+            hashes = cache.get(key, len(df))
+            if hashes is not None:
+                monitor.update(rows_hashed=len(df))
+                return df.with_columns(pl.Series("hash", hashes, dtype=pl.UInt32))
+
+        def hash_batch(start: int) -> pl.Series:
+            return self.hash_rows(self.serialize_rows(df.slice(start, HASH_BATCH)))
+
+        hashes = []
+        # The batches are hashed in order by the threads
+        with ThreadPoolExecutor(self._threads) as executor:
+            for start, batch in zip(
+                range(0, len(df), HASH_BATCH), executor.map(hash_batch, range(0, len(df), HASH_BATCH))
+            ):
+                hashes.append(batch)
+                if monitor.update(rows_hashed=min(start + HASH_BATCH, len(df))):
+                    executor.shutdown(cancel_futures=True)
+                    raise Cancelled("Hashing cancelled")
+
+        hashes = pl.concat(hashes) if hashes else self.hash_rows(self.serialize_rows(df))
+        if key is not None:
+            cache.put(key, hashes.to_numpy())
+        return df.with_columns(hashes)
+
+    def hash_rows(self, rows: pl.Series) -> pl.Series:
+        """
+        Return the 'hash' column of serialized rows
+
+        >>> BitPool(bit_per_row=2).hash_rows(pl.Series(["hello"])).to_list()
+        [1]
+        """
+        hashes = self.hash_many(row.encode() for row in rows.to_list())
+        return pl.Series("hash", hashes, dtype=pl.UInt32)
+
+    def hash_many(self, items: Iterable[bytes]) -> np.ndarray:
+        """
+        Same as `hash_bytes` for many items. The digests are truncated and
+        shifted all at once.
+
+        >>> algo = BitPool(bit_per_row=12)
+        >>> algo.hash_many([b"hello", b"world"]).tolist() == [algo.hash("hello"), algo.hash("world")]
+        True
+        """
+        size = (self._bit_per_row + 7) // 8
+        digest = self._digest
+        data = b"".join([digest(item)[:size] for item in items])
+        digests = np.frombuffer(data, dtype=np.uint8).reshape(-1, size).astype(np.uint32)
+        values = np.zeros(len(digests), dtype=np.uint32)
+        for i in range(size):
+            values = (values << np.uint32(8)) | digests[:, i]
+        return values >> np.uint32(8 * size - self._bit_per_row)
 
     def create_pool(self, hashes: List[int]) -> Dict[int, int]:
         """
@@ -199,16 +389,19 @@ class BitPool(PermutationAlgorithm):
         #     random.shuffle(pool[key])
         return pool
 
-    def get_remaining_indexes(self, pool: Dict[int, int], indexes: List[int] = None) -> List[int]:
+    def get_remaining_indexes(
+        self, pool: Dict[int, int], indexes: List[int] = None, rng: random.Random = None
+    ) -> List[int]:
         """
-        Return row indices from the pool which have not been consuming by the encoder
+        Return row indices from the pool which have not been consuming by the encoder,
+        shuffled with `rng` or the global random generator
         """
         rows = []
         for k, v in pool.items():
             i = indexes[k]
             rows += v[i:]
 
-        random.shuffle(rows)
+        (rng or random).shuffle(rows)
         return rows
 
     def bytes_to_rows_count(self, data: bytes) -> int:
@@ -216,7 +409,7 @@ class BitPool(PermutationAlgorithm):
         Return line count required for N bytes
         """
 
-        return len(data) * 8 // self._bit_per_row
+        return -(-len(data) * 8 // self._bit_per_row)
 
     def _encode(self, df: pl.DataFrame, payload: bytes) -> Tuple[pl.DataFrame, int]:
         """
@@ -236,39 +429,186 @@ class BitPool(PermutationAlgorithm):
         if len(payload) < self._data_size:
             logging.info("payload size is smaller than data_size. You will lost capacity")
 
-        new_df = self.compute_hash(df)
-        pool = self.create_pool(new_df["hash"].to_list())
+        key = self.cache_key(df, payload)
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                rows, block_count = cached
+                return df[rows], block_count
+
+        monitor = self.monitor()
+        rng = self.get_rng()
+        packets = self.build_packets(payload, self.get_packet_capacity(len(df)), rng=rng)
+        hashes = self.compute_hash(df, monitor)["hash"].to_list()
+        rows, block_count = self.permute(hashes, packets, rng=rng, monitor=monitor)
+        if key is not None:
+            self._cache.put(key, rows, block_count)
+        return df[rows], block_count
+
+    def get_rng(self) -> Union[random.Random, None]:
+        """
+        Return a new random generator from the seed, None without seed.
+        A `random.Random` seed is returned as is and keeps its state between calls.
+
+        >>> BitPool(seed=1).get_rng().random() == BitPool(seed=1).get_rng().random()
+        True
+        """
+        if self._seed is None or isinstance(self._seed, random.Random):
+            return self._seed
+        return random.Random(self._seed)
+
+    def cache_key(self, df: pl.DataFrame, payload: bytes) -> Union[str, None]:
+        """
+        Return the key of an encoding in the cache. None if there is no cache
+        or the result is not reproducible.
+        """
+        if self._cache is None or not isinstance(self._seed, int) or callable(self._hash_function):
+            return None
+        params = {
+            "algorithm": "bitpool",
+            "bit_per_row": self._bit_per_row,
+            "data_size": self._data_size,
+            "correction_size": self._correction_size,
+            "hash_function": self._hash_function,
+            "password": self._password,
+            "columns": self._columns,
+            "seed": self._seed,
+            "packet_version": self._packet_format.version,
+            "crc_size": self._crc_size,
+            "compression": self._compression,
+            "systematic": self._systematic,
+            "stream": self._stream,
+        }
+        return self._cache.key(df, payload, params)
+
+    def build_packets(
+        self, payload: bytes, count: int, rng: random.Random = None, stream: int = None
+    ) -> np.ndarray:
+        """
+        Build the first `count` packets of the LT stream of a payload, with their
+        CRC and Reed-Solomon correction.
+
+        Args:
+            payload(bytes): the payload
+            count(int): packets count
+            rng(random.Random, optional): generator of the LT seed
+            stream(int, optional): stream identifier. Default is the `stream` parameter.
+
+        Returns:
+            A uint8 matrix (count x packet size)
+
+        >>> BitPool().build_packets(b"hello", 3).shape
+        (3, 46)
+        >>> BitPool(packet_version=2, crc_size=2).build_packets(b"hello", 3).shape
+        (3, 37)
+        """
+        payload, flags = compress(payload, self._compression)
+        if self._systematic:
+            flags |= SYSTEMATIC_FLAG
+        flags |= (self._stream if stream is None else stream) << STREAM_SHIFT
+        blocks = self._packet_format.build(payload, self._data_size, count, rng=rng, flags=flags)
+        # Add CRC code
+        data, size = blocks.tobytes(), blocks.shape[1]
+        crcs = b"".join(self.crc(data[i : i + size]) for i in range(0, len(data), size))
+        blocks = np.hstack([blocks, np.frombuffer(crcs, dtype=np.uint8).reshape(count, -1)])
+        # Add reed solomon error corection code
+        return self._codec.encode(blocks)
+
+    def multiplex_packets(
+        self, payloads: List[bytes], count: int, rng: random.Random = None
+    ) -> np.ndarray:
+        """
+        Build `count` packets of several payloads, the payload `i` in the stream `i`.
+        Each stream gets a share of the packets proportional to its payload size and
+        the streams are interleaved evenly, so any part of the cover holds all of them.
+
+        >>> packets = BitPool(packet_version=2).multiplex_packets([b"a" * 40, b"b"], 6)
+        >>> [packet_stream(packet.tobytes()) for packet in packets]
+        [0, 0, 0, 1, 0, 0]
+        """
+        if len(payloads) > MAX_STREAMS:
+            raise AlgorithmError(f"At most {MAX_STREAMS} payloads can be multiplexed")
+        if len(payloads) > 1 and self._packet_format.version < 2:
+            raise AlgorithmError("Streams are flagged in the packets and need packet_version=2")
+
+        weights = np.array([len(payload) // self._data_size + 1 for payload in payloads])
+        # Largest remainders, so the shares sum to count
+        shares = count * weights / weights.sum()
+        counts = np.floor(shares).astype(int)
+        counts[np.argsort(counts - shares, kind="stable")[: count - counts.sum()]] += 1
+        counts = np.maximum(counts, 1)
+        packets = [
+            self.build_packets(payload, int(n), rng=rng, stream=stream)
+            for stream, (payload, n) in enumerate(zip(payloads, counts))
+        ]
+        # Place the packet j of a stream of n packets at (j + 0.5) / n
+        positions = np.concatenate([(np.arange(n) + 0.5) / n for n in counts])
+        return np.concatenate(packets)[np.argsort(positions, kind="stable")]
+
+    def embed_packets(
+        self, df: pl.DataFrame, packets: np.ndarray, rng: random.Random = None
+    ) -> Tuple[pl.DataFrame, int]:
+        """
+        Write packets in the order of the rows, as long as the pool has enough rows.
+
+        Args:
+            df(pl.DataFrame): The host dataframe
+            packets(np.ndarray): packets built by `build_packets`
+            rng(random.Random, optional): generator of the order of the unused rows
+
+        Returns:
+            The stego dataframe and the count of packets written
+        """
+        rows, block_count = self.permute(self.compute_hash(df)["hash"].to_list(), packets, rng=rng)
+        return df[rows], block_count
+
+    def permute(
+        self,
+        hashes: List[int],
+        packets: np.ndarray,
+        rng: random.Random = None,
+        monitor: Monitor = None,
+    ) -> Tuple[List[int], int]:
+        """
+        Return the order of the rows writing the packets, from the hash of each row
+
+        Args:
+            hashes(list): The hash of each row
+            packets(np.ndarray): packets built by `build_packets`
+            rng(random.Random, optional): generator of the order of the unused rows
+            monitor(Monitor, optional): progress of the current call. Raise `Cancelled` if it is cancelled.
+
+        Returns:
+            The row indexes in their new order and the count of packets written
+        """
+        monitor = monitor or self.monitor()
+        monitor.set(stage="encoding")
+        pool = self.create_pool(hashes)
         rows = []
-        rsc = RSCodec(self._correction_size)
-        data = io.BytesIO(payload)
         block_count = 0
-        valid_blocks = []
         encode_indexes = [0] * 2 ** (self._bit_per_row)
-        for i, block in enumerate(lt.encode.encoder(data, self._data_size)):
-
-            # Add CRC code
-            crc = binascii.crc32(block).to_bytes(self._crc_size)
-            block += crc
-            # Add reed solomon error corection code
-            if self._correction_size > 0:
-                block = rsc.encode(block)
 
+        for block in packets:
             old_indexes = encode_indexes.copy()
             try:
-                bloc_rows = self.encode_chunk(block, pool, indexes=encode_indexes)
+                bloc_rows = self.encode_chunk(block.tobytes(), pool, indexes=encode_indexes)
             except NotEnoughBitException:
                 encode_indexes = old_indexes
                 break
 
             rows += bloc_rows
             block_count += 1
-            valid_blocks.append(block)
+            if block_count % PACKET_BATCH == 0 and monitor.update(packets=block_count):
+                raise Cancelled("Encoding cancelled")
 
-        remains = self.get_remaining_indexes(pool, encode_indexes)
+        remains = self.get_remaining_indexes(pool, encode_indexes, rng=rng)
         rows += remains
-        return df[rows], block_count
+        monitor.update(packets=block_count)
+        return rows, block_count
 
-    def _decode(self, df: pl.DataFrame) -> bytes:
+    def _decode(
+        self, df: pl.DataFrame, decoder: lt.decode.LtDecoder = None, source: str = None
+    ) -> dict:
         """
         Override method
 
@@ -276,67 +616,328 @@ class BitPool(PermutationAlgorithm):
 
         Args:
             df(pl.Dataframe): The host dataframe containing the secret payload
+            decoder(LtDecoder, optional): A decoder to resume, holding the packets of other fragments.
+            source(str, optional): An identifier of the fragment. A fragment already consumed
+                by the decoder is not scanned again.
 
         Returns:
-            The secret message as bytes
+            A dict with the payload, the success status, the count of valid packets
+            found in this fragment, the LT decoder and whether the decoding was cancelled.
+            A cancelled decoder can be resumed with the same fragment.
 
         """
+        monitor = self.monitor()
+        # Packets are only searched if the decoder needs them
+        packets = self.find_packets(df, monitor)
+        return self.consume_packets(packets, decoder=decoder, source=source, monitor=monitor)
+
+    def encode_streams(self, df: pl.DataFrame, payloads: List[bytes]) -> pl.DataFrame:
+        """
+        Encode several independent payloads in a dataframe, the payload `i` in the stream `i`.
+        Decode one with `BitPool(stream=i)`, or all of them with `decode_streams`.
+
+        Args:
+            df(pl.DataFrame): The host dataframe
+            payloads(list): Up to 8 payloads
+
+        Returns:
+            The stego dataframe
+
+        >>> import numpy as np
+        >>> df = pl.DataFrame({"a": np.random.rand(10000)})
+        >>> stego = BitPool(packet_version=2).encode_streams(df, [b"alice", b"2024-06-01"])
+        >>> BitPool(packet_version=2, stream=1).decode(stego)
+        b'2024-06-01'
+        """
+        monitor = self.monitor()
+        rng = self.get_rng()
+        packets = self.multiplex_packets(payloads, self.get_packet_capacity(len(df)), rng=rng)
+        hashes = self.compute_hash(df, monitor)["hash"].to_list()
+        rows, _ = self.permute(hashes, packets, rng=rng, monitor=monitor)
+        return df[rows]
+
+    def decode_streams(self, df: pl.DataFrame) -> Dict[int, bytes]:
+        """
+        Decode all the streams of a dataframe in a single scan
+
+        Returns:
+            The payload of each stream recovered
+        """
+        decoders = {}
+        for packet in self.find_packets(df, streams=range(MAX_STREAMS)):
+            decoder = decoders.setdefault(packet_stream(packet), lt.decode.LtDecoder())
+            if not decoder.is_done():
+                self.consume_packet(decoder, packet)
+
+        results = {stream: self._decode_result(decoder, 0) for stream, decoder in decoders.items()}
+        return {stream: result["payload"] for stream, result in sorted(results.items()) if result["success"]}
+
+    def decode_keys(self, df: pl.DataFrame, passwords: List[str]) -> dict:
+        """
+        Decode a dataframe whose password is one of several candidates.
+        The rows are serialized once and hashed with every key by `threads` threads.
+        The hashes of each key are scanned in order while the next ones are computed.
+        The keys with an undamaged packet, found without the Reed-Solomon decoding,
+        are decoded first and the other ones last.
+
+        Args:
+            df(pl.DataFrame): The stego dataframe
+            passwords(list): The candidate passwords, None for no password
+
+        Returns:
+            Same as `_decode`, with the matching `password`. Without a match, the
+            result of the last candidate with `password` None.
+
+        >>> import numpy as np
+        >>> df = pl.DataFrame({"a": np.random.rand(10000)})
+        >>> stego = BitPool(password="bob").encode(df, b"hello")
+        >>> result = BitPool().decode_keys(stego, ["alice", "bob", "carol"])
+        >>> result["password"], result["payload"]
+        ('bob', b'hello')
+        """
+        monitor = self.monitor()
+        rows = [row.encode() for row in self.serialize_rows(df).to_list()]
+        monitor.set(stage="hashing", row_count=len(rows))
+        algorithms = [self.with_password(password) for password in passwords]
+
+        def attempt(password: str, algo: BitPool, values: np.ndarray) -> dict:
+            result = algo.consume_packets(algo.scan_hashes(values, monitor), monitor=monitor)
+            result["password"] = password if result["success"] else None
+            return result
+
+        result = self._decode_result(lt.decode.LtDecoder(), 0)
+        result.update(password=None, cancelled=False)
+        damaged = []
+        with ThreadPoolExecutor(self._threads) as executor:
+            hashes = executor.map(lambda algo: algo.hash_many(rows), algorithms)
+            for password, algo, values in zip(passwords, algorithms, hashes):
+                # Without the Reed-Solomon decoding, a wrong key is rejected about 5 times faster
+                if next(algo.scan_undamaged(values), None) is None:
+                    damaged.append((password, algo, values))
+                    continue
+                result = attempt(password, algo, values)
+                if result["success"] or result["cancelled"]:
+                    # The keys left are not hashed
+                    executor.shutdown(cancel_futures=True)
+                    return result
+
+        # The keys whose packets are all damaged
+        for password, algo, values in damaged:
+            result = attempt(password, algo, values)
+            if result["success"] or result["cancelled"]:
+                break
+        return result
+
+    def consume_packets(
+        self,
+        packets: Iterator[bytes],
+        decoder: lt.decode.LtDecoder = None,
+        source: str = None,
+        monitor: Monitor = None,
+    ) -> dict:
+        """
+        Add packets to a LT decoder until the payload is recovered
+
+        Args:
+            packets(Iterator): Packets found by `find_packets` or `scan_hashes`
+            decoder(LtDecoder, optional): A decoder to resume
+            source(str, optional): An identifier of the fragment holding the packets
+            monitor(Monitor, optional): progress of the current call, shared with the packets iterator
+
+        Returns:
+            Same as `_decode`
+        """
+        if decoder is None:
+            decoder = lt.decode.LtDecoder()
+        monitor = monitor or self.monitor()
+
+        if decoder.is_done() or (source is not None and source in decoder.sources):
+            return self._decode_result(decoder, 0)
+
+        block_count = 0
+        try:
+            for packet in packets:
+                self.consume_packet(decoder, packet)
+                block_count += 1
+                monitor.set(packets=block_count, ratio=decoder.ratio())
+                if decoder.is_done():
+                    break
+        except Cancelled:
+            monitor.set(cancelled=True)
+
+        cancelled = monitor.progress.cancelled and not decoder.is_done()
+        if source is not None and not cancelled:
+            decoder.sources.add(source)
+
+        result = self._decode_result(decoder, block_count)
+        result["cancelled"] = cancelled
+        return result
+
+    def find_packets(
+        self, df: pl.DataFrame, monitor: Monitor = None, streams: Iterable[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Scan the windows of a stego dataframe and yield the valid packets, without
+        their correction bytes. Windows are decoded in batches, so stopping the
+        iteration early skips the remaining windows.
+
+        Args:
+            df(pl.Dataframe): The stego dataframe
+            monitor(Monitor, optional): progress of the current call. The iteration
+                stops if it is cancelled while scanning, `Cancelled` is raised while hashing.
+            streams(Iterable, optional): identifiers of the streams to keep. Default is the
+                `stream` parameter.
+
+        Returns:
+            An iterator of packets (header, data and CRC)
+        """
+        monitor = monitor or self.monitor()
         # read hash rows
-        new_df = self.compute_hash(df)
+        hashes = self.compute_hash(df, monitor)["hash"].to_numpy()
+        yield from self.scan_hashes(hashes, monitor, streams=streams)
 
+    def scan_hashes(
+        self, hashes: np.ndarray, monitor: Monitor = None, streams: Iterable[int] = None
+    ) -> Iterator[bytes]:
+        """
+        Yield the valid packets written in a sequence of row hashes.
+        This is `find_packets` once the hashes are computed.
+        """
+        monitor = monitor or self.monitor()
+        streams = {self._stream} if streams is None else set(streams)
         # concat with reverse orientation
         # This is same than reading a second time the dataframe from bottom to up
         if self._reverse_reading:
-            new_df = pl.concat([new_df, new_df.reverse()])
+            hashes = np.concatenate([hashes, hashes[::-1]])
 
-        hash = new_df["hash"].to_list()
+        window_count = self.get_window_count(len(hashes))
+        monitor.set(stage="decoding", window_count=window_count)
+        for start in range(0, window_count, WINDOW_BATCH):
+            # Decode a batch of windows together
+            stop = min(start + WINDOW_BATCH, window_count)
+            yield from self.scan_windows(hashes, start, stop, streams=streams)
 
-        rsc = RSCodec(self._correction_size)
-        decoder = lt.decode.LtDecoder()
+            if monitor.update(windows_scanned=stop):
+                return
 
-        window = (self.get_packet_size()) * 8 // self._bit_per_row
-        success = False
-        valid_blocks = []
-        count = 0
-        for i in range(0, len(hash) - window):
-            chunk = hash[i : i + window]
-            block = self.decode_chunk(chunk)
+    def get_window_count(self, row_count: int) -> int:
+        """
+        Return the count of windows, the possible packet positions, in `row_count` rows
+        """
+        window = self.bytes_to_rows_count(bytes(self.get_packet_size()))
+        return max(row_count - window + 1, 0)
 
-            try:
-                if self._correction_size > 0:
-                    packet = rsc.decode(block)[0]
-                else:
-                    packet = block
-            except Exception:
-                continue
+    def scan_windows(
+        self, hashes: np.ndarray, start: int, stop: int, streams: Iterable[int] = None
+    ) -> List[bytes]:
+        """
+        Return the valid packets of the windows starting between `start` and `stop`,
+        decoded together. This is one batch of `scan_hashes`.
+        """
+        packets, valid = self._codec.decode(self.decode_windows(hashes, start, stop))
+        return self.check_packets(packets[valid], streams=streams)
 
-            header = packet[:12]
-            data = packet[12:-4]
-            # Check header
+    def scan_undamaged(self, hashes: np.ndarray, streams: Iterable[int] = None) -> Iterator[bytes]:
+        """
+        Yield the packets written without error in a sequence of row hashes.
+        The Reed-Solomon decoding is skipped, this tells quickly whether the
+        hashes hold packets, but a damaged packet is missed.
+        """
+        if self._reverse_reading:
+            hashes = np.concatenate([hashes, hashes[::-1]])
 
-            crc = packet[-4:]
-            read_crc = binascii.crc32(packet[:-4]).to_bytes(self._crc_size)
+        size = self.get_packet_size() - self._correction_size
+        window_count = self.get_window_count(len(hashes))
+        for start in range(0, window_count, WINDOW_BATCH):
+            stop = min(start + WINDOW_BATCH, window_count)
+            yield from self.check_packets(self.decode_windows(hashes, start, stop)[:, :size], streams)
 
-            block_count, data_size, uuid = unpack("!III", header)
+    def check_packets(self, packets: np.ndarray, streams: Iterable[int] = None) -> List[bytes]:
+        """
+        Return the packets, without their correction bytes, whose header and CRC are valid
+        """
+        streams = {self._stream} if streams is None else set(streams)
+        found = []
+        for packet in packets:
+            packet = packet.tobytes()
+            block = packet[: -self._crc_size]
+            # Check header and CRC, skip the other streams
+            if (
+                packet_stream(block) in streams
+                and self._packet_format.parse(block, self._data_size) is not None
+                and packet[-self._crc_size :] == self.crc(block)
+            ):
+                found.append(packet)
+        return found
+
+    def crc(self, block: bytes) -> bytes:
+        """
+        Return the CRC of a packet (header and data)
 
-            if data_size == len(data) and crc == read_crc:
-                valid_blocks.append(packet)
-                count += 1
-                stream = io.BytesIO(packet)
-                header = lt.decode._read_header(stream)
-                block = lt.decode._read_block(header[1], stream)
-                decoder.consume_block((header, block))
+        >>> BitPool(crc_size=2).crc(b"hello")
+        b'6\\x10'
+        """
+        return binascii.crc32(block).to_bytes(4)[: self._crc_size]
 
-                if decoder.is_done():
-                    success = True
-                    break
+    def consume_packet(self, decoder: lt.decode.LtDecoder, packet: bytes):
+        """
+        Add a packet found by `find_packets` to a LT decoder
+        """
+        block = packet[: self._header_size + self._data_size]
+        parsed = self._packet_format.parse(block, self._data_size)
+        decoder.consume_block(
+            (parsed.header, parsed.block),
+            padded=parsed.padded,
+            flags=parsed.flags,
+            src_blocks=parsed.src_blocks,
+        )
 
-        if count == 0:
-            payload = b""
-        else:
-            payload = decoder.bytes_dump()
+    def _decode_result(self, decoder: lt.decode.LtDecoder, block_count: int) -> dict:
+        """
+        Return the result of `_decode` from the state of the LT decoder
+        """
+        payload = decoder.bytes_dump() if decoder.initialized else b""
+        success = decoder.is_done()
+        if success:
+            try:
+                payload = decompress(payload, decoder.flags)
+            except AlgorithmError:
+                # Packets of another stream passed the CRC
+                success = False
+        return {
+            "payload": payload,
+            "success": success,
+            "block_count": block_count,
+            "decoder": decoder,
+        }
+
+    def decode_fragments(
+        self, dfs: List[pl.DataFrame], decoder: lt.decode.LtDecoder = None
+    ) -> dict:
+        """
+        Decode a payload spread over several fragments of a stego dataframe.
+        Packets of all fragments are pooled in a single LT decoder and the
+        scan stops as soon as the payload is recovered.
 
-        return {"payload": payload, "success": success, "block_count": len(valid_blocks)}
+        Args:
+            dfs(list): The fragments
+            decoder(LtDecoder, optional): A decoder to resume
+
+        Returns:
+            Same as `_decode`
+        """
+        decoder = decoder or lt.decode.LtDecoder()
+        block_count = 0
+        cancelled = False
+        for df in dfs:
+            result = self._decode(df, decoder=decoder)
+            block_count += result["block_count"]
+            cancelled = result["cancelled"]
+            if decoder.is_done() or cancelled:
+                break
+        result = self._decode_result(decoder, block_count)
+        result["cancelled"] = cancelled
+        return result
 
     def encode(self, df: pl.DataFrame, payload: bytes) -> pl.DataFrame:
         """
@@ -384,20 +985,14 @@ class BitPool(PermutationAlgorithm):
             indexes = [0] * (2**self._bit_per_row)
 
         rows = []
-        for byte in chunk:
-            # For each bytes, extract bit to use for encoding
-            # For example, using bit_per_row=2, split 1 bytes into 4 part
-            # 00101101 ==> 00 , 10, 11, 01 ==> 0, 2, 3, 1
-
-            mask = 2 ** (self._bit_per_row) - 1
-            for i in range(0, 8, self._bit_per_row):
-                m = mask << i
-                v = (byte & m) >> i
-                try:
-                    rows.append(pool[v][indexes[v]])
-                    indexes[v] += 1
-                except Exception:
-                    raise NotEnoughBitException("Not enough bits to encode data ")
+        # For example, using bit_per_row=2, split 1 bytes into 4 part
+        # 00101101 ==> 01, 11, 10, 00 ==> 1, 3, 2, 0
+        for v in unpack_bits(chunk, self._bit_per_row):
+            try:
+                rows.append(pool[v][indexes[v]])
+                indexes[v] += 1
+            except Exception:
+                raise NotEnoughBitException("Not enough bits to encode data ")
         return rows
 
     def decode_chunk(self, hashes: List[int]) -> bytes:
@@ -407,19 +1002,46 @@ class BitPool(PermutationAlgorithm):
         Args:
             hashes(list): the hash list comming from the hash column in encoded dataframe
 
+        >>> BitPool(bit_per_row=2).decode_chunk([1, 3, 2, 0])
+        bytearray(b'-')
+        >>> BitPool(bit_per_row=3).decode_chunk([7, 7, 3])
+        bytearray(b'\\xff')
+        """
+        size = len(hashes) * self._bit_per_row // 8
+        return bytearray(pack_bits(hashes, self._bit_per_row, size))
+
+    def decode_windows(self, hashes: np.ndarray, start: int, stop: int) -> np.ndarray:
         """
-        data = bytearray()
-        chunk_size = 8 // self._bit_per_row
+        Decode the packets of all windows starting between `start` and `stop`.
+        This is `decode_chunk` applied to many windows at once.
 
-        for i in range(0, len(hashes), chunk_size):
-            chunk = hashes[i : i + chunk_size]
-            byte = 0
-            for j, val in enumerate(chunk):
-                shift = self._bit_per_row * (j + 1) - self._bit_per_row
-                byte |= val << shift
-            data.append(byte)
+        Args:
+            hashes(np.ndarray): the hash column of the encoded dataframe
+            start(int): index of the first window
+            stop(int): index after the last window
+
+        Returns:
+            A uint8 matrix (window count x packet size)
 
-        return data
+        >>> algo = BitPool(bit_per_row=2, data_size=1, correction_size=0)
+        >>> hashes = np.array([algo.hash(str(i)) for i in range(100)])
+        >>> bytes(algo.decode_windows(hashes, 3, 4)[0]) == bytes(algo.decode_chunk(hashes[3:3 + 68].tolist()))
+        True
+        """
+        size = self.get_packet_size()
+        width = self._bit_per_row
+        window = self.bytes_to_rows_count(bytes(size))
+        windows = np.lib.stride_tricks.sliding_window_view(hashes, window)[start:stop]
+
+        bits = (windows[:, :, None] >> np.arange(width)) & 1
+        bits = bits.reshape(len(windows), -1)[:, : size * 8].astype(np.uint8)
+        return np.packbits(bits.reshape(len(windows), size, 8), axis=2, bitorder="little")[:, :, 0]
+
+    def get_packet_capacity(self, row_count: int) -> int:
+        """
+        Return the maximum count of packets which can be written in `row_count` rows
+        """
+        return max(1, row_count * self._bit_per_row // (8 * self.get_packet_size()))
 
     def get_data_size_available(self, df: pl.DataFrame) -> int:
         """
@@ -0,0 +1,295 @@
+import itertools
+from typing import Iterable, List
+
+import numpy as np
+import polars as pl
+
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import MAX_BIT_PER_ROW, WINDOW_BATCH, BitPool
+from steganodf.algorithms.geometry import (
+    DEFAULT_BIT_PER_ROWS,
+    DEFAULT_CORRECTION_SIZES,
+    DEFAULT_DATA_SIZES,
+    Geometry,
+)
+from steganodf.hashing import DEFAULT_HASH_FUNCTION
+from steganodf.packet import FLAGS_MASK, MAX_INDEX, MAX_STREAMS, V2_MARKER, VERSION_MASK, version
+
+"""
+Find the packet geometry of a stego dataframe without decoding it once per
+candidate geometry.
+
+The rows are hashed once, on 16 bits. The hash on `bit_per_row` bits is the
+top bits of the same digest, so the hashes of every width are shifts of this
+array. Then, for every width :
+
+ 1. The header of the window starting at each row is extracted at once. An
+    undamaged packet is located by its header, which holds the data size in
+    version 1 and chains the index of the next packet in version 2. The few
+    windows matching a geometry are checked with the CRC and the
+    Reed-Solomon code to find the CRC and correction sizes.
+ 2. If no undamaged packet is found, the candidate geometries are scanned
+    round-robin, one batch of windows each, until one yields two valid
+    packets of the same stream.
+
+An undamaged packet is usually found by the first step, at a cost close to
+hashing the rows.
+"""
+
+DEFAULT_PACKET_VERSIONS = (1, 2)
+# The longest CRC first, it is the least likely to validate a random window
+DEFAULT_CRC_SIZES = (4, 3, 2, 1)
+
+# Windows whose header is extracted at once
+HEADER_BATCH = 1 << 16
+
+# Windows with a valid CRC checked for each geometry
+MAX_CANDIDATES = 8
+
+STREAMS = range(MAX_STREAMS)
+
+
+def window_bytes(values: np.ndarray, width: int, first: int, last: int) -> np.ndarray:
+    """
+    Return the bytes `first` to `last` of the window starting at each row,
+    for the windows long enough
+
+    Args:
+        values(np.ndarray): hashes on `width` bits
+        width(int): bit_per_row
+
+    Returns:
+        A uint8 matrix (window count x (last - first))
+
+    >>> algo = BitPool(bit_per_row=3, data_size=1, correction_size=0)
+    >>> values = np.array([algo.hash(str(i)) for i in range(100)])
+    >>> bytes(window_bytes(values, 3, 2, 6)[5]) == bytes(algo.decode_windows(values, 5, 6)[0, 2:6])
+    True
+    """
+    bits = ((values[:, None] >> np.arange(width, dtype=values.dtype)) & 1).astype(np.uint8).ravel()
+    size = 8 * (last - first)
+    count = max((len(bits) - 8 * first - size) // width + 1, 0)
+    chunks = [np.zeros((0, last - first), dtype=np.uint8)]
+    for start in range(0, count, HEADER_BATCH):
+        stop = min(start + HEADER_BATCH, count)
+        offset = 8 * first + start * width
+        view = np.lib.stride_tricks.sliding_window_view(
+            bits[offset : offset + (stop - start - 1) * width + size], size
+        )[::width]
+        chunks.append(np.packbits(view, axis=1, bitorder="little"))
+    return np.concatenate(chunks)
+
+
+def _big_endian(columns: np.ndarray) -> np.ndarray:
+    value = np.zeros(len(columns), dtype=np.uint32)
+    for column in columns.T:
+        value = (value << np.uint32(8)) | column
+    return value
+
+
+def _geometry(bit_per_row, data_size, correction_size, packet_version, crc_size) -> dict:
+    return {
+        "bit_per_row": bit_per_row,
+        "data_size": data_size,
+        "correction_size": correction_size,
+        "packet_version": packet_version,
+        "crc_size": crc_size,
+    }
+
+
+def _first_valid(geometries: List[dict], values: np.ndarray, rows: np.ndarray, kwargs) -> dict:
+    """
+    Return the first geometry reading two valid packets of the same stream at the rows.
+    The geometries only differ by their correction size.
+    """
+    # The CRC of an undamaged packet is valid before the Reed-Solomon decoding
+    raw = BitPool(**{**geometries[0], "correction_size": 0}, **kwargs)
+    valid = (row for row in rows.tolist() if raw.scan_windows(values, row, row + 1, streams=STREAMS))
+    candidates = list(itertools.islice(valid, MAX_CANDIDATES))
+
+    # A short CRC validates random windows, one packet is not enough
+    for geometry in geometries:
+        algo = BitPool(**geometry, **kwargs)
+        seen = set()
+        for row in candidates:
+            for packet in algo.scan_windows(values, row, row + 1, streams=STREAMS):
+                header = _stream_header(packet)
+                if header in seen:
+                    return geometry
+                seen.add(header)
+    return None
+
+
+def _find_undamaged_packet(
+    values: np.ndarray, width: int, data_sizes, correction_sizes, packet_versions, crc_sizes, kwargs
+) -> dict:
+    # The largest correction size first, 0 validates any undamaged window
+    correction_sizes = sorted(correction_sizes, reverse=True)
+
+    if 1 in packet_versions:
+        blocksize = _big_endian(window_bytes(values, width, 4, 8))
+        for data_size in data_sizes:
+            rows = np.flatnonzero(blocksize == data_size)
+            for crc_size in crc_sizes:
+                geometries = [
+                    _geometry(width, data_size, correction_size, 1, crc_size)
+                    for correction_size in correction_sizes
+                ]
+                found = _first_valid(geometries, values, rows, kwargs)
+                if found is not None:
+                    return found
+
+    if 2 in packet_versions:
+        header = window_bytes(values, width, 0, 5)
+        first, count, index = header[:, 0], _big_endian(header[:, 1:3]), _big_endian(header[:, 3:5])
+        marked = ((first & VERSION_MASK) == V2_MARKER) & (count > 0)
+        # The next packet of a stream starts one packet length after
+        steps = {}
+        for data_size, crc_size, correction_size in itertools.product(
+            data_sizes, crc_sizes, correction_sizes
+        ):
+            algo = BitPool(
+                width, data_size, correction_size, packet_version=2, crc_size=crc_size, **kwargs
+            )
+            step = algo.bytes_to_rows_count(bytes(algo.get_packet_size()))
+            steps.setdefault(step, {}).setdefault((data_size, crc_size), []).append(correction_size)
+
+        for step, geometries in sorted(steps.items()):
+            if step >= len(first):
+                continue
+            chained = (
+                marked[:-step]
+                & marked[step:]
+                & ((first[:-step] & FLAGS_MASK) == (first[step:] & FLAGS_MASK))
+                & (count[:-step] == count[step:])
+                & (index[step:] == (index[:-step] + 1) % MAX_INDEX)
+            )
+            rows = np.flatnonzero(chained)
+            # Both packets of a chain
+            rows = np.union1d(rows, rows + step)
+            for (data_size, crc_size), sizes in geometries.items():
+                candidates = [_geometry(width, data_size, size, 2, crc_size) for size in sizes]
+                found = _first_valid(candidates, values, rows, kwargs)
+                if found is not None:
+                    return found
+
+    return None
+
+
+def detect_geometry(
+    df: pl.DataFrame,
+    bit_per_rows: Iterable[int] = DEFAULT_BIT_PER_ROWS,
+    data_sizes: Iterable[int] = DEFAULT_DATA_SIZES,
+    correction_sizes: Iterable[int] = DEFAULT_CORRECTION_SIZES,
+    packet_versions: Iterable[int] = DEFAULT_PACKET_VERSIONS,
+    crc_sizes: Iterable[int] = DEFAULT_CRC_SIZES,
+    **kwargs,
+) -> Geometry:
+    """
+    Find the geometry of the packets written in a stego dataframe
+
+    Args:
+        df (pl.DataFrame): The stego dataframe
+        bit_per_rows (list): bit_per_row values to evaluate.
+        data_sizes (list): data_size values to evaluate.
+        correction_sizes (list): correction_size values to evaluate.
+        packet_versions (list): packet formats to evaluate.
+        crc_sizes (list): crc_size values to evaluate. Only `crc_size` if it is given.
+        kwargs: other arguments given to BitPool (password, hash_function ...).
+
+    Returns:
+        The Geometry of the first valid packet found. Its `params()` decode the dataframe.
+
+    Raises:
+        AlgorithmError if no packet is found
+
+    >>> df = pl.DataFrame({"a": np.random.rand(10000)})
+    >>> stego = BitPool(bit_per_row=2, data_size=16, correction_size=4).encode(df, b"hello")
+    >>> geometry = detect_geometry(stego)
+    >>> geometry.bit_per_row, geometry.data_size, geometry.correction_size
+    (2, 16, 4)
+    >>> BitPool(**geometry.params()).decode(stego)
+    b'hello'
+    """
+    bit_per_rows = list(bit_per_rows)
+    data_sizes, correction_sizes = list(data_sizes), list(correction_sizes)
+    packet_versions = list(packet_versions)
+    crc_sizes = [kwargs.pop("crc_size")] if "crc_size" in kwargs else list(crc_sizes)
+    # Hash once with the widest digest
+    widest = BitPool(bit_per_row=MAX_BIT_PER_ROW, **kwargs).compute_hash(df)["hash"].to_numpy()
+    values = {w: widest >> np.uint32(MAX_BIT_PER_ROW - w) for w in bit_per_rows}
+
+    found = None
+    for width in bit_per_rows:
+        found = _find_undamaged_packet(
+            values[width], width, data_sizes, correction_sizes, packet_versions, crc_sizes, kwargs
+        )
+        if found is not None:
+            break
+
+    if found is None:
+        found = _scan_round_robin(
+            values, bit_per_rows, data_sizes, correction_sizes, packet_versions, crc_sizes, kwargs
+        )
+    if found is None:
+        raise AlgorithmError("No packet found with the candidate geometries")
+
+    extra = {}
+    if found["packet_version"] != 1:
+        extra["packet_version"] = found["packet_version"]
+    if found["crc_size"] != 4:
+        extra["crc_size"] = found["crc_size"]
+    return Geometry(
+        bit_per_row=found["bit_per_row"],
+        data_size=found["data_size"],
+        correction_size=found["correction_size"],
+        hash_function=kwargs.get("hash_function", DEFAULT_HASH_FUNCTION),
+        extra=extra,
+    )
+
+
+def _scan_round_robin(
+    values: dict, bit_per_rows, data_sizes, correction_sizes, packet_versions, crc_sizes, kwargs
+) -> dict:
+    # The largest correction size first, 0 validates any undamaged window
+    correction_sizes = sorted(correction_sizes, reverse=True)
+    geometries = [
+        _geometry(*geometry)
+        for geometry in itertools.product(
+            bit_per_rows, data_sizes, correction_sizes, packet_versions, crc_sizes
+        )
+    ]
+    algorithms = [BitPool(**geometry, **kwargs) for geometry in geometries]
+    row_count = len(next(iter(values.values()), []))
+    window_counts = [algo.get_window_count(row_count) for algo in algorithms]
+    # Each round scans about two packet lengths of windows per geometry
+    batches = [
+        min(WINDOW_BATCH, 2 * algo.bytes_to_rows_count(bytes(algo.get_packet_size())))
+        for algo in algorithms
+    ]
+
+    # A short CRC validates random windows: a geometry is kept once two of its
+    # packets belong to the same stream
+    streams = [set() for _ in geometries]
+    rounds = max((-(-count // batch) for count, batch in zip(window_counts, batches)), default=0)
+    for i in range(rounds):
+        for geometry, algo, count, batch, seen in zip(
+            geometries, algorithms, window_counts, batches, streams
+        ):
+            start = i * batch
+            if start >= count:
+                continue
+            packets = algo.scan_windows(
+                values[geometry["bit_per_row"]], start, min(start + batch, count), streams=STREAMS
+            )
+            for packet in packets:
+                stream = _stream_header(packet)
+                if stream in seen:
+                    return geometry
+                seen.add(stream)
+    return None
+
+
+def _stream_header(packet: bytes) -> bytes:
+    # The header without the seed or index: file and block sizes, or flags and K
+    return packet[:8] if version(packet) == 1 else packet[:3]
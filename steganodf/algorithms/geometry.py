@@ -0,0 +1,344 @@
+import json
+import math
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Iterable, Union
+
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.hashing import DEFAULT_HASH_FUNCTION
+
+"""
+Choose the packet geometry of `BitPool` for a given cover and damage budget.
+
+The damage model is described by two rates :
+
+ - deletion_rate : fraction of rows removed from the cover. A deletion inside a
+   packet shifts all its bits and the packet is lost.
+ - edit_rate : fraction of rows where at least one cell has been modified. An
+   edited row changes its hash and corrupts the bytes it carries. These errors
+   are fixed by the Reed-Solomon code as long as they are fewer than
+   `correction_size / 2`.
+
+For each candidate geometry, the probability that a packet survives is computed,
+then the number of packets required to decode the LT stream with the target
+probability. The geometry using the fewest rows wins, the packet size breaking
+ties as it drives the decoding time of each window.
+
+The rows needed, `rows_per_packet * packet_count`, only rank the geometries.
+The encoder still writes as many packets as the cover holds, which adds
+margin above the target probability.
+"""
+
+DEFAULT_BIT_PER_ROWS = (1, 2, 4, 8)
+DEFAULT_DATA_SIZES = (4, 8, 12, 16, 20, 24, 32, 48, 64)
+DEFAULT_CORRECTION_SIZES = (0, 2, 4, 6, 8, 10, 12, 16, 20, 24)
+
+
+def _check_hash_function(hash_function):
+    """
+    Raise an AlgorithmError if the hash function cannot be recorded in a geometry
+    """
+    if not isinstance(hash_function, str):
+        raise AlgorithmError("hash_function must be given by name to be recorded in a geometry")
+
+
+@dataclass
+class Geometry:
+    """
+    Packet geometry chosen for a cover. It can be saved along the stego file
+    so the decoder uses the same parameters.
+
+    >>> geometry = Geometry(bit_per_row=2, data_size=16, correction_size=4)
+    >>> Geometry.from_dict(geometry.to_dict()) == geometry
+    True
+    >>> geometry.params()
+    {'bit_per_row': 2, 'data_size': 16, 'correction_size': 4, 'hash_function': 'md5'}
+    """
+
+    bit_per_row: int
+    data_size: int
+    correction_size: int
+    algorithm: str = "bitpool"
+    hash_function: str = DEFAULT_HASH_FUNCTION
+    rows_per_packet: int = 0
+    # Packets needed to reach the target probability, the encoder writes more
+    packet_count: int = 0
+    success_probability: float = 0.0
+    extra: dict = field(default_factory=dict)
+
+    def params(self) -> dict:
+        """
+        Return the keyword arguments to build the algorithm
+        """
+        return {
+            "bit_per_row": self.bit_per_row,
+            "data_size": self.data_size,
+            "correction_size": self.correction_size,
+            "hash_function": self.hash_function,
+            **self.extra,
+        }
+
+    @classmethod
+    def from_algorithm(cls, algorithm: BitPool) -> "Geometry":
+        """
+        Return the geometry of an algorithm. Its hash function must be given by name.
+
+        Raises:
+            AlgorithmError if the hash function is not given by name
+
+        >>> Geometry.from_algorithm(BitPool(hash_function="sha1", packet_version=2)).params()["packet_version"]
+        2
+        """
+        _check_hash_function(algorithm._hash_function)
+        extra = {}
+        if algorithm._packet_format.version != 1:
+            extra["packet_version"] = algorithm._packet_format.version
+        if algorithm._crc_size != 4:
+            extra["crc_size"] = algorithm._crc_size
+        if algorithm._stream:
+            extra["stream"] = algorithm._stream
+        return cls(
+            bit_per_row=algorithm._bit_per_row,
+            data_size=algorithm._data_size,
+            correction_size=algorithm._correction_size,
+            hash_function=algorithm._hash_function,
+            extra=extra,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Geometry":
+        return cls(**data)
+
+    def save(self, path: Union[str, Path]):
+        """
+        Write the geometry as JSON
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Geometry":
+        """
+        Read a geometry previously written by `save`
+        """
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
+
+def sidecar_path(path: Union[str, Path]) -> Path:
+    """
+    Return the path of the geometry file recorded along a stego file
+
+    >>> sidecar_path("data/stegano.csv").as_posix()
+    'data/stegano.csv.geometry.json'
+    """
+    path = Path(path)
+    return path.with_name(path.name + ".geometry.json")
+
+
+def _binomial_cdf(n: int, p: float, k: int) -> float:
+    """
+    Return the probability P(X <= k) with X following a binomial law B(n, p).
+    The sum runs over the k first terms, which are few in our use cases.
+
+    >>> round(_binomial_cdf(2, 0.5, 0), 2)
+    0.25
+    >>> _binomial_cdf(10, 0.5, 10)
+    1.0
+    """
+    if k < 0:
+        return 0.0
+    if k >= n or p <= 0:
+        return 1.0
+    if p >= 1:
+        return 0.0
+
+    log_p, log_q = math.log(p), math.log1p(-p)
+    total = 0.0
+    for i in range(0, k + 1):
+        log_pmf = (
+            math.lgamma(n + 1)
+            - math.lgamma(i + 1)
+            - math.lgamma(n - i + 1)
+            + i * log_p
+            + (n - i) * log_q
+        )
+        total += math.exp(log_pmf)
+    return min(total, 1.0)
+
+
+def _binomial_tail(n: int, p: float, k: int) -> float:
+    """
+    Return the probability P(X >= k) with X following a binomial law B(n, p)
+
+    >>> round(_binomial_tail(2, 0.5, 1), 2)
+    0.75
+    """
+    return 1.0 - _binomial_cdf(n, p, k - 1)
+
+
+def required_packets(block_count: int) -> int:
+    """
+    Return an estimation of the packet count required by the LT decoder
+
+    >>> required_packets(1)
+    1
+    >>> required_packets(4)
+    8
+    """
+    if block_count <= 1:
+        return block_count
+    return math.ceil(block_count + 2 * math.sqrt(block_count))
+
+
+def pool_efficiency(row_count: int, bit_per_row: int) -> float:
+    """
+    Return the fraction of rows the encoder can consume before a bucket of the
+    pool runs out. Buckets receive `row_count / 2**bit_per_row` rows in average
+    with a standard deviation growing as its square root.
+
+    >>> pool_efficiency(10000, 1) > pool_efficiency(10000, 8)
+    True
+    """
+    buckets = 2**bit_per_row
+    if row_count <= buckets:
+        return 0.0
+    return max(0.0, 1.0 - 3 * math.sqrt(buckets / row_count))
+
+
+def packet_survival(
+    algorithm: BitPool, deletion_rate: float = 0.0, edit_rate: float = 0.0
+) -> float:
+    """
+    Return the probability that a packet is read back after the damage
+
+    >>> algo = BitPool()
+    >>> packet_survival(algo)
+    1.0
+    >>> packet_survival(algo, deletion_rate=0.01) < packet_survival(BitPool(bit_per_row=4), deletion_rate=0.01)
+    True
+    >>> packet_survival(BitPool(bit_per_row=16), edit_rate=0.01) > packet_survival(BitPool(bit_per_row=12), edit_rate=0.01)
+    True
+    """
+    bit_per_row = algorithm._bit_per_row
+    packet_size = algorithm.get_packet_size()
+    rows = algorithm.bytes_to_rows_count(bytes(packet_size))
+
+    # An edited row keeps its hash value by chance
+    row_error = edit_rate * (1 - 2**-bit_per_row)
+    # Most rows overlapping a byte, over a period of the byte and row boundaries
+    rows_per_byte = max(
+        (8 * k + 7) // bit_per_row - 8 * k // bit_per_row + 1
+        for k in range(math.lcm(8, bit_per_row) // 8)
+    )
+    byte_error = 1 - (1 - row_error) ** rows_per_byte
+
+    correctable = algorithm._correction_size // 2
+    no_deletion = (1 - deletion_rate) ** rows
+    return no_deletion * _binomial_cdf(packet_size, byte_error, correctable)
+
+
+def tune_geometry(
+    row_count: int,
+    payload_size: int,
+    deletion_rate: float = 0.0,
+    edit_rate: float = 0.0,
+    target: float = 0.99,
+    bit_per_rows: Iterable[int] = DEFAULT_BIT_PER_ROWS,
+    data_sizes: Iterable[int] = DEFAULT_DATA_SIZES,
+    correction_sizes: Iterable[int] = DEFAULT_CORRECTION_SIZES,
+    **kwargs,
+) -> Geometry:
+    """
+    Search the packet geometry using the fewest rows to carry the payload with
+    a success probability above `target`.
+
+    Args:
+        row_count (int): Row count of the cover dataframe.
+        payload_size (int): Payload size in bytes.
+        deletion_rate (float): Expected fraction of deleted rows.
+        edit_rate (float): Expected fraction of edited rows.
+        target (float): Minimal probability to decode the payload.
+        bit_per_rows (list): bit_per_row values to evaluate.
+        data_sizes (list): data_size values to evaluate.
+        correction_sizes (list): correction_size values to evaluate.
+        kwargs: other arguments given to BitPool (password, hash_function ...).
+            The name of the hash function is recorded in the geometry.
+
+    Returns:
+        The best Geometry
+
+    Raises:
+        AlgorithmError if no geometry reaches the target, or if the hash function
+        is not given by name
+
+    >>> geometry = tune_geometry(10000, 5, deletion_rate=0.001)
+    >>> geometry.success_probability >= 0.99
+    True
+    >>> geometry.rows_per_packet * geometry.packet_count <= 10000
+    True
+    """
+
+    hash_function = kwargs.get("hash_function", DEFAULT_HASH_FUNCTION)
+    _check_hash_function(hash_function)
+
+    best = None
+    best_cost = None
+    for bit_per_row in bit_per_rows:
+        efficiency = pool_efficiency(row_count, bit_per_row)
+        for data_size in data_sizes:
+            needed = required_packets(math.ceil(max(payload_size, 1) / data_size))
+            for correction_size in correction_sizes:
+                algo = BitPool(
+                    bit_per_row=bit_per_row,
+                    data_size=data_size,
+                    correction_size=correction_size,
+                    **kwargs,
+                )
+                packet_size = algo.get_packet_size()
+                rows = algo.bytes_to_rows_count(bytes(packet_size))
+                available = int(row_count * efficiency) // rows
+                if available < needed:
+                    continue
+
+                survival = packet_survival(algo, deletion_rate, edit_rate)
+                if _binomial_tail(available, survival, needed) < target:
+                    continue
+
+                # Smallest packet count reaching the target
+                low, high = needed, available
+                while low < high:
+                    middle = (low + high) // 2
+                    if _binomial_tail(middle, survival, needed) >= target:
+                        high = middle
+                    else:
+                        low = middle + 1
+
+                cost = (low * rows, packet_size)
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    best = Geometry(
+                        bit_per_row=bit_per_row,
+                        data_size=data_size,
+                        correction_size=correction_size,
+                        hash_function=hash_function,
+                        rows_per_packet=rows,
+                        packet_count=low,
+                        success_probability=_binomial_tail(low, survival, needed),
+                        # The packet format changes the window length of the decoder,
+                        # the stream selects its packets
+                        extra={
+                            k: kwargs[k]
+                            for k in ("packet_version", "crc_size", "stream")
+                            if k in kwargs
+                        },
+                    )
+
+    if best is None:
+        raise AlgorithmError("No geometry can hide this payload with the expected damage")
+
+    return best
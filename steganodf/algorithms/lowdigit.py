@@ -0,0 +1,185 @@
+import binascii
+import math
+from typing import Tuple
+
+import numpy as np
+import polars as pl
+
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.alteration_algorithm import AlterationAlgorithm, mix
+
+"""
+This algorithm hides the payload in the parity of the lowest digit of numeric cells.
+
+For each cell, the value is split into a quantized value `n = floor(value / step)`
+and the key `n >> 1`, which does not depend on the parity. The key is hashed with
+the password and the column name to decide if the cell carries a bit and which one.
+Each bit of the payload is therefore written in many cells, anywhere in the table,
+and the decoder keeps the majority. Neither the order nor the count of rows matter.
+
+The payload is framed as follow:
+
+ +---------+-------------------------+---------+
+ | LENGTH  |  PAYLOAD (padded)       |  CRC    |
+ | 1 byte  |  payload_size bytes     | 4 bytes |
+ +---------+-------------------------+---------+
+
+Integer columns are altered by one unit and only if `max_distortion >= 1`.
+Float columns are moved to the middle of a step of size `10**k`, the largest
+one giving a distortion below `max_distortion`. Float cells larger than
+`MAX_QUANTIZED` steps are skipped as the middle of their step is not exact.
+"""
+
+MAX_QUANTIZED = 2**50
+
+
+class LowDigit(AlterationAlgorithm):
+
+    def __init__(
+        self,
+        max_distortion: float = 1e-3,
+        fraction: float = 0.25,
+        payload_size: int = 32,
+        **kwargs,
+    ):
+        """
+        Initialize an instance of LowDigit
+
+        Args:
+            max_distortion (float): Maximal absolute change of a cell. Default is 1e-3.
+            fraction (float): Fraction of cells carrying a bit. Default is 0.25.
+            payload_size (int): Maximal payload size in bytes. Default is 32.
+            columns (list, optional): Columns to alter. Default is all numeric columns.
+            password (str, optional): Password used to select the altered cells.
+        """
+        super().__init__(**kwargs)
+        if not 0 < fraction <= 1:
+            raise AlgorithmError("fraction must be between 0 and 1")
+        if not 0 < payload_size < 256:
+            raise AlgorithmError("payload_size must be between 1 and 255")
+
+        self._max_distortion = max_distortion
+        self._threshold = np.uint64(int(fraction * 2**16))
+        self._payload_size = payload_size
+        self._bit_count = (1 + payload_size + 4) * 8
+
+        # The middle of a step is at most 1.5 step away from the original value
+        self._float_step = 10.0 ** math.floor(math.log10(max_distortion / 1.5))
+
+    def frame(self, payload: bytes) -> np.ndarray:
+        """
+        Return the bits of the framed payload
+
+        >>> LowDigit(payload_size=4).frame(b"hi").shape
+        (72,)
+        """
+        if len(payload) > self._payload_size:
+            raise AlgorithmError(f"payload must be smaller than {self._payload_size} bytes")
+        data = bytes([len(payload)]) + payload.ljust(self._payload_size, b"\0")
+        data += binascii.crc32(data).to_bytes(4, "big")
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+    def unframe(self, bits: np.ndarray) -> bytes:
+        """
+        Return the payload from the frame bits. Empty if the CRC is wrong.
+
+        >>> algo = LowDigit(payload_size=4)
+        >>> algo.unframe(algo.frame(b"hi"))
+        b'hi'
+        """
+        data = np.packbits(bits.astype(np.uint8)).tobytes()
+        if binascii.crc32(data[:-4]).to_bytes(4, "big") != data[-4:]:
+            return b""
+        return data[1 : 1 + data[0]]
+
+    def locate(self, series: pl.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        """
+        Return, for each cell, the quantized value, the hash of its key and a mask
+        of cells carrying a bit. The last item is the step size.
+        """
+        if series.dtype.is_integer():
+            # Keep the integer dtype: a cast to Int64 would overflow UInt64 values
+            step = 1
+            quantized = series.fill_null(0).to_numpy()
+        else:
+            step = self._float_step
+            values = series.fill_nan(None).fill_null(0.0).to_numpy()
+            # Clip out of the usable range, without overflowing int64
+            limit = 2.0 * MAX_QUANTIZED
+            quantized = np.floor(np.clip(values / step, -limit, limit)).astype(np.int64)
+
+        hashes = mix(quantized.astype(np.uint64) >> np.uint64(1) ^ self.column_key(series.name))
+        mask = (hashes & np.uint64(0xFFFF)) < self._threshold
+        mask &= series.is_not_null().to_numpy()
+        if series.dtype.is_float():
+            mask &= series.is_not_nan().fill_null(False).to_numpy()
+            mask &= (quantized >= -MAX_QUANTIZED) & (quantized < MAX_QUANTIZED)
+        return quantized, hashes, mask, step
+
+    def encode(self, df: pl.DataFrame, payload: bytes) -> pl.DataFrame:
+        """
+        Encode a payload in dataframe by altering the numeric cells
+
+        Args:
+            df(pl.DataFrame): The host dataframe
+            payload(bytes): the payload message to hide in the host dataframe
+
+        Return:
+            Return the stego dataframe
+        """
+        bits = self.frame(payload).astype(np.int64)
+        columns = []
+        for name in self.get_columns(df):
+            series = df[name]
+            if series.dtype.is_integer() and self._max_distortion < 1:
+                continue
+
+            quantized, hashes, mask, step = self.locate(series)
+            index = ((hashes >> np.uint64(16)) % np.uint64(self._bit_count)).astype(np.int64)
+            whitening = ((hashes >> np.uint64(8)) & np.uint64(1)).astype(np.int64)
+            target = bits[index] ^ whitening
+
+            # Move to the closest value with the expected parity, keeping n >> 1.
+            # Flipping the lowest bit stays in the dtype range, whose bounds are
+            # even (minimum) and odd (maximum).
+            wrong = (quantized & 1).astype(np.int64) != target
+            altered = quantized ^ wrong.astype(quantized.dtype)
+
+            if series.dtype.is_integer():
+                new = np.where(mask, altered, quantized)
+            else:
+                values = series.to_numpy()
+                new = np.where(mask, (altered + 0.5) * step, values)
+
+            column = pl.Series(name, new).cast(series.dtype)
+            columns.append(pl.when(series.is_null()).then(None).otherwise(column).alias(name))
+
+        if not columns:
+            raise AlgorithmError("No column can be altered")
+        return df.with_columns(columns)
+
+    def decode(self, df: pl.DataFrame) -> bytes:
+        """
+        Decode the payload from the stego dataframe
+
+        Args:
+            df(pl.DataFrame): The stego dataframe
+
+        Return:
+            Return the payload in bytes
+        """
+        votes = np.zeros(self._bit_count, dtype=np.int64)
+        for name in self.get_columns(df):
+            series = df[name]
+            if series.dtype.is_integer() and self._max_distortion < 1:
+                continue
+
+            quantized, hashes, mask, _ = self.locate(series)
+            index = ((hashes >> np.uint64(16)) % np.uint64(self._bit_count)).astype(np.int64)
+            whitening = ((hashes >> np.uint64(8)) & np.uint64(1)).astype(np.int64)
+            bit = (quantized & 1).astype(np.int64) ^ whitening
+            votes += np.bincount(index[mask], weights=2 * bit[mask] - 1, minlength=self._bit_count).astype(
+                np.int64
+            )
+
+        return self.unframe(votes > 0)
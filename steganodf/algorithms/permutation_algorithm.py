@@ -1,8 +1,71 @@
+import copy
+from typing import Callable, List, Union
+
+import polars as pl
+
+from steganodf.hashing import DEFAULT_HASH_FUNCTION, get_hash_function
 from .algorithm import Algorithm
 
 
 class PermutationAlgorithm(Algorithm):
+    """
+    Base class of algorithms hiding the payload in the order of the rows.
+    Each row is identified by a fingerprint computed from its content.
+    """
 
-    def __init__(self, **kwargs):
+    def __init__(
+        self,
+        hash_function: Union[str, Callable] = DEFAULT_HASH_FUNCTION,
+        password: str = None,
+        columns: List[str] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            hash_function (str|Callable): Name of a function from `steganodf.hashing.HASH_FUNCTIONS`
+                or a hashlib constructor. Default is MD5.
+            password (str, optional) : Password used as the key of the hash function.
+            columns (list, optional): Columns identifying a row. Default is all columns.
+        """
         super().__init__(**kwargs)
+        self._columns = columns
+        self._hash_function = hash_function
+        self._password = password
+        key = password.encode() if password else None
+        self._digest = get_hash_function(hash_function, key)
+
+    def digest(self, text: str) -> bytes:
+        """
+        Return the digest of a serialized row
+
+        >>> PermutationAlgorithm().digest("hello").hex()
+        '5d41402abc4b2a76b9719d911017c592'
+        """
+        return self._digest(text.encode())
+
+    def with_password(self, password: str = None) -> "PermutationAlgorithm":
+        """
+        Return a copy of the algorithm keyed with another password
+
+        >>> algo = PermutationAlgorithm(password="a")
+        >>> algo.with_password("b").digest("hello") == PermutationAlgorithm(password="b").digest("hello")
+        True
+        """
+        algo = copy.copy(self)
+        algo._password = password
+        algo._digest = get_hash_function(self._hash_function, password.encode() if password else None)
+        return algo
+
+    def serialize_rows(self, df: pl.DataFrame) -> pl.Series:
+        """
+        Concatenate the cells of each row into a string
 
+        >>> algo = PermutationAlgorithm()
+        >>> algo.serialize_rows(pl.DataFrame({"a": [1, 2], "b": ["x", "y"]})).to_list()
+        ['1x', '2y']
+        >>> PermutationAlgorithm(columns=["b"]).serialize_rows(pl.DataFrame({"a": [1], "b": ["x"]})).to_list()
+        ['x']
+        """
+        if self._columns is not None:
+            df = df.select(self._columns)
+        return df.cast(pl.Utf8()).sum_horizontal()
@@ -0,0 +1,211 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import polars as pl
+
+"""
+Attack models applied to stego dataframes, and a harness measuring how well
+an algorithm survives them.
+
+Each attack takes a dataframe, a damage level between 0 and 1 (a window size
+for `shuffle`) and a numpy random generator, and returns the damaged dataframe.
+They are written with whole-column operations, so they stay fast on large frames.
+
+The harness encodes a payload once per configuration, then runs decode trials
+for each attack and level, in parallel processes, and reports the success rate
+and the decoding time as a JSON serializable list.
+"""
+
+Attack = Callable[[pl.DataFrame, float, np.random.Generator], pl.DataFrame]
+
+
+def delete_rows(df: pl.DataFrame, level: float, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Remove a fraction of the rows, anywhere in the dataframe
+
+    >>> len(delete_rows(pl.DataFrame({"a": range(100)}), 0.1, np.random.default_rng(0)))
+    90
+    """
+    count = int(round(len(df) * level))
+    mask = np.ones(len(df), dtype=bool)
+    mask[rng.choice(len(df), count, replace=False)] = False
+    return df.filter(pl.Series(mask))
+
+
+def crop(df: pl.DataFrame, level: float, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Keep a contiguous part of the dataframe, removing a fraction of the rows
+
+    >>> len(crop(pl.DataFrame({"a": range(100)}), 0.25, np.random.default_rng(0)))
+    75
+    """
+    length = len(df) - int(round(len(df) * level))
+    offset = int(rng.integers(0, len(df) - length + 1))
+    return df.slice(offset, length)
+
+
+def corrupt_cells(df: pl.DataFrame, level: float, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Modify a fraction of the cells. Numbers are incremented, strings get a suffix
+    and other values are set to null.
+
+    >>> df = pl.DataFrame({"a": range(100), "b": ["x"] * 100})
+    >>> (corrupt_cells(df, 0.1, np.random.default_rng(0)) != df).sum().sum_horizontal().item()
+    20
+    """
+    count = int(round(len(df) * level))
+    columns = []
+    for name, dtype in df.schema.items():
+        mask = np.zeros(len(df), dtype=bool)
+        mask[rng.choice(len(df), count, replace=False)] = True
+        column = pl.col(name)
+        if dtype.is_numeric():
+            altered = column + 1
+        elif dtype == pl.Utf8:
+            altered = column + "_"
+        else:
+            altered = pl.lit(None, dtype=dtype)
+        columns.append(pl.when(pl.lit(pl.Series(mask))).then(altered).otherwise(column).alias(name))
+    return df.with_columns(columns)
+
+
+def shuffle(df: pl.DataFrame, level: float, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Shuffle the rows inside consecutive windows of `level` rows
+
+    >>> df = shuffle(pl.DataFrame({"a": range(10)}), 5, np.random.default_rng(0))
+    >>> sorted(df["a"][:5]) == list(range(5))
+    True
+    """
+    window = max(1, int(level))
+    keys = np.arange(len(df)) // window + rng.random(len(df))
+    return df[np.argsort(keys, kind="stable")]
+
+
+def drop_columns(df: pl.DataFrame, level: float, rng: np.random.Generator) -> pl.DataFrame:
+    """
+    Remove a fraction of the columns, keeping at least one
+
+    >>> drop_columns(pl.DataFrame({"a": [1], "b": [2]}), 0.5, np.random.default_rng(0)).width
+    1
+    """
+    count = min(int(round(df.width * level)), df.width - 1)
+    dropped = rng.choice(df.columns, count, replace=False)
+    return df.drop(list(dropped))
+
+
+ATTACKS: Dict[str, Attack] = {
+    "delete": delete_rows,
+    "crop": crop,
+    "corrupt": corrupt_cells,
+    "shuffle": shuffle,
+    "drop_columns": drop_columns,
+}
+
+DEFAULT_LEVELS = {
+    "delete": [0.0, 0.001, 0.005, 0.01, 0.05],
+    "crop": [0.0, 0.25, 0.5, 0.75, 0.9],
+    "corrupt": [0.0, 0.001, 0.005, 0.01, 0.05],
+    "shuffle": [1, 2, 4, 8],
+    "drop_columns": [0.0, 0.5],
+}
+
+# Encoded frames of the worker processes, set by `_init_worker`
+_FRAMES = {}
+
+
+def _init_worker(frames: Dict[str, pl.DataFrame]):
+    _FRAMES.update(frames)
+
+
+def _trial(config: str, params: dict, attack: str, level: float, seed: int, payload: bytes) -> dict:
+    from steganodf.algorithms import ALGORITHMS
+
+    params = dict(params)
+    algo = ALGORITHMS[params.pop("algorithm", "bitpool")](**params)
+    damaged = ATTACKS[attack](_FRAMES[config], level, np.random.default_rng(seed))
+    start = time.perf_counter()
+    try:
+        success = algo.decode(damaged) == payload
+    except Exception:
+        success = False
+    return {"success": success, "time": time.perf_counter() - start}
+
+
+def evaluate_robustness(
+    df: pl.DataFrame,
+    configs: Dict[str, dict],
+    payload: bytes = b"hello",
+    attacks: Dict[str, Iterable[float]] = None,
+    trials: int = 10,
+    workers: int = None,
+    seed: int = 0,
+) -> List[dict]:
+    """
+    Measure the decoding success rate and time of each configuration under attacks.
+
+    Args:
+        df(pl.DataFrame): The cover dataframe
+        configs(dict): Algorithm parameters by configuration name. The "algorithm"
+            key selects the algorithm, default is "bitpool".
+        payload(bytes): The payload to hide
+        attacks(dict): Damage levels by attack name. Default is DEFAULT_LEVELS.
+        trials(int): Decode trials for each configuration, attack and level
+        workers(int): Process count. 1 runs the trials in the current process.
+        seed(int): Seed of the attacks
+
+    Returns:
+        One record per configuration, attack and level with the success rate
+        and the mean decoding time in seconds.
+
+    >>> results = evaluate_robustness(
+    ...     pl.DataFrame({"a": np.random.rand(3000)}), {"default": {}}, attacks={"crop": [0.5]}, trials=2, workers=1
+    ... )
+    >>> results[0]["success_rate"]
+    1.0
+    """
+    from steganodf.algorithms import ALGORITHMS
+
+    attacks = attacks or DEFAULT_LEVELS
+    frames = {}
+    for name, params in configs.items():
+        params = dict(params)
+        algo = ALGORITHMS[params.pop("algorithm", "bitpool")](**params)
+        frames[name] = algo.encode(df, payload)
+
+    tasks = [
+        (config, params, attack, level, seed + i, payload)
+        for config, params in configs.items()
+        for attack, levels in attacks.items()
+        for level in levels
+        for i in range(trials)
+    ]
+
+    if workers == 1:
+        _init_worker(frames)
+        outcomes = [_trial(*task) for task in tasks]
+    else:
+        # polars is multithreaded and must not be forked
+        context = get_context("spawn")
+        with ProcessPoolExecutor(workers, context, initializer=_init_worker, initargs=(frames,)) as pool:
+            outcomes = list(pool.map(_trial, *zip(*tasks)))
+
+    results = {}
+    for (config, params, attack, level, _, _), outcome in zip(tasks, outcomes):
+        record = results.setdefault(
+            (config, attack, level),
+            {"config": config, "params": params, "attack": attack, "level": level, "outcomes": []},
+        )
+        record["outcomes"].append(outcome)
+
+    report = []
+    for record in results.values():
+        outcomes = record.pop("outcomes")
+        record["trials"] = len(outcomes)
+        record["success_rate"] = sum(o["success"] for o in outcomes) / len(outcomes)
+        record["decode_time"] = sum(o["time"] for o in outcomes) / len(outcomes)
+        report.append(record)
+    return report
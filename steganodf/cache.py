@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import polars as pl
+
+from steganodf.hashing import key_id
+
+"""
+On-disk caches of the encoder.
+
+`PermutationCache` stores the row permutations computed by the encoder.
+
+Encoding the same payload in the same cover with the same parameters and the
+same seed always gives the same permutation. The cache stores it in a `.npz`
+file named after a digest of the cover content, the payload and the
+parameters, so a repeated export costs a lookup and a gather of the rows.
+
+The cover is fingerprinted with `pl.DataFrame.hash_rows`, which is fast but
+may change between polars versions. The polars version is therefore part of
+the key: a new version only misses the old entries.
+
+`FingerprintCache` stores the row hashes of the covers, the most expensive
+step of an encoding. The hashes of a cover only depend on its content, the
+fingerprint function, the password and `bit_per_row`. They are stored in a
+`.npy` file, memory mapped when read, and the last ones read are also kept
+in memory for the long-lived processes.
+"""
+
+PathLike = Union[str, Path]
+
+# Count of hash arrays kept in memory by the fingerprint caches
+MEMORY_SIZE = 8
+
+_memory: "OrderedDict[Path, np.ndarray]" = OrderedDict()
+
+
+def frame_fingerprint(df: pl.DataFrame) -> str:
+    """
+    Return a digest of the content, the column names and the types of a dataframe
+
+    >>> frame_fingerprint(pl.DataFrame({"a": [1]})) == frame_fingerprint(pl.DataFrame({"a": [2]}))
+    False
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pl.__version__.encode())
+    digest.update(repr(list(df.schema.items())).encode())
+    digest.update(df.hash_rows(seed=0).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PermutationCache:
+    """
+    A directory of cached permutations
+
+    >>> cache = PermutationCache(tempfile.mkdtemp())
+    >>> key = cache.key(pl.DataFrame({"a": [1, 2]}), b"hi", {"seed": 1})
+    >>> cache.get(key) is None
+    True
+    >>> cache.put(key, [1, 0], 1)
+    >>> rows, block_count = cache.get(key)
+    >>> rows.tolist(), block_count
+    ([1, 0], 1)
+    """
+
+    def __init__(self, directory: PathLike):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, df: pl.DataFrame, payload: bytes, params: dict) -> str:
+        """
+        Return the key of an encoding request
+
+        Args:
+            df(pl.DataFrame): The cover dataframe
+            payload(bytes): The payload
+            params(dict): All parameters changing the result, JSON serializable
+        """
+        digest = hashlib.sha256()
+        digest.update(frame_fingerprint(df).encode())
+        digest.update(hashlib.sha256(payload).digest())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Return the row permutation and the packet count stored for a key, None if missing
+        """
+        try:
+            with np.load(self.path(key)) as data:
+                return data["rows"], int(data["block_count"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def put(self, key: str, rows, block_count: int):
+        """
+        Store a row permutation. The file is written atomically.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, rows=np.asarray(rows, dtype=np.int64), block_count=block_count)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class FingerprintCache:
+    """
+    A directory of cached row hashes
+
+    >>> cache = FingerprintCache(tempfile.mkdtemp())
+    >>> key = cache.key(pl.DataFrame({"a": [1, 2]}), "md5", "secret", 2)
+    >>> cache.get(key, 2) is None
+    True
+    >>> cache.put(key, np.array([3, 0], dtype=np.uint32))
+    >>> cache.get(key, 2).tolist()
+    [3, 0]
+    """
+
+    def __init__(self, directory: PathLike):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(
+        self,
+        df: pl.DataFrame,
+        hash_function: str,
+        password: Optional[str],
+        bit_per_row: int,
+        columns: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Return the key of the row hashes of a cover
+
+        Args:
+            df(pl.DataFrame): The cover dataframe
+            hash_function(str): Name of the fingerprint function
+            password(str, optional): The password. Only its identifier is part of the key.
+            bit_per_row(int): Bits of each hash
+            columns(list, optional): Columns identifying a row
+        """
+        params = {
+            "cover": frame_fingerprint(df),
+            "hash_function": hash_function,
+            "key_id": key_id(password),
+            "bit_per_row": bit_per_row,
+            "columns": columns,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npy"
+
+    def get(self, key: str, row_count: int) -> Optional[np.ndarray]:
+        """
+        Return the read-only row hashes stored for a key, None if missing or
+        if the file is not an array of `row_count` hashes
+        """
+        path = self.path(key)
+        hashes = _memory.get(path)
+        if hashes is None:
+            try:
+                hashes = np.load(path, mmap_mode="r")
+            except (OSError, ValueError):
+                return None
+        if hashes.dtype != np.uint32 or hashes.shape != (row_count,):
+            return None
+        self._remember(path, hashes)
+        return hashes
+
+    def put(self, key: str, hashes: np.ndarray):
+        """
+        Store the row hashes of a cover. The file is written atomically.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, np.asarray(hashes, dtype=np.uint32))
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        _memory.pop(self.path(key), None)
+
+    def _remember(self, path: Path, hashes: np.ndarray):
+        _memory[path] = hashes
+        _memory.move_to_end(path)
+        while len(_memory) > MEMORY_SIZE:
+            _memory.popitem(last=False)
@@ -0,0 +1,122 @@
+import lzma
+import zlib
+from typing import Callable, Dict, Tuple
+
+from steganodf.algorithms.algorithm import AlgorithmError
+
+"""
+Compression of the payload before it is split into LT packets.
+
+Structured payloads (JSON licenses, recipient records) are redundant, so
+compressing them saves packets, hence rows and decoding time. The method is
+written in the flags of the version 2 packets, and the decoder decompresses
+the payload without any parameter:
+
+ - "zlib" : deflate with a raw stream, no header nor checksum ;
+ - "lzma" : LZMA2 in a raw stream, better on long payloads ;
+ - "zdict" : deflate with a preset dictionary of strings common in records
+   (JSON keys, dates, e-mails, URLs), for payloads of a few dozen bytes that
+   do not compress on their own ;
+ - "auto" : the smallest of the above, or no compression.
+
+Run `python benchmarks/compression.py` to compare the packets saved.
+"""
+
+# Strings common in short structured payloads. Deflate prefers the matches at
+# the end of the dictionary, which hold the most frequent strings.
+# It must never change: it is needed to decode the existing files.
+PRESET_DICTIONARY = (
+    b"https://www..org/.net/license copyright all rights reserved. "
+    b"id: name: email: user: customer: company: recipient: issued: expires: version: "
+    b'{"version": "{"expires": "{"issued": "{"company": "{"customer": '
+    b'{"recipient": "{"user": "{"email": "{"name": "{"id": "'
+    b'", "version": ", "expires": "2025-", "issued": "2024-", "company": '
+    b'", "license": "", "customer": "", "recipient": "", "user": "'
+    b'@gmail.com", "email": "@example.com", "name": "", "id": "'
+)
+
+# Code of each method in the packet flags
+COMPRESSION_FLAGS = {None: 0, "zlib": 1, "lzma": 2, "zdict": 3}
+COMPRESSION_MASK = 0b11
+
+LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 9 | lzma.PRESET_EXTREME}]
+
+
+def _deflate(data: bytes, zdict: bytes = None) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, **({"zdict": zdict} if zdict else {}))
+    return compressor.compress(data) + compressor.flush()
+
+
+def _inflate(data: bytes, zdict: bytes = None) -> bytes:
+    decompressor = zlib.decompressobj(-15, **({"zdict": zdict} if zdict else {}))
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (_deflate, _inflate),
+    "lzma": (
+        lambda data: lzma.compress(data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS),
+        lambda data: lzma.decompress(data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS),
+    ),
+    "zdict": (
+        lambda data: _deflate(data, PRESET_DICTIONARY),
+        lambda data: _inflate(data, PRESET_DICTIONARY),
+    ),
+}
+
+
+def check_compression(method: str):
+    """
+    Raise an AlgorithmError if a compression method is unknown
+    """
+    if method is not None and method != "auto" and method not in COMPRESSORS:
+        raise AlgorithmError(
+            f"Unknown compression {method}. Available are {['auto', *COMPRESSORS]}"
+        )
+
+
+def compress(payload: bytes, method: str = None) -> Tuple[bytes, int]:
+    """
+    Compress a payload
+
+    Args:
+        payload(bytes): The payload
+        method(str, optional): "zlib", "lzma", "zdict" or "auto". Default is no compression.
+
+    Returns:
+        The compressed payload and its flags
+
+    >>> payload = b'{"name": "Alice", "email": "alice@example.com"}'
+    >>> data, flags = compress(payload, "auto")
+    >>> len(data) < len(payload), decompress(data, flags) == payload
+    (True, True)
+    """
+    check_compression(method)
+    if method is None:
+        return payload, 0
+    if method != "auto":
+        return COMPRESSORS[method][0](payload), COMPRESSION_FLAGS[method]
+
+    best = payload, 0
+    for name, (function, _) in COMPRESSORS.items():
+        data = function(payload)
+        if len(data) < len(best[0]):
+            best = data, COMPRESSION_FLAGS[name]
+    return best
+
+
+def decompress(data: bytes, flags: int) -> bytes:
+    """
+    Decompress a payload from the flags of its packets
+
+    >>> decompress(b"hello", 0)
+    b'hello'
+    """
+    code = flags & COMPRESSION_MASK
+    if code == 0:
+        return data
+    name = next(name for name, value in COMPRESSION_FLAGS.items() if value == code)
+    try:
+        return COMPRESSORS[name][1](data)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise AlgorithmError(f"Cannot decompress the payload: {e}")
@@ -0,0 +1,138 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+import polars as pl
+
+from steganodf import lt
+from steganodf.algorithms.bitpool import BitPool
+
+"""
+Encode and decode a partitioned Parquet dataset as a single cover.
+
+A dataset is a directory of Parquet files, for instance a hive-partitioned
+dataset `year=2024/month=01/part-0.parquet`. Each file is a partition. Rows
+are never moved between partitions and partition columns stored in the
+directory names are left untouched.
+
+The LT packets of the payload are built once and distributed over the
+partitions according to their capacity, so every partition carries different
+packets. Partitions are encoded in parallel processes.
+
+Decoding scans the partitions in parallel and pools the valid packets in a
+single LT decoder. Any subset of partitions holding enough packets is enough
+to recover the payload, so a partial copy of the dataset is still traceable.
+"""
+
+PathLike = Union[str, Path]
+
+
+def list_partitions(root: PathLike) -> List[Path]:
+    """
+    Return the Parquet files of a dataset, relative to its root, in a stable order
+    """
+    root = Path(root)
+    return sorted(path.relative_to(root) for path in root.rglob("*.parquet"))
+
+
+def read_partition(path: PathLike) -> pl.DataFrame:
+    """
+    Read a partition without the columns of the hive directories
+    """
+    return pl.read_parquet(path, hive_partitioning=False)
+
+
+def _encode_partition(params: dict, source: Path, target: Path, packets: np.ndarray) -> int:
+    algo = BitPool(**params)
+    df, block_count = algo.embed_packets(read_partition(source), packets, rng=algo.get_rng())
+    target.parent.mkdir(parents=True, exist_ok=True)
+    df.write_parquet(target)
+    return block_count
+
+
+def _find_partition_packets(params: dict, path: Path) -> List[bytes]:
+    return list(BitPool(**params).find_packets(read_partition(path)))
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    # polars is multithreaded and must not be forked
+    return ProcessPoolExecutor(workers, get_context("spawn"))
+
+
+def encode_dataset(
+    source: PathLike, target: PathLike, payload: bytes, workers: int = None, **kwargs
+) -> Dict[str, int]:
+    """
+    Encode a payload in a partitioned Parquet dataset
+
+    Args:
+        source(str|Path): Root directory of the cover dataset
+        target(str|Path): Root directory of the stego dataset. The partitions are
+            written at the same relative paths.
+        payload(bytes): The payload to hide
+        workers(int, optional): Process count. Default is the CPU count.
+        **kwargs: Parameters of `BitPool`
+
+    Returns:
+        The count of packets written in each partition
+    """
+    source, target = Path(source), Path(target)
+    algo = BitPool(**kwargs)
+    partitions = list_partitions(source)
+    row_counts = [
+        pl.scan_parquet(source / p, hive_partitioning=False).select(pl.len()).collect().item()
+        for p in partitions
+    ]
+    capacities = [algo.get_packet_capacity(count) for count in row_counts]
+    packets = algo.build_packets(payload, sum(capacities), rng=algo.get_rng())
+    offsets = np.cumsum([0] + capacities)
+
+    with _pool(workers) as pool:
+        futures = [
+            pool.submit(
+                _encode_partition, kwargs, source / p, target / p, packets[offsets[i] : offsets[i + 1]]
+            )
+            for i, p in enumerate(partitions)
+        ]
+        return {str(p): future.result() for p, future in zip(partitions, futures)}
+
+
+def decode_dataset(
+    root: PathLike, decoder: lt.decode.LtDecoder = None, workers: int = None, **kwargs
+) -> dict:
+    """
+    Decode a payload from all or part of the partitions of a stego dataset
+
+    Args:
+        root(str|Path): Root directory of the stego dataset
+        decoder(LtDecoder, optional): A decoder to resume. Partitions it already
+            consumed are skipped.
+        workers(int, optional): Process count. Default is the CPU count.
+        **kwargs: Parameters of `BitPool`
+
+    Returns:
+        Same as `BitPool._decode`, with the count of valid packets of all partitions
+    """
+    root = Path(root)
+    algo = BitPool(**kwargs)
+    decoder = decoder or lt.decode.LtDecoder()
+    partitions = [p for p in list_partitions(root) if str(p) not in decoder.sources]
+
+    block_count = 0
+    with _pool(workers) as pool:
+        futures = [pool.submit(_find_partition_packets, kwargs, root / p) for p in partitions]
+        for partition, future in zip(partitions, futures):
+            for packet in future.result():
+                block_count += 1
+                if not decoder.is_done():
+                    algo.consume_packet(decoder, packet)
+            decoder.sources.add(str(partition))
+            if decoder.is_done():
+                # Partitions not started yet are not needed
+                for other in futures:
+                    other.cancel()
+                break
+
+    return algo._decode_result(decoder, block_count)
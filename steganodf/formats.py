@@ -0,0 +1,149 @@
+import gzip
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import polars as pl
+
+"""
+Registry of file formats read and written by the command line.
+
+Readers return a `pl.LazyFrame` using the `scan_*` functions of polars when
+they exist, so the file is only loaded when the query is collected. Arrow IPC
+files are memory-mapped. Writers accept a `pl.LazyFrame` and use the `sink_*`
+functions which stream the result to the disk.
+
+The path "-" reads CSV from the standard input and writes CSV to the standard output.
+
+Polars is only imported when a file is read or written, so the command line
+can check its arguments quickly.
+"""
+
+STDIO = "-"
+
+
+@dataclass
+class Format:
+    """
+    A file format. `reader` or `writer` is None if the format is read or write only.
+    A string reader is the name of a polars function, a string writer the name
+    of a `pl.LazyFrame` method.
+    """
+
+    name: str
+    suffixes: Tuple[str, ...]
+    reader: Optional[Union[str, Callable[[Union[str, Path]], "pl.LazyFrame"]]] = None
+    writer: Optional[Union[str, Callable[["pl.LazyFrame", Union[str, Path]], None]]] = None
+
+    def read(self, path: Union[str, Path]) -> "pl.LazyFrame":
+        reader = self.reader
+        if isinstance(reader, str):
+            import polars as pl
+
+            reader = getattr(pl, reader)
+        return reader(path)
+
+    def write(self, lf: "pl.LazyFrame", path: Union[str, Path]):
+        writer = self.writer
+        if isinstance(writer, str):
+            import polars as pl
+
+            writer = getattr(pl.LazyFrame, writer)
+        writer(lf, path)
+
+
+FORMATS: Dict[str, Format] = {}
+
+
+def register_format(format: Format):
+    """
+    Add a format to the registry. A format with the same name is replaced.
+    """
+    FORMATS[format.name] = format
+
+
+def get_format(path: Union[str, Path]) -> Optional[Format]:
+    """
+    Return the format of a path from its suffixes. The longest suffix wins.
+
+    >>> get_format("data.csv.gz").name
+    'csv.gz'
+    >>> get_format("data.feather").name
+    'ipc'
+    >>> get_format("-").name
+    'stdio'
+    >>> get_format("data.txt") is None
+    True
+    """
+    name = Path(path).name.lower()
+    if str(path) == STDIO:
+        return FORMATS.get("stdio")
+
+    best = None
+    for format in FORMATS.values():
+        for suffix in format.suffixes:
+            if name.endswith(suffix) and (best is None or len(suffix) > len(best[0])):
+                best = (suffix, format)
+    return best[1] if best else None
+
+
+def get_input_suffixes() -> Tuple[str, ...]:
+    """
+    Return all suffixes which can be read
+    """
+    return tuple(s for f in FORMATS.values() if f.reader for s in f.suffixes)
+
+
+def get_output_suffixes() -> Tuple[str, ...]:
+    """
+    Return all suffixes which can be written
+    """
+    return tuple(s for f in FORMATS.values() if f.writer for s in f.suffixes)
+
+
+def scan(path: Union[str, Path]) -> "pl.LazyFrame":
+    """
+    Return a LazyFrame reading the file
+    """
+    return get_format(path).read(path)
+
+
+def sink(df: Union["pl.DataFrame", "pl.LazyFrame"], path: Union[str, Path]):
+    """
+    Write a DataFrame or a LazyFrame to the file
+    """
+    get_format(path).write(df.lazy(), path)
+
+
+def _read_compressed_csv(path):
+    import polars as pl
+
+    # polars decompresses gzip, zlib and zstd when reading bytes, but cannot scan them
+    return pl.read_csv(path).lazy()
+
+
+def _write_gzip_csv(lf, path):
+    with gzip.open(path, "wb") as file:
+        lf.collect(engine="streaming").write_csv(file)
+
+
+def _read_stdin(path):
+    import polars as pl
+
+    return pl.read_csv(sys.stdin.buffer).lazy()
+
+
+def _write_stdout(lf, path):
+    lf.collect(engine="streaming").write_csv(sys.stdout.buffer)
+    sys.stdout.buffer.flush()
+
+
+register_format(Format("csv", (".csv",), "scan_csv", "sink_csv"))
+register_format(Format("csv.gz", (".csv.gz",), _read_compressed_csv, _write_gzip_csv))
+register_format(Format("csv.zst", (".csv.zst",), _read_compressed_csv, None))
+register_format(Format("parquet", (".parquet",), "scan_parquet", "sink_parquet"))
+register_format(Format("ipc", (".arrow", ".ipc", ".feather"), "scan_ipc", "sink_ipc"))
+register_format(Format("ndjson", (".ndjson", ".jsonl"), "scan_ndjson", "sink_ndjson"))
+register_format(Format("stdio", (), _read_stdin, _write_stdout))
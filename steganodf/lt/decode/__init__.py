@@ -20,6 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import io
+import json
 import sys
 
 from struct import unpack, error
@@ -113,34 +114,155 @@ class LtDecoder(object):
         self.block_graph = None
         self.prng = None
         self.initialized = False
+        self.done = False
+        # The payload is padded with 0x80 then zeros (packet format v2)
+        self.padded = False
+        # Options of the stream written in the packets (packet format v2)
+        self.flags = 0
+
+        # Seeds of the blocks already consumed, and identifiers of the
+        # fragments (files) already scanned
+        self.seeds = set()
+        self.sources = set()
 
     def is_done(self):
         return self.done
 
-    def consume_block(self, lt_block):
+    def ratio(self):
+        """Fraction of source blocks resolved"""
+        if not self.initialized:
+            return 0.0
+        return len(self.block_graph.eliminated) / self.K
+
+    def _initialize(self, filesize, blocksize, padded=False, flags=0):
+        self.filesize = filesize
+        self.blocksize = blocksize
+        self.padded = padded
+        self.flags = flags
+
+        self.K = ceil(filesize / blocksize)
+        self.block_graph = BlockGraph(self.K)
+        self.prng = sampler.PRNG(params=(self.K, self.delta, self.c))
+        self.initialized = True
+
+    def consume_block(self, lt_block, padded=False, flags=0, src_blocks=None):
+        """Add a block. `src_blocks` are the source blocks XORed in the block,
+        drawn from its seed by default."""
         (filesize, blocksize, blockseed), block = lt_block
 
         # first time around, init things
         if not self.initialized:
-            self.filesize = filesize
-            self.blocksize = blocksize
+            self._initialize(filesize, blocksize, padded, flags)
 
-            self.K = ceil(filesize / blocksize)
-            self.block_graph = BlockGraph(self.K)
-            self.prng = sampler.PRNG(params=(self.K, self.delta, self.c))
-            self.initialized = True
+        # The same packet can be read several times, for instance from two copies of a file
+        if blockseed in self.seeds or self.done:
+            return self.done
+        self.seeds.add(blockseed)
 
         # Run PRNG with given seed to figure out which blocks were XORed to make received data
-        _, _, src_blocks = self.prng.get_src_blocks(seed=blockseed)
+        if src_blocks is None:
+            _, _, src_blocks = self.prng.get_src_blocks(seed=blockseed)
 
         # If BP is done, stop
         self.done = self._handle_block(src_blocks, block)
         return self.done
 
+    def to_dict(self):
+        """Return the decoder state as a JSON serializable dict.
+
+        The state holds the resolved source blocks and the pending checks, so
+        decoding can be resumed later with packets from other fragments.
+        """
+        state = {
+            "c": self.c,
+            "delta": self.delta,
+            "filesize": self.filesize,
+            "blocksize": self.blocksize,
+            "padded": self.padded,
+            "flags": self.flags,
+            "seeds": sorted(self.seeds),
+            "sources": sorted(self.sources),
+            "eliminated": {},
+            "checks": [],
+        }
+        if self.initialized:
+            to_hex = lambda value: int.to_bytes(value, self.blocksize, "big").hex()
+            state["eliminated"] = {
+                str(node): to_hex(value) for node, value in self.block_graph.eliminated.items()
+            }
+            checks = {id(check): check for checks in self.block_graph.checks.values() for check in checks}
+            state["checks"] = [
+                [sorted(check.src_nodes), to_hex(check.check)] for check in checks.values()
+            ]
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        """Build a decoder from a state returned by `to_dict`"""
+        decoder = cls(c=state["c"], delta=state["delta"])
+        decoder.sources = set(state["sources"])
+        if state["blocksize"]:
+            decoder._initialize(
+                state["filesize"],
+                state["blocksize"],
+                state.get("padded", False),
+                state.get("flags", 0),
+            )
+            decoder._restore(state)
+        decoder.seeds = set(state["seeds"])
+        return decoder
+
+    def _restore(self, state):
+        """Add resolved blocks and pending checks of a state"""
+        for node, value in state["eliminated"].items():
+            if not self.done:
+                self.done = self._handle_block({int(node)}, int(value, 16))
+        for nodes, value in state["checks"]:
+            if not self.done:
+                self.done = self._handle_block(set(nodes), int(value, 16))
+
+    def merge(self, other):
+        """Add the knowledge of another decoder of the same stream"""
+        if not other.initialized:
+            self.sources |= other.sources
+            return self.done
+
+        if not self.initialized:
+            self._initialize(other.filesize, other.blocksize, other.padded, other.flags)
+        elif (self.filesize, self.blocksize, self.padded, self.flags) != (
+            other.filesize,
+            other.blocksize,
+            other.padded,
+            other.flags,
+        ):
+            raise ValueError("Cannot merge decoders of different streams")
+
+        self._restore(other.to_dict())
+        self.seeds |= other.seeds
+        self.sources |= other.sources
+        return self.done
+
+    def save(self, path):
+        """Write the decoder state to a JSON file"""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path):
+        """Read a decoder state written by `save`"""
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
+
     def bytes_dump(self):
         buffer = io.BytesIO()
         self.stream_dump(buffer)
-        return buffer.getvalue()
+        data = buffer.getvalue()
+        if self.padded:
+            # Remove the 0x80 marker and the zeros after it
+            data = data.rstrip(b"\x00")
+            if data.endswith(b"\x80"):
+                data = data[:-1]
+        return data
 
     def stream_dump(self, out_stream):
 
@@ -19,32 +19,90 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import sys
+from itertools import chain
 from random import randint
-from struct import pack
+
+import numpy as np
 
 from .. import sampler
 
+# Bytes read at once from the payload file
+READ_SIZE = 1 << 16
+
+# Packets generated together by `encoder`
+BATCH_SIZE = 256
+
 
 def _split_file(f, blocksize):
-    """Block file byte contents into blocksize chunks, padding last one if necessary"""
+    """Block file byte contents into blocksize chunks, padding last one if necessary.
+    The file is read by chunks and the blocks are the rows of a uint8 matrix."""
+
+    buffer = bytearray()
+    for chunk in iter(lambda: f.read(READ_SIZE), b""):
+        buffer += chunk
+    filesize = len(buffer)
+    buffer += b"0" * (-filesize % blocksize)
+    blocks = np.frombuffer(bytes(buffer), dtype=np.uint8).reshape(-1, blocksize)
+    return filesize, blocks
+
+
+def xor_blocks(blocks, samples):
+    """XOR the source blocks of each packet at once.
+
+    Args:
+        blocks: uint8 matrix of the source blocks
+        samples: for each packet, the indices of its source blocks
+
+    Returns:
+        A uint8 matrix with a row per packet
 
-    f_bytes = f.read()
-    blocks = [
-        int.from_bytes(f_bytes[i : i + blocksize].ljust(blocksize, b"0"), sys.byteorder)
-        for i in range(0, len(f_bytes), blocksize)
-    ]
-    return len(f_bytes), blocks
+    >>> blocks = np.array([[1, 2], [4, 8], [16, 32]], dtype=np.uint8)
+    >>> xor_blocks(blocks, [{0}, {0, 1, 2}]).tolist()
+    [[1, 2], [21, 42]]
+    """
+    degrees = np.fromiter(map(len, samples), dtype=np.intp, count=len(samples))
+    offsets = np.concatenate([[0], np.cumsum(degrees[:-1])])
+    flat = np.fromiter(chain.from_iterable(samples), dtype=np.intp, count=int(degrees.sum()))
+    return np.bitwise_xor.reduceat(blocks[flat], offsets, axis=0)
+
+
+def encode_packets(blocks, filesize, prng, count):
+    """Generate the next `count` packets of a stream, header and data, as a uint8 matrix"""
+
+    seeds, samples = [], []
+    for _ in range(count):
+        blockseed, _, ix_samples = prng.get_src_blocks()
+        seeds.append(blockseed)
+        samples.append(ix_samples)
 
+    # Headers in network byte order
+    headers = np.empty((count, 3), dtype=">u4")
+    headers[:, 0] = filesize
+    headers[:, 1] = blocks.shape[1]
+    headers[:, 2] = seeds
+    return np.hstack([headers.view(np.uint8), xor_blocks(blocks, samples)])
 
-def encoder(f, blocksize, seed=None, c=sampler.DEFAULT_C, delta=sampler.DEFAULT_DELTA):
+
+def encoder(f, blocksize, seed=None, c=sampler.DEFAULT_C, delta=sampler.DEFAULT_DELTA, rng=None):
     """Generates an infinite sequence of blocks to transmit
-    to the receiver
+    to the receiver. Without seed, it is drawn from `rng`, a `random.Random`
+    instance, or from the global random generator.
+    Blocks are generated by batches of `BATCH_SIZE`.
     """
 
+    for batch in batch_encoder(f, blocksize, seed=seed, c=c, delta=delta, rng=rng):
+        for packet in batch:
+            yield packet.tobytes()
+
+
+def batch_encoder(
+    f, blocksize, seed=None, c=sampler.DEFAULT_C, delta=sampler.DEFAULT_DELTA, rng=None, size=BATCH_SIZE
+):
+    """Same as `encoder`, generating uint8 matrices of `size` packets"""
+
     # Generate seed if not provided
     if seed is None:
-        seed = randint(0, 1 << 31 - 1)
+        seed = (rng.randint if rng is not None else randint)(0, 1 << 31 - 1)
 
     # get file blocks
     filesize, blocks = _split_file(f, blocksize)
@@ -56,11 +114,4 @@ def encoder(f, blocksize, seed=None, c=sampler.DEFAULT_C, delta=sampler.DEFAULT_
 
     # block generation loop
     while True:
-        blockseed, d, ix_samples = prng.get_src_blocks()
-        block_data = 0
-        for ix in ix_samples:
-            block_data ^= blocks[ix]
-
-        # Generate blocks of XORed data in network byte order
-        block = (filesize, blocksize, blockseed, int.to_bytes(block_data, blocksize, sys.byteorder))
-        yield pack("!III%ss" % blocksize, *block)
+        yield encode_packets(blocks, filesize, prng, size)
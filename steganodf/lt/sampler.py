@@ -34,6 +34,8 @@ sampled is transmitted with the block as metadata, so the
 receiver can reconstruct the sampling of source blocks given the
 same PRNG parameters below.
 """
+from bisect import bisect_right
+from itertools import accumulate
 from math import log, floor, sqrt
 
 DEFAULT_C = 0.1
@@ -81,7 +83,7 @@ def gen_rsd_cdf(K, delta, c):
     sampling speed"""
 
     mu = gen_mu(K, delta, c)
-    return [sum(mu[: d + 1]) for d in range(K)]
+    return list(accumulate(mu))
 
 
 class PRNG(object):
@@ -112,10 +114,8 @@ class PRNG(object):
         """
 
         p = self._get_next() / PRNG_MAX_RAND
-        for ix, v in enumerate(self.cdf):
-            if v > p:
-                return ix + 1
-        return ix + 1
+        # Index of the first value of the CDF greater than p
+        return min(bisect_right(self.cdf, p), self.K - 1) + 1
 
     def set_seed(self, seed):
         """Reset the state of the PRNG to the
@@ -135,11 +135,12 @@ class PRNG(object):
 
         blockseed = self.state
         d = self._sample_d()
-        have = 0
+        # Same as calling `_get_next` until d distinct blocks are drawn, with
+        # local variables: this loop is the main cost of the LT encoder
+        state, K = self.state, self.K
         nums = set()
-        while have < d:
-            num = self._get_next() % self.K
-            if num not in nums:
-                nums.add(num)
-                have += 1
+        while len(nums) < d:
+            state = PRNG_A * state % PRNG_M
+            nums.add(state % K)
+        self.state = state
         return blockseed, d, nums
@@ -0,0 +1,148 @@
+from typing import List
+
+import polars as pl
+
+import steganodf
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+
+"""
+Polars namespaces. Importing this module registers a `stegano` namespace on
+expressions, DataFrames and LazyFrames:
+
+    import steganodf.namespace
+
+    df.stegano.encode(b"hello", password="secret")
+    df.stegano.decode(password="secret")
+    pl.struct("a", "b").stegano.fingerprint(bit_per_row=2)
+
+The row fingerprint is an elementwise expression, so it runs inside a query
+plan, in the streaming engine, next to the other expressions of a pipeline.
+
+On a LazyFrame, `encode` and `decode` only collect the fingerprint of the key
+columns (all columns by default, or `columns=[...]`). The optimizer then
+reads these columns only. `encode` returns a LazyFrame reordering the rows,
+the other columns are read when it is collected.
+"""
+
+
+def fingerprint(columns: List[str] = None, **kwargs) -> pl.Expr:
+    """
+    Return an expression computing the BitPool 'hash' column of the rows
+
+    Args:
+        columns(list, optional): Columns identifying a row. Default is all columns.
+        **kwargs: Parameters of `BitPool`
+
+    >>> df = pl.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    >>> df.select(fingerprint(bit_per_row=4))["hash"].to_list() == BitPool(bit_per_row=4).compute_hash(df)["hash"].to_list()
+    True
+    """
+    return pl.struct(columns or pl.all()).stegano.fingerprint(**kwargs).alias("hash")
+
+
+@pl.api.register_expr_namespace("stegano")
+class SteganoExpr:
+    def __init__(self, expr: pl.Expr):
+        self._expr = expr
+
+    def fingerprint(self, **kwargs) -> pl.Expr:
+        """
+        Return the BitPool hash of each row. The expression is a column, or a
+        struct of the columns identifying a row.
+
+        Args:
+            **kwargs: Parameters of `BitPool`
+
+        >>> pl.DataFrame({"a": ["hello"]}).select(pl.col("a").stegano.fingerprint(bit_per_row=2)).item()
+        1
+        """
+        algo = BitPool(**kwargs)
+
+        def function(series: pl.Series) -> pl.Series:
+            df = series.struct.unnest() if isinstance(series.dtype, pl.Struct) else series.to_frame()
+            return algo.hash_rows(algo.serialize_rows(df))
+
+        return self._expr.map_batches(function, return_dtype=pl.UInt32, is_elementwise=True)
+
+
+@pl.api.register_dataframe_namespace("stegano")
+class SteganoFrame:
+    def __init__(self, df: pl.DataFrame):
+        self._df = df
+
+    def encode(self, payload: bytes, algorithm: str = "bitpool", **kwargs) -> pl.DataFrame:
+        """
+        Same as `steganodf.encode`
+        """
+        return steganodf.encode(self._df, payload, algorithm=algorithm, **kwargs)
+
+    def decode(self, algorithm: str = "bitpool", **kwargs) -> bytes:
+        """
+        Same as `steganodf.decode`
+        """
+        return steganodf.decode(self._df, algorithm=algorithm, **kwargs)
+
+    def fingerprint(self, columns: List[str] = None, **kwargs) -> pl.Series:
+        """
+        Return the BitPool 'hash' column of the rows
+        """
+        return self._df.select(fingerprint(columns, **kwargs)).to_series()
+
+
+@pl.api.register_lazyframe_namespace("stegano")
+class SteganoLazyFrame:
+    def __init__(self, lf: pl.LazyFrame):
+        self._lf = lf
+
+    def _hashes(self, columns: List[str], kwargs: dict) -> pl.Series:
+        return self._lf.select(fingerprint(columns, **kwargs)).collect(engine="streaming").to_series()
+
+    def encode(self, payload: bytes, columns: List[str] = None, **kwargs) -> pl.LazyFrame:
+        """
+        Encode a payload with `BitPool`. Only the fingerprint of the rows is collected.
+
+        Args:
+            payload(bytes): The payload
+            columns(list, optional): Columns identifying a row. Default is all columns.
+            **kwargs: Parameters of `BitPool`
+
+        Returns:
+            A LazyFrame with the rows of the stego dataframe
+
+        >>> lf = pl.LazyFrame({"a": range(5000), "b": range(5000)})
+        >>> lf.stegano.encode(b"hi", columns=["a"]).stegano.decode(columns=["a"])
+        b'hi'
+        """
+        if kwargs.get("algorithm", "bitpool") != "bitpool":
+            raise AlgorithmError("Only bitpool can encode a LazyFrame. Collect it first.")
+        kwargs.pop("algorithm", None)
+
+        algo = BitPool(**kwargs)
+        hashes = self._hashes(columns, kwargs)
+        rng = algo.get_rng()
+        packets = algo.build_packets(payload, algo.get_packet_capacity(len(hashes)), rng=rng)
+        rows, _ = algo.permute(hashes.to_list(), packets, rng=rng)
+        return self._lf.select(pl.all().gather(pl.Series(rows)))
+
+    def decode(self, columns: List[str] = None, **kwargs) -> bytes:
+        """
+        Decode a payload with `BitPool`. Only the fingerprint of the rows is collected.
+
+        Args:
+            columns(list, optional): Columns identifying a row. Default is all columns.
+            **kwargs: Parameters of `BitPool`
+        """
+        if kwargs.get("algorithm", "bitpool") != "bitpool":
+            raise AlgorithmError("Only bitpool can decode a LazyFrame. Collect it first.")
+        kwargs.pop("algorithm", None)
+
+        algo = BitPool(**kwargs)
+        packets = algo.scan_hashes(self._hashes(columns, kwargs).to_numpy())
+        return algo.consume_packets(packets)["payload"]
+
+    def fingerprint(self, columns: List[str] = None, **kwargs) -> pl.LazyFrame:
+        """
+        Add the BitPool 'hash' column of the rows
+        """
+        return self._lf.with_columns(fingerprint(columns, **kwargs))
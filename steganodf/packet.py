@@ -0,0 +1,243 @@
+import hashlib
+import io
+import itertools
+from struct import unpack
+from typing import NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from steganodf import lt
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.lt import sampler
+
+"""
+Formats of the LT part of a packet: a header followed by `data_size` bytes.
+
+Version 1 is the header of `lt.encode.encoder`, three 32 bits integers:
+
+ +------------+------------+------------+------------------+
+ | FILESIZE   | BLOCKSIZE  | SEED       | DATA             |
+ | 4 bytes    | 4 bytes    | 4 bytes    | data_size bytes  |
+ +------------+------------+------------+------------------+
+
+Version 2 is a 5 bytes header:
+
+ +-----------+------------+------------+------------------+
+ | 10FFFFFF  | K          | INDEX      | DATA             |
+ | 1 byte    | 2 bytes    | 2 bytes    | data_size bytes  |
+ +-----------+------------+------------+------------------+
+
+ - The two top bits of the first byte mark the version. A version 1 header
+   starts with the top byte of the file size, which is 0 below 16 MB.
+ - F are 6 bits of flags, options of the stream. The two lowest bits are the
+   compression (see `steganodf.compression`), the third marks a systematic
+   stream and the three highest are the stream identifier.
+ - K is the count of source blocks. The block size is the data size.
+ - The LT seed of a packet is derived from its INDEX, so it is not written.
+ - The payload is padded with 0x80 then zeros up to K blocks, so its size is
+   implied by the padding.
+
+In a systematic stream, the packets 0 to K - 1 are the source blocks as is and
+the next ones are the usual LT combinations. An undamaged file decodes from
+its first K packets, without any XOR, and a damaged file still decodes from
+the repair packets.
+
+Up to 8 independent streams can be interleaved in a cover, each with its own
+payload. Version 1 packets all belong to the stream 0.
+
+Both formats are followed by a CRC and the Reed-Solomon correction, see
+`steganodf.algorithms.bitpool`.
+"""
+
+V2_MARKER = 0b10000000
+VERSION_MASK = 0b11000000
+FLAGS_MASK = 0b00111111
+MAX_INDEX = 1 << 16
+SYSTEMATIC_FLAG = 0b100
+STREAM_SHIFT = 3
+MAX_STREAMS = 8
+
+
+class ParsedPacket(NamedTuple):
+    # LT header: file size, block size and seed
+    header: Tuple[int, int, int]
+    # Data as a big endian integer
+    block: int
+    flags: int
+    # Whether the payload is padded
+    padded: bool
+    # Source blocks XORed in the data, None to draw them from the seed
+    src_blocks: Optional[Set[int]] = None
+
+
+def pad(payload: bytes, blocksize: int) -> bytes:
+    """
+    Pad a payload with 0x80 then zeros to a multiple of `blocksize`
+
+    >>> pad(b"hi", 4)
+    b'hi\\x80\\x00'
+    >>> len(pad(b"abcd", 4))
+    8
+    """
+    padded = payload + b"\x80"
+    return padded + bytes(-len(padded) % blocksize)
+
+
+def unpad(data: bytes) -> bytes:
+    """
+    Remove the padding added by `pad`
+
+    >>> unpad(pad(b"hi\\x00", 4))
+    b'hi\\x00'
+    """
+    data = data.rstrip(b"\x00")
+    if not data.endswith(b"\x80"):
+        raise AlgorithmError("Invalid padding")
+    return data[:-1]
+
+
+def index_seed(index: int) -> int:
+    """
+    Return the LT seed of the packet `index`, a valid state of the LT generator
+
+    >>> 0 < index_seed(0) < sampler.PRNG_M
+    True
+    """
+    digest = hashlib.blake2b(index.to_bytes(4, "big"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (sampler.PRNG_M - 1) + 1
+
+
+def version(packet: bytes) -> int:
+    """
+    Return the format version of a packet from its first byte
+
+    >>> version(bytes(12)), version(b"\\x80")
+    (1, 2)
+    """
+    return 2 if packet[0] & VERSION_MASK == V2_MARKER else 1
+
+
+class PacketFormatV1:
+    """
+    The header of `lt.encode.encoder`
+    """
+
+    version = 1
+    header_size = 12
+
+    def build(self, payload: bytes, data_size: int, count: int, rng=None, flags: int = 0) -> np.ndarray:
+        """
+        Return the first `count` packets (header and data) of the LT stream of a payload
+
+        Returns:
+            A uint8 matrix (count x packet size)
+
+        >>> PacketFormatV1().build(b"hello", 4, 10).shape
+        (10, 16)
+        """
+        batches = lt.encode.batch_encoder(io.BytesIO(payload), data_size, rng=rng)
+        batch_count = -(-count // lt.encode.BATCH_SIZE)
+        return np.concatenate(list(itertools.islice(batches, batch_count)))[:count]
+
+    def parse(self, packet: bytes, data_size: int) -> Optional[ParsedPacket]:
+        """
+        Read a packet (header and data). None if the header is invalid.
+        """
+        filesize, blocksize, seed = unpack("!III", packet[:12])
+        if blocksize != data_size or version(packet) != 1:
+            return None
+        return ParsedPacket((filesize, blocksize, seed), int.from_bytes(packet[12:], "big"), 0, False)
+
+
+class PacketFormatV2:
+    """
+    The compact header
+    """
+
+    version = 2
+    header_size = 5
+
+    def build(self, payload: bytes, data_size: int, count: int, rng=None, flags: int = 0) -> np.ndarray:
+        """
+        Same as `PacketFormatV1.build`. `rng` is unused, the stream only depends on the payload.
+
+        >>> PacketFormatV2().build(b"hello world", 4, 10).shape
+        (10, 9)
+        """
+        blocks = np.frombuffer(pad(payload, data_size), dtype=np.uint8).reshape(-1, data_size)
+        K = len(blocks)
+        if K >= 1 << 16:
+            raise AlgorithmError(f"The payload must be smaller than {((1 << 16) - 1) * data_size - 1} bytes")
+
+        prng = sampler.PRNG(params=(K, sampler.DEFAULT_DELTA, sampler.DEFAULT_C))
+        systematic = bool(flags & SYSTEMATIC_FLAG)
+        # Indexes wrap around for very large covers. Repeated packets are ignored by the decoder.
+        unique = min(count, MAX_INDEX)
+        data = []
+        for start in range(0, unique, lt.encode.BATCH_SIZE):
+            samples = [
+                {index} if systematic and index < K else prng.get_src_blocks(seed=index_seed(index))[2]
+                for index in range(start, min(start + lt.encode.BATCH_SIZE, unique))
+            ]
+            data.append(lt.encode.xor_blocks(blocks, samples))
+        indexes = np.arange(count) % MAX_INDEX
+
+        headers = np.empty(count, dtype=[("first", "u1"), ("K", ">u2"), ("index", ">u2")])
+        headers["first"] = V2_MARKER | (flags & FLAGS_MASK)
+        headers["K"] = K
+        headers["index"] = indexes
+        return np.hstack([headers.view(np.uint8).reshape(count, 5), np.concatenate(data)[indexes]])
+
+    def parse(self, packet: bytes, data_size: int) -> Optional[ParsedPacket]:
+        """
+        Same as `PacketFormatV1.parse`. The file size is the padded size.
+
+        >>> packet = PacketFormatV2().build(b"hello", 4, 1, flags=SYSTEMATIC_FLAG)[0].tobytes()
+        >>> PacketFormatV2().parse(packet, 4).src_blocks
+        {0}
+        """
+        first, K, index = unpack("!BHH", packet[:5])
+        if version(packet) != 2 or K == 0 or len(packet) - 5 != data_size:
+            return None
+        flags = first & FLAGS_MASK
+        header = (K * data_size, data_size, index_seed(index))
+        src_blocks = {index} if flags & SYSTEMATIC_FLAG and index < K else None
+        return ParsedPacket(header, int.from_bytes(packet[5:], "big"), flags, True, src_blocks)
+
+
+PACKET_FORMATS = {1: PacketFormatV1(), 2: PacketFormatV2()}
+
+
+def get_packet_format(packet_version: int):
+    """
+    Return a packet format from its version
+    """
+    if packet_version not in PACKET_FORMATS:
+        raise AlgorithmError(f"Unknown packet version {packet_version}. Available are {list(PACKET_FORMATS)}")
+    return PACKET_FORMATS[packet_version]
+
+
+def packet_stream(packet: bytes) -> int:
+    """
+    Return the stream identifier of a packet of any version
+
+    >>> from struct import pack
+    >>> packet_stream(pack("!BHH", V2_MARKER | 5 << STREAM_SHIFT, 3, 7)), packet_stream(bytes(12))
+    (5, 0)
+    """
+    if version(packet) == 2:
+        return (packet[0] & FLAGS_MASK) >> STREAM_SHIFT
+    return 0
+
+
+def packet_seed(packet: bytes) -> int:
+    """
+    Return the LT seed of a packet of any version
+
+    >>> from struct import pack
+    >>> packet_seed(pack("!BHH", V2_MARKER, 3, 7)) == index_seed(7)
+    True
+    """
+    if version(packet) == 2:
+        return index_seed(unpack("!BHH", packet[:5])[2])
+    return unpack("!III", packet[:12])[2]
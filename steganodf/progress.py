@@ -0,0 +1,111 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from steganodf.algorithms.algorithm import AlgorithmError
+
+"""
+Progress reporting and cooperative cancellation of long encodings and decodings.
+
+An algorithm given a `progress` callback calls it after each batch of rows
+hashed and each batch of windows scanned, with a `Progress` snapshot. Given
+a `CancelToken`, it checks the token at the same points:
+
+ - a cancelled decoding stops scanning and returns what it found so far,
+   including the LT decoder which can be resumed later ;
+ - a cancelled encoding raises `Cancelled`, a partial permutation is useless.
+
+The token can be cancelled from another thread, from the callback itself, for
+instance when the LT completion ratio shows that a decoding is hopeless, or
+by a timeout.
+"""
+
+
+class Cancelled(AlgorithmError):
+    pass
+
+
+class CancelToken:
+    """
+    A flag shared between the caller and a running algorithm.
+
+    >>> token = CancelToken()
+    >>> token.cancelled
+    False
+    >>> token.cancel()
+    >>> token.cancelled
+    True
+    >>> CancelToken(timeout=0).cancelled
+    True
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Args:
+            timeout (float, optional): Seconds after which the token is cancelled
+        """
+        self._event = threading.Event()
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self._event.set()
+        return self._event.is_set()
+
+
+@dataclass
+class Progress:
+    """
+    State of a running encoding or decoding
+    """
+
+    # "hashing", "encoding" or "decoding"
+    stage: str = "hashing"
+    row_count: int = 0
+    rows_hashed: int = 0
+    window_count: int = 0
+    windows_scanned: int = 0
+    # Packets written by the encoder, or valid packets found by the decoder
+    packets: int = 0
+    # Fraction of the source blocks recovered by the LT decoder
+    ratio: float = 0.0
+    cancelled: bool = False
+
+
+class Monitor:
+    """
+    Hold the progress of one call and report it to the callback
+    """
+
+    def __init__(
+        self, callback: Callable[[Progress], None] = None, token: Optional[CancelToken] = None
+    ):
+        self.progress = Progress()
+        self._callback = callback
+        self._token = token
+
+    def set(self, **changes):
+        """
+        Change the progress without reporting it
+        """
+        for name, value in changes.items():
+            setattr(self.progress, name, value)
+
+    def update(self, **changes) -> bool:
+        """
+        Change the progress, report it and check the token
+
+        Returns:
+            True if the call must stop
+        """
+        self.set(**changes)
+        if self._token is not None and self._token.cancelled:
+            self.progress.cancelled = True
+        if self._callback is not None:
+            self._callback(self.progress)
+        return self.progress.cancelled
@@ -0,0 +1,162 @@
+import mmap
+from pathlib import Path
+from typing import Tuple, Union
+
+import numpy as np
+
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+
+"""
+Raw line mode for CSV files.
+
+The file is memory-mapped and never parsed: each data line is fingerprinted
+from its bytes, and the stego file is written by copying the lines in their
+new order. The output has exactly the bytes of the input, only the order of
+the data lines changes, and encoding runs close to disk speed.
+
+The fingerprint of a raw line is not the fingerprint of the parsed row, so a
+file encoded in raw mode must be decoded in raw mode.
+
+Line breaks inside quoted fields are supported: a newline is a line break only
+if it is preceded by an even count of quotes. Lines end with "\\n" or "\\r\\n",
+as in the input.
+"""
+
+PathLike = Union[str, Path]
+
+
+def split_lines(buffer) -> Tuple[int, np.ndarray, np.ndarray, bytes, bool]:
+    """
+    Locate the lines of a CSV buffer
+
+    Args:
+        buffer: bytes or a memory map of the file
+
+    Returns:
+        The end of the header line (with its line break), the start and end
+        offsets of the data lines (without line break), the line break and
+        whether the buffer ends with a line break.
+
+    >>> header, starts, ends, eol, final = split_lines(b'a,b\\n1,"x\\ny"\\n2,z')
+    >>> header, starts.tolist(), ends.tolist(), eol, final
+    (4, [4, 12], [11, 15], b'\\n', False)
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    try:
+        newlines = np.flatnonzero(data == ord("\n"))
+        quotes = np.flatnonzero(data == ord('"'))
+        if len(quotes):
+            # Newlines inside a quoted field follow an odd count of quotes
+            newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+
+        if len(newlines) == 0:
+            raise AlgorithmError("The CSV file has no data line")
+
+        final = bool(newlines[-1] == len(data) - 1)
+        eol = b"\r\n" if newlines[0] > 0 and data[newlines[0] - 1] == ord("\r") else b"\n"
+
+        starts = newlines + 1
+        ends = newlines[1:] + 1 - len(eol)
+        if final:
+            starts = starts[:-1]
+        else:
+            # The last line has no line break
+            ends = np.append(ends, len(data))
+        if len(starts) == 0:
+            raise AlgorithmError("The CSV file has no data line")
+    finally:
+        # An error must not keep the buffer exported, a memory map could not be closed
+        del data
+    return int(newlines[0] + 1), starts, ends, eol, final
+
+
+def hash_lines(algo: BitPool, buffer, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Return the BitPool hash of the bytes of each line
+    """
+    return algo.hash_many(buffer[s:e] for s, e in zip(starts.tolist(), ends.tolist()))
+
+
+def _permuted_lines(view, starts, ends, eol, final, rows):
+    # Lines are copied with their line break, except the last line of a file
+    # not ending with a line break
+    last = len(starts) - 1
+    with_eol = (ends + len(eol)).tolist()
+    starts, ends = starts.tolist(), ends.tolist()
+    if not final:
+        with_eol[last] = ends[last]
+
+    for row in rows[:-1]:
+        yield view[starts[row] : with_eol[row]]
+        if row == last and not final:
+            yield eol
+    yield view[starts[rows[-1]] : ends[rows[-1]]]
+    if final:
+        yield eol
+
+
+def _open(path: PathLike):
+    with open(path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def count_rows(path: PathLike) -> int:
+    """
+    Return the count of data lines of a CSV file
+    """
+    buffer = _open(path)
+    try:
+        return len(split_lines(buffer)[1])
+    finally:
+        buffer.close()
+
+
+def encode_csv(source: PathLike, target: PathLike, payload: bytes, **kwargs) -> int:
+    """
+    Encode a payload in a CSV file by permuting its raw data lines
+
+    Args:
+        source(str|Path): The cover CSV file, with a header line
+        target(str|Path): The stego CSV file
+        payload(bytes): The payload
+        **kwargs: Parameters of `BitPool`
+
+    Returns:
+        The count of packets written
+    """
+    algo = BitPool(**kwargs)
+    buffer = _open(source)
+    try:
+        header, starts, ends, eol, final = split_lines(buffer)
+        hashes = hash_lines(algo, buffer, starts, ends)
+
+        rng = algo.get_rng()
+        packets = algo.build_packets(payload, algo.get_packet_capacity(len(hashes)), rng=rng)
+        rows, block_count = algo.permute(hashes.tolist(), packets, rng=rng)
+
+        # The view is released before the map is closed, even on error
+        with memoryview(buffer) as view, open(target, "wb", buffering=1 << 20) as file:
+            file.write(view[:header])
+            file.writelines(_permuted_lines(view, starts, ends, eol, final, rows))
+    finally:
+        buffer.close()
+    return block_count
+
+
+def decode_csv(path: PathLike, **kwargs) -> bytes:
+    """
+    Decode a payload from a CSV file encoded by `encode_csv`
+
+    Args:
+        path(str|Path): The stego CSV file
+        **kwargs: Parameters of `BitPool`
+    """
+    algo = BitPool(**kwargs)
+    buffer = _open(path)
+    try:
+        _, starts, ends, _, _ = split_lines(buffer)
+        hashes = hash_lines(algo, buffer, starts, ends)
+    finally:
+        buffer.close()
+    return algo.consume_packets(algo.scan_hashes(hashes))["payload"]
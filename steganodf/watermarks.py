@@ -0,0 +1,371 @@
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+
+import polars as pl
+
+from steganodf import lt
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.hashing import key_id
+from steganodf.compression import COMPRESSION_FLAGS, COMPRESSION_MASK, compress
+from steganodf.packet import pad, packet_seed
+
+"""
+Registry of issued watermarks, used to attribute a leaked file.
+
+Each copy of a dataset given to a recipient is encoded with its own payload.
+The registry is a SQLite database recording, for each issued copy, the payload,
+the `BitPool` parameters, a fingerprint of the cover and every packet written
+in the copy. Packets are indexed by a hash of their content and by their LT seed.
+
+To attribute a leaked file, the file is scanned once per distinct configuration
+found in the registry and the valid packets are looked up in the index. The
+candidates are ranked by the count of packets they share with the file, so a
+file too damaged to be decoded can still be attributed, and no candidate
+payload has to be decoded. A partial LT decoder state is matched on its seeds,
+and the blocks it resolved are checked against the payload of each candidate:
+the copies issued with the same seed share their seeds.
+
+Passwords are not stored, only an identifier used to skip the configurations
+of other passwords.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    label TEXT,
+    payload BLOB NOT NULL,
+    params TEXT NOT NULL,
+    key_id TEXT,
+    cover TEXT,
+    row_count INTEGER,
+    packet_count INTEGER NOT NULL,
+    created TEXT NOT NULL,
+    block_count INTEGER,
+    data_size INTEGER,
+    packet_version INTEGER,
+    flags INTEGER
+);
+CREATE TABLE IF NOT EXISTS packets (
+    issue INTEGER NOT NULL REFERENCES issues(id),
+    key INTEGER NOT NULL,
+    seed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packets_key ON packets(key);
+CREATE INDEX IF NOT EXISTS packets_seed ON packets(seed);
+"""
+
+# Columns added to the issues of the first registries: the LT stream of the copy
+MIGRATIONS = ["block_count INTEGER", "data_size INTEGER", "packet_version INTEGER", "flags INTEGER"]
+
+# BitPool parameters recorded with an issue, the ones needed to find its packets again
+DECODING_PARAMS = (
+    "bit_per_row",
+    "data_size",
+    "correction_size",
+    "hash_function",
+    "packet_version",
+    "crc_size",
+    "stream",
+)
+
+
+def packet_key(packet: bytes) -> int:
+    """
+    Return the index key of a packet (header, data and CRC), a signed 64 bits integer
+
+    >>> packet_key(b"hello")
+    -6361636117772159875
+    """
+    return int.from_bytes(hashlib.blake2b(packet, digest_size=8).digest(), "big", signed=True)
+
+
+def cover_fingerprint(df: pl.DataFrame) -> str:
+    """
+    Return a fingerprint of the content of a cover dataframe
+    """
+    digest = hashlib.sha256()
+    for row in df.cast(pl.Utf8()).sum_horizontal().to_list():
+        digest.update(row.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def source_blocks(payload: bytes, data_size: int, packet_version: int = 1, flags: int = 0) -> List[int]:
+    """
+    Return the LT source blocks of a payload, as the integers held by a decoder
+
+    >>> source_blocks(b"abc", 2) == [int.from_bytes(b"ab", "big"), int.from_bytes(b"c0", "big")]
+    True
+    >>> source_blocks(b"abc", 2, packet_version=2) == source_blocks(b"abc\\x80", 2)
+    True
+    """
+    if packet_version == 2:
+        methods = {flag: method for method, flag in COMPRESSION_FLAGS.items()}
+        data = pad(compress(payload, methods[flags & COMPRESSION_MASK])[0], data_size)
+    else:
+        data = payload + b"0" * (-len(payload) % data_size)
+    return [int.from_bytes(data[i : i + data_size], "big") for i in range(0, len(data), data_size)]
+
+
+def is_consistent(decoder: lt.decode.LtDecoder, blocks: List[int]) -> bool:
+    """
+    Return whether the blocks resolved by a decoder, and its pending checks, are
+    the ones of the source `blocks`
+    """
+    graph = decoder.block_graph
+    if len(blocks) != decoder.K or any(blocks[node] != value for node, value in graph.eliminated.items()):
+        return False
+    for checks in graph.checks.values():
+        for check in checks:
+            value = 0
+            for node in check.src_nodes:
+                value ^= blocks[node]
+            if value != check.check:
+                return False
+    return True
+
+
+class WatermarkRegistry:
+    """
+    SQLite registry of issued watermarks.
+
+    >>> import numpy as np
+    >>> registry = WatermarkRegistry(":memory:")
+    >>> df = pl.DataFrame({"a": np.random.rand(5000)})
+    >>> leak, issue = registry.issue(df, b"alice", label="alice")
+    >>> registry.attribute(leak.head(2000))[0]["label"]
+    'alice'
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._connection = sqlite3.connect(str(path))
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(SCHEMA)
+        columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(issues)")}
+        for column in MIGRATIONS:
+            if column.split()[0] not in columns:
+                self._connection.execute(f"ALTER TABLE issues ADD COLUMN {column}")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def record(
+        self,
+        payload: bytes,
+        params: dict,
+        packets: Iterable[bytes],
+        label: str = None,
+        password: str = None,
+        cover: str = None,
+        row_count: int = None,
+        block_count: int = None,
+        data_size: int = None,
+        packet_version: int = None,
+        flags: int = None,
+    ) -> int:
+        """
+        Record an issued watermark
+
+        Args:
+            payload(bytes): The payload
+            params(dict): The `BitPool` parameters, without the password
+            packets(list): The packets written in the copy (header, data and CRC)
+            label(str, optional): A description of the recipient
+            password(str, optional): The password. Only its identifier is stored.
+            cover(str, optional): The fingerprint of the cover
+            row_count(int, optional): The row count of the cover
+            block_count(int, optional): The count K of LT source blocks
+            data_size(int, optional): The size of a LT block
+            packet_version(int, optional): The packet format
+            flags(int, optional): The flags of the version 2 packets
+
+        Returns:
+            The identifier of the issue
+        """
+        packets = list(packets)
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO issues (label, payload, params, key_id, cover, row_count, packet_count, created,"
+                " block_count, data_size, packet_version, flags) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    label,
+                    payload,
+                    json.dumps(params, sort_keys=True),
+                    key_id(password),
+                    cover,
+                    row_count,
+                    len(packets),
+                    datetime.now(timezone.utc).isoformat(),
+                    block_count,
+                    data_size,
+                    packet_version,
+                    flags,
+                ),
+            )
+            issue = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO packets (issue, key, seed) VALUES (?, ?, ?)",
+                ((issue, packet_key(p), packet_seed(p)) for p in packets),
+            )
+        return issue
+
+    def issue(
+        self, df: pl.DataFrame, payload: bytes, label: str = None, password: str = None, **kwargs
+    ) -> Tuple[pl.DataFrame, int]:
+        """
+        Encode a payload with `BitPool` and record it
+
+        Args:
+            df(pl.DataFrame): The cover dataframe
+            payload(bytes): The payload
+            label(str, optional): A description of the recipient
+            password(str, optional): The password
+            **kwargs: Parameters of `BitPool`. The hash function must be given by name.
+                Only the `DECODING_PARAMS` are recorded.
+
+        Returns:
+            The stego dataframe and the identifier of the issue
+        """
+        algo = BitPool(password=password, **kwargs)
+        rng = algo.get_rng()
+        packets = algo.build_packets(payload, algo.get_packet_capacity(len(df)), rng=rng)
+        new_df, block_count = algo.embed_packets(df, packets, rng=rng)
+
+        # Packets as found by the decoder, without their correction bytes
+        size = algo.get_packet_size() - algo._correction_size
+        written = [bytes(p[:size]) for p in packets[:block_count]]
+        stream = {}
+        if written:
+            parsed = algo._packet_format.parse(written[0][: -algo._crc_size], algo._data_size)
+            filesize, data_size, _ = parsed.header
+            stream = {
+                "block_count": -(-filesize // data_size),
+                "data_size": data_size,
+                "packet_version": algo._packet_format.version,
+                "flags": parsed.flags,
+            }
+        issue = self.record(
+            payload,
+            {key: value for key, value in kwargs.items() if key in DECODING_PARAMS},
+            written,
+            label=label,
+            password=password,
+            cover=cover_fingerprint(df),
+            row_count=len(df),
+            **stream,
+        )
+        return new_df, issue
+
+    def configurations(self, password: str = None) -> List[dict]:
+        """
+        Return the distinct `BitPool` parameters used with a password
+        """
+        rows = self._connection.execute(
+            "SELECT DISTINCT params FROM issues WHERE key_id IS ?", (key_id(password),)
+        )
+        return [json.loads(row["params"]) for row in rows]
+
+    def _rank(self, column: str, values: Iterable[int], top: int, where: str = "", args=()) -> List[dict]:
+        with self._connection:
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS found (value INTEGER PRIMARY KEY)")
+            self._connection.execute("DELETE FROM found")
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO found (value) VALUES (?)", ((v,) for v in values)
+            )
+            rows = self._connection.execute(
+                f"SELECT issues.*, COUNT(*) AS matches FROM found"
+                f" JOIN packets ON packets.{column} = found.value"
+                f" JOIN issues ON issues.id = packets.issue {where}"
+                f" GROUP BY issues.id ORDER BY matches DESC, issues.id LIMIT ?",
+                (*args, top),
+            ).fetchall()
+
+        return [
+            {
+                "id": row["id"],
+                "label": row["label"],
+                "payload": row["payload"],
+                "params": json.loads(row["params"]),
+                "matches": row["matches"],
+                "packet_count": row["packet_count"],
+            }
+            for row in rows
+        ]
+
+    def match_packets(self, packets: Iterable[bytes], top: int = 10) -> List[dict]:
+        """
+        Rank the issues by the count of packets they share with `packets`
+
+        Args:
+            packets(list): Packets found in a file (header, data and CRC)
+            top(int): Maximal count of candidates
+
+        Returns:
+            A list of candidates, each one a dict with the issue "id", "label",
+            "payload", "params", the count of "matches" and the "packet_count" issued.
+        """
+        return self._rank("key", (packet_key(p) for p in packets), top)
+
+    def match_decoder(self, decoder: lt.decode.LtDecoder, top: int = 10) -> List[dict]:
+        """
+        Rank the issues by the count of LT seeds they share with a decoder state.
+        Only issues whose LT stream (payload size in version 1, block count and size
+        and flags in version 2) matches the decoder, and whose payload is consistent
+        with the blocks the decoder holds, are considered.
+
+        Args:
+            decoder(LtDecoder): A partial decoder state
+            top(int): Maximal count of candidates
+
+        Returns:
+            Same as `match_packets`
+        """
+        if not decoder.initialized:
+            return []
+        packet_version = 2 if decoder.padded else 1
+        if packet_version == 1:
+            # The file size of a version 1 stream is the payload size
+            where = "WHERE COALESCE(issues.packet_version, 1) = 1 AND length(issues.payload) = ?"
+            args = (decoder.filesize,)
+        else:
+            where = (
+                "WHERE issues.packet_version = 2 AND issues.block_count = ? AND issues.data_size = ?"
+                " AND issues.flags = ?"
+            )
+            args = (decoder.K, decoder.blocksize, decoder.flags)
+        candidates = self._rank("seed", decoder.seeds, -1, where, args)
+        return [
+            candidate
+            for candidate in candidates
+            if is_consistent(
+                decoder,
+                source_blocks(candidate["payload"], decoder.blocksize, packet_version, decoder.flags),
+            )
+        ][:top]
+
+    def attribute(self, df: pl.DataFrame, password: str = None, top: int = 10) -> List[dict]:
+        """
+        Rank the issues whose packets are found in a leaked dataframe
+
+        Args:
+            df(pl.DataFrame): The leaked dataframe
+            password(str, optional): The password used to issue the copies
+            top(int): Maximal count of candidates
+
+        Returns:
+            Same as `match_packets`
+        """
+        packets = []
+        for params in self.configurations(password):
+            packets += BitPool(password=password, **params).find_packets(df)
+        return self.match_packets(packets, top)
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+import polars as pl
+import pytest
+
+from steganodf.attacks import ATTACKS, evaluate_robustness
+
+
+@pytest.mark.parametrize("name", list(ATTACKS))
+def test_attack_keeps_schema(df: pl.DataFrame, name):
+
+    damaged = ATTACKS[name](df, 0.0 if name == "drop_columns" else 0.1, np.random.default_rng(0))
+    assert damaged.schema == df.schema
+    assert len(damaged) <= len(df)
+
+
+def test_corrupt_cells(df: pl.DataFrame):
+
+    damaged = ATTACKS["corrupt"](df, 0.01, np.random.default_rng(0))
+    assert (damaged != df).sum().sum_horizontal().item() == 200
+
+
+def test_evaluate_robustness(df: pl.DataFrame):
+
+    configs = {"1 bit": {"bit_per_row": 1}, "2 bits": {"bit_per_row": 2}}
+    attacks = {"delete": [0.0, 0.001], "shuffle": [1]}
+    report = evaluate_robustness(df, configs, attacks=attacks, trials=2, workers=2)
+
+    assert len(report) == 6
+    json.dumps(report)
+    for record in report:
+        assert record["trials"] == 2
+        assert record["decode_time"] > 0
+        if record["level"] in (0.0, 1):
+            assert record["success_rate"] == 1.0
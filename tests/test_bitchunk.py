@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import polars as pl
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitchunk import BitChunk
+import steganodf
+
+
+def test_encode_decode(df: pl.DataFrame):
+
+    payload = b"hello world"
+    algorithm = BitChunk()
+    df_encoded = algorithm.encode(df, payload)
+    assert len(df_encoded) == len(df)
+    assert df_encoded.sort("a").equals(df.sort("a"))
+    assert algorithm.decode(df_encoded) == payload
+
+
+def test_with_password(df: pl.DataFrame):
+
+    payload = b"hello"
+    df_encoded = steganodf.encode(df, payload, algorithm="bitchunk", password="secret")
+    assert steganodf.decode(df_encoded, algorithm="bitchunk", password="secret") == payload
+    assert steganodf.decode(df_encoded, algorithm="bitchunk", password="wrong") != payload
+
+
+@pytest.mark.parametrize("block_size", [3, 5, 8])
+def test_block_size(df: pl.DataFrame, block_size):
+
+    payload = b"hello"
+    algorithm = BitChunk(block_size=block_size)
+    assert algorithm.decode(algorithm.encode(df, payload)) == payload
+
+
+def test_capacity(df: pl.DataFrame):
+
+    algorithm = BitChunk()
+    size = algorithm.get_max_payload_size(df)
+    payload = bytes(i % 256 for i in range(size))
+    assert algorithm.decode(algorithm.encode(df, payload)) == payload
+
+    with pytest.raises(AlgorithmError):
+        algorithm.encode(df, payload + b"x")
+
+
+def test_with_error(df: pl.DataFrame):
+
+    payload = b"hello"
+    algorithm = BitChunk()
+    df_encoded = algorithm.encode(df, payload)
+    df_encoded = df_encoded.with_columns(
+        pl.when(pl.int_range(pl.len()) % 997 == 10).then(-10.0).otherwise(pl.col("a")).alias("a")
+    )
+    assert algorithm.decode(df_encoded) == payload
+
+
+def test_with_damaged_block(df: pl.DataFrame):
+
+    # Two copies of the frame, so that a failed vote falls back to each copy
+    payload = bytes(i % 251 for i in range(700))
+    algorithm = BitChunk()
+    df_encoded = algorithm.encode(df, payload)
+
+    indexes, blocks = algorithm.get_blocks(algorithm.compute_hash(df_encoded))
+    values = algorithm.rank(blocks)
+    header = len(algorithm.header(payload))
+    frame = len(algorithm.frame(payload))
+    assert (len(values) - header) // frame == 2
+
+    # A block whose next block starts with a 0 bit
+    first = next(
+        i
+        for i in range(header, header + frame - 1)
+        if 0 < values[i] < 720 - 512 and values[i + 1] % 2 == 0
+    )
+    second = first + frame
+
+    def write(rows, i, value):
+        start = int(indexes[i]) * 6
+        order = np.argsort(blocks[i])
+        rows[start : start + 6] = start + order[algorithm.unrank(np.array([value]))[0]]
+
+    # The first copy holds an out of range rank with the right low bits, next to a
+    # valid block. The second copy is wrong, so the vote fails.
+    rows = np.arange(len(df_encoded))
+    write(rows, first, values[first] + 512)
+    write(rows, second, 0)
+    assert algorithm.decode(df_encoded[rows]) == payload
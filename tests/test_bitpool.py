@@ -1,7 +1,9 @@
 import pytest
 import string
 import random
+from concurrent.futures import ThreadPoolExecutor
 import polars as pl
+from steganodf.algorithms import bitpool
 from steganodf.algorithms.bitpool import BitPool
 
 
@@ -111,4 +113,46 @@ def test_with_deletion(df, error_count):
     # Test with 10 errors
     index = df_encoded.sample(error_count).index
     df_encoded = df_encoded.drop(index)
-    assert payload == algorithm.decode(pl.from_pandas(df_encoded)), f"with error count = {i}"
+    assert payload == algorithm.decode(pl.from_pandas(df_encoded)), f"with error count = {error_count}"
+
+
+@pytest.mark.parametrize("bit_per_row", [3, 5, 6, 7, 8, 10])
+def test_bit_per_row(df, bit_per_row):
+
+    payload = b"hello"
+    algorithm = BitPool(bit_per_row=bit_per_row)
+    df_encoded = algorithm.encode(df, payload=payload)
+    assert algorithm.decode(df_encoded) == payload
+
+
+def test_decode_keys(df, monkeypatch):
+
+    stego = BitPool(bit_per_row=2, password="bob").encode(df, b"hello")
+    algorithm = BitPool(bit_per_row=2)
+    result = algorithm.decode_keys(stego, ["alice", None, "bob", "carol"])
+    assert result["success"]
+    assert (result["password"], result["payload"]) == ("bob", b"hello")
+
+    result = algorithm.decode_keys(stego, ["alice", "carol"])
+    assert not result["success"]
+    assert result["password"] is None
+
+    # Without undamaged packets, every key is decoded
+    monkeypatch.setattr(BitPool, "scan_undamaged", lambda *args: iter([]))
+    assert algorithm.decode_keys(stego, ["alice", "bob"])["password"] == "bob"
+
+
+def test_decode_keys_threads(df, monkeypatch):
+
+    stego = BitPool(password="bob").encode(df, b"hello")
+    workers = []
+
+    class Executor(ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            workers.append(max_workers)
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(bitpool, "ThreadPoolExecutor", Executor)
+    result = BitPool(threads=3).decode_keys(stego, ["alice", "bob"])
+    assert result["password"] == "bob"
+    assert workers == [3]
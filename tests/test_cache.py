@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+import polars as pl
+
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.cache import FingerprintCache, PermutationCache
+
+
+def test_seed(df: pl.DataFrame):
+
+    first = BitPool(seed=42).encode(df, b"hello")
+    assert first.equals(BitPool(seed=42).encode(df, b"hello"))
+    assert not first.equals(BitPool(seed=43).encode(df, b"hello"))
+    assert BitPool().decode(first) == b"hello"
+
+
+def test_cache(df: pl.DataFrame, tmp_path, monkeypatch):
+
+    algorithm = BitPool(seed=42, cache=tmp_path)
+    first = algorithm.encode(df, b"hello")
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    # A cache hit does not build any packet
+    monkeypatch.setattr(BitPool, "build_packets", None)
+    assert algorithm.encode(df, b"hello").equals(first)
+
+    # Another payload, cover or password is another entry
+    cache = PermutationCache(tmp_path)
+    params = {"seed": 42}
+    keys = {
+        cache.key(df, b"hello", params),
+        cache.key(df, b"hello!", params),
+        cache.key(df.head(10), b"hello", params),
+        cache.key(df, b"hello", {"seed": 42, "password": "secret"}),
+    }
+    assert len(keys) == 4
+
+
+def test_unseeded_encoding_is_not_cached(df: pl.DataFrame, tmp_path):
+
+    BitPool(cache=tmp_path).encode(df, b"hello")
+    assert list(tmp_path.glob("*.npz")) == []
+
+
+def test_fingerprint_cache(df: pl.DataFrame, tmp_path, monkeypatch):
+
+    monkeypatch.setattr("steganodf.cache._memory", OrderedDict())
+    algorithm = BitPool(password="secret", fingerprint_cache=tmp_path)
+    stego = algorithm.encode(df, b"hello")
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+
+    # The hashes of the cover are read back, the rows are not hashed again
+    expected = algorithm.compute_hash(df)["hash"]
+    monkeypatch.setattr(BitPool, "hash_rows", None)
+    assert algorithm.compute_hash(df)["hash"].equals(expected)
+    assert algorithm.get_total_size_available(df) > 0
+    monkeypatch.undo()
+
+    # Another cover, password or width is another entry
+    cache = FingerprintCache(tmp_path)
+    keys = {
+        cache.key(df, "md5", "secret", 1),
+        cache.key(stego, "md5", "secret", 1),
+        cache.key(df, "md5", "other", 1),
+        cache.key(df, "md5", "secret", 2),
+    }
+    assert len(keys) == 4
+
+
+def test_invalid_fingerprint_file(df: pl.DataFrame, tmp_path, monkeypatch):
+
+    monkeypatch.setattr("steganodf.cache._memory", OrderedDict())
+    cache = FingerprintCache(tmp_path)
+    key = cache.key(df, "md5", None, 1)
+    cache.path(key).write_bytes(b"truncated")
+    assert cache.get(key, len(df)) is None
+
+    # The file is replaced by valid hashes
+    algorithm = BitPool(fingerprint_cache=cache)
+    expected = algorithm.compute_hash(df)["hash"]
+    assert cache.get(key, len(df)).tolist() == expected.to_list()
+    assert cache.get(key, len(df) + 1) is None
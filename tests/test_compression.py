@@ -0,0 +1,37 @@
+import json
+
+import polars as pl
+import pytest
+
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.compression import compress, decompress
+
+PAYLOAD = json.dumps(
+    {"id": "LIC-000421", "name": "Alice Martin", "email": "alice.martin@example.com"}
+).encode()
+
+
+@pytest.mark.parametrize("method", ["zlib", "lzma", "zdict", "auto"])
+def test_compression(df: pl.DataFrame, method: str):
+
+    data, flags = compress(PAYLOAD, method)
+    assert decompress(data, flags) == PAYLOAD
+
+    stego = BitPool(packet_version=2, compression=method).encode(df, PAYLOAD)
+    # The decoder reads the method in the packets
+    assert BitPool(packet_version=2).decode(stego) == PAYLOAD
+
+
+def test_preset_dictionary_saves_packets():
+
+    assert len(compress(PAYLOAD, "zdict")[0]) < len(PAYLOAD) // 2
+    assert compress(PAYLOAD, "auto") == compress(PAYLOAD, "zdict")
+
+
+def test_invalid_compression():
+
+    with pytest.raises(AlgorithmError):
+        BitPool(packet_version=2, compression="gzip")
+    with pytest.raises(AlgorithmError):
+        BitPool(compression="zlib")
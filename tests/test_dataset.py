@@ -0,0 +1,44 @@
+import shutil
+
+import polars as pl
+
+from steganodf.dataset import decode_dataset, encode_dataset, list_partitions, read_partition
+
+
+def write_dataset(df: pl.DataFrame, root):
+
+    df = df.with_columns(part=pl.int_range(pl.len()) % 4)
+    df.write_parquet(root, partition_by="part")
+
+
+def test_dataset_roundtrip(df: pl.DataFrame, tmp_path):
+
+    source, target = tmp_path / "source", tmp_path / "target"
+    write_dataset(df, source)
+    partitions = list_partitions(source)
+    assert len(partitions) == 4
+
+    counts = encode_dataset(source, target, b"hello", workers=2)
+    assert list_partitions(target) == partitions
+    assert all(count > 0 for count in counts.values())
+    for partition in partitions:
+        before = read_partition(source / partition).sort("a")
+        assert read_partition(target / partition).sort("a").equals(before)
+
+    result = decode_dataset(target, workers=2)
+    assert result["success"]
+    assert result["payload"] == b"hello"
+
+
+def test_dataset_partial_copy(df: pl.DataFrame, tmp_path):
+
+    source, target = tmp_path / "source", tmp_path / "target"
+    write_dataset(df, source)
+    encode_dataset(source, target, b"hello", workers=2)
+
+    # keep a single partition
+    for partition in list_partitions(target)[1:]:
+        shutil.rmtree((target / partition).parent)
+
+    result = decode_dataset(target, workers=1)
+    assert result["payload"] == b"hello"
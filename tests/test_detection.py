@@ -0,0 +1,53 @@
+import sys
+
+import polars as pl
+import pytest
+
+from steganodf.__main__ import main
+from steganodf.algorithms import detection
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.algorithms.detection import detect_geometry
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(bit_per_row=4, data_size=8, correction_size=2),
+        dict(bit_per_row=2, data_size=16, correction_size=0, packet_version=2, crc_size=2),
+        dict(bit_per_row=1, data_size=8, correction_size=4, packet_version=2, crc_size=1),
+    ],
+)
+def test_detect_geometry(df: pl.DataFrame, params: dict):
+
+    stego = BitPool(password="secret", **params).encode(df, b"hello")
+    # The CRC size is detected as well
+    geometry = detect_geometry(stego, password="secret")
+    assert geometry.params() == {**params, "hash_function": "md5"}
+    assert BitPool(password="secret", **geometry.params()).decode(stego) == b"hello"
+
+
+def test_detect_damaged_geometry(df: pl.DataFrame, monkeypatch):
+
+    stego = BitPool(bit_per_row=2, data_size=8, correction_size=2).encode(df, b"hello")
+    # Without an undamaged packet, the candidate geometries are scanned
+    monkeypatch.setattr(detection, "_find_undamaged_packet", lambda *args: None)
+    geometry = detect_geometry(stego, bit_per_rows=[1, 2], data_sizes=[8, 16])
+    assert (geometry.bit_per_row, geometry.data_size, geometry.correction_size) == (2, 8, 2)
+
+    with pytest.raises(AlgorithmError):
+        detect_geometry(df, bit_per_rows=[2], data_sizes=[8], correction_sizes=[2])
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "-m", "hello", "--packet-version", "2"]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", "--detect", str(target)])
+    main()
+    captured = capsys.readouterr()
+    assert captured.out.strip() == "hello"
+    assert "packet_version=2" in captured.err
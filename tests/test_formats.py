@@ -0,0 +1,36 @@
+import sys
+import pytest
+import polars as pl
+from steganodf import formats
+from steganodf.__main__ import main, parse_cli
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".csv.gz", ".parquet", ".arrow", ".feather", ".ndjson"])
+def test_roundtrip(df: pl.DataFrame, tmp_path, suffix):
+
+    path = tmp_path / f"data{suffix}"
+    formats.sink(df, path)
+    lf = formats.scan(path)
+    assert isinstance(lf, pl.LazyFrame)
+    assert lf.collect().equals(df)
+
+
+def test_unsupported_format(tmp_path):
+
+    path = tmp_path / "data.txt"
+    path.write_text("a\n1\n")
+    with pytest.raises(SystemExit):
+        parse_cli(["decode", str(path)])
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source = tmp_path / "data.arrow"
+    target = tmp_path / "stegano.parquet"
+    formats.sink(df, source)
+
+    monkeypatch.setattr(sys, "argv", ["steganodf", "encode", "-m", "hello", str(source), str(target)])
+    main()
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
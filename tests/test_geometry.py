@@ -0,0 +1,45 @@
+import hashlib
+import pytest
+import polars as pl
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.algorithms.geometry import Geometry, tune_geometry
+
+
+def test_tune_and_decode(df: pl.DataFrame):
+
+    payload = b"hello world"
+    geometry = tune_geometry(len(df), len(payload), deletion_rate=0.001, edit_rate=0.001)
+    algorithm = BitPool(**geometry.params())
+    df_encoded = algorithm.encode(df, payload)
+    assert algorithm.decode(df_encoded) == payload
+
+
+def test_more_damage_costs_more_rows():
+
+    clean = tune_geometry(10000, 40)
+    damaged = tune_geometry(10000, 40, deletion_rate=0.01, edit_rate=0.02)
+    assert clean.rows_per_packet * clean.packet_count <= damaged.rows_per_packet * damaged.packet_count
+    assert damaged.correction_size > 0
+
+
+def test_impossible_geometry():
+
+    with pytest.raises(AlgorithmError):
+        tune_geometry(100, 1000, deletion_rate=0.1)
+
+
+def test_save_and_load(tmp_path):
+
+    geometry = tune_geometry(10000, 20, edit_rate=0.01)
+    path = tmp_path / "geometry.json"
+    geometry.save(path)
+    assert Geometry.load(path) == geometry
+
+
+def test_callable_hash_function():
+
+    with pytest.raises(AlgorithmError):
+        tune_geometry(10000, 20, hash_function=hashlib.sha1)
+    with pytest.raises(AlgorithmError):
+        Geometry.from_algorithm(BitPool(hash_function=hashlib.sha1))
@@ -0,0 +1,92 @@
+import hashlib
+import hmac
+import sys
+import pytest
+import polars as pl
+from steganodf.__main__ import main
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.algorithms.geometry import tune_geometry
+from steganodf.hashing import HASH_FUNCTIONS, get_hash_function
+
+
+@pytest.mark.parametrize("name", ["md5", "sha1", "sha256"])
+def test_hmac_compatibility(name):
+
+    digest = get_hash_function(name, b"password")
+    for data in (b"", b"hello", b"x" * 1000):
+        assert digest(data) == hmac.new(b"password", data, getattr(hashlib, name)).digest()
+    assert get_hash_function(name, b"k" * 200)(b"hello") == hmac.new(b"k" * 200, b"hello", name).digest()
+
+
+@pytest.mark.parametrize("name", list(HASH_FUNCTIONS))
+def test_encode_decode(df: pl.DataFrame, name):
+
+    payload = b"hello"
+    algorithm = BitPool(hash_function=name, password="secret")
+    df_encoded = algorithm.encode(df, payload)
+    assert algorithm.decode(df_encoded) == payload
+
+    # Keys longer than a block
+    algorithm = BitPool(hash_function=name, password="x" * 80)
+    assert algorithm.decode(algorithm.encode(df, payload)) == payload
+
+
+def test_unknown_function():
+
+    with pytest.raises(AlgorithmError):
+        BitPool(hash_function="crc")
+
+
+def test_geometry_records_function():
+
+    geometry = tune_geometry(10000, 10, hash_function="blake2b")
+    assert geometry.params()["hash_function"] == "blake2b"
+
+
+def test_cli_records_function(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "-m", "hello", "--hash-function", "blake2s", "--packet-version", "2"]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+    # The decoder finds the function in the geometry file
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
+
+
+def test_threads(df: pl.DataFrame, monkeypatch):
+
+    monkeypatch.setattr("steganodf.algorithms.bitpool.HASH_BATCH", 999)
+    expected = BitPool(bit_per_row=4).compute_hash(df)["hash"]
+    assert BitPool(bit_per_row=4, threads=4).compute_hash(df)["hash"].equals(expected)
+
+    with pytest.raises(AlgorithmError):
+        BitPool(threads=0)
+
+
+def test_cli_threads_with_tuned_geometry(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    threads = []
+    compute_hash = BitPool.compute_hash
+
+    def spy(self, *args, **kwargs):
+        threads.append(self._threads)
+        return compute_hash(self, *args, **kwargs)
+
+    monkeypatch.setattr(BitPool, "compute_hash", spy)
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "-m", "hello", "--deletion-rate", "0.001", "--threads", "3"]
+    argv += ["--fingerprint-cache", str(tmp_path / "fingerprints")]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+    # The runtime options are kept with the tuned geometry
+    assert threads == [3]
+    assert len(list((tmp_path / "fingerprints").glob("*.npy"))) == 1
+
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", "--threads", "3", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
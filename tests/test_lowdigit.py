@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+import polars as pl
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.lowdigit import LowDigit
+
+
+def test_encode_decode(df: pl.DataFrame):
+
+    payload = b"hello"
+    algorithm = LowDigit()
+    df_encoded = algorithm.encode(df, payload)
+    assert algorithm.decode(df_encoded) == payload
+
+
+def test_distortion(df: pl.DataFrame):
+
+    algorithm = LowDigit(max_distortion=1e-4)
+    df_encoded = algorithm.encode(df, b"hello")
+    for name in df.columns:
+        assert (df_encoded[name] - df[name]).abs().max() <= 1e-4
+
+
+def test_row_order_and_deletion(df: pl.DataFrame):
+
+    payload = b"hello"
+    # A smaller frame gets more votes per bit from the remaining rows
+    algorithm = LowDigit(password="secret", payload_size=8)
+    df_encoded = algorithm.encode(df, payload).sample(fraction=0.5, shuffle=True, seed=1)
+    assert algorithm.decode(df_encoded) == payload
+    assert LowDigit(password="wrong", payload_size=8).decode(df_encoded) != payload
+
+
+def test_integer_and_null():
+
+    N = 20000
+    df = pl.DataFrame(
+        {
+            "i": np.random.randint(-1000, 1000, N),
+            "f": np.where(np.arange(N) % 10 == 0, None, np.random.rand(N) * 100).tolist(),
+            "s": ["x"] * N,
+        }
+    )
+    algorithm = LowDigit(max_distortion=1, fraction=0.5, payload_size=4)
+    df_encoded = algorithm.encode(df, b"hi")
+    assert df_encoded.schema == df.schema
+    assert df_encoded["f"].null_count() == df["f"].null_count()
+    assert (df_encoded["i"] - df["i"]).abs().max() <= 1
+    assert algorithm.decode(df_encoded) == b"hi"
+
+
+def test_too_large_payload(df: pl.DataFrame):
+
+    with pytest.raises(AlgorithmError):
+        LowDigit(payload_size=4).encode(df, b"hello")
+
+
+def test_large_values():
+
+    N = 20000
+    df = pl.DataFrame(
+        {
+            "i": pl.Series(2**63 - 1 - np.random.randint(0, 1000, N), dtype=pl.Int64),
+            "j": pl.Series(np.full(N, -(2**63)) + np.random.randint(0, 1000, N), dtype=pl.Int64),
+            "u": pl.Series(2**64 - 1 - np.random.randint(0, 1000, N).astype(np.uint64), dtype=pl.UInt64),
+            "f": np.where(np.arange(N) % 2 == 0, 1e300, np.random.rand(N) * 100),
+        }
+    )
+    algorithm = LowDigit(max_distortion=1, fraction=0.5, payload_size=4)
+    df_encoded = algorithm.encode(df, b"hi")
+    assert df_encoded.schema == df.schema
+    for name in "iju":
+        # Only the lowest bit changes
+        assert ((df_encoded[name].to_numpy() ^ df[name].to_numpy()) <= 1).all()
+        assert (df_encoded[name] != df[name]).any()
+    # Cells too large for an exact float step are left untouched
+    assert df_encoded["f"].gather_every(2).equals(df["f"].gather_every(2))
+    assert algorithm.decode(df_encoded) == b"hi"
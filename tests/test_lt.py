@@ -0,0 +1,94 @@
+import io
+import json
+import pytest
+import polars as pl
+from steganodf import lt
+from steganodf.algorithms.bitpool import BitPool
+
+
+def make_packets(payload: bytes, blocksize: int, count: int, seed: int = 42):
+    encoder = lt.encode.encoder(io.BytesIO(payload), blocksize, seed=seed)
+    return [lt.decode.block_from_bytes(next(encoder)) for _ in range(count)]
+
+
+def test_state_roundtrip():
+
+    payload = bytes(range(200))
+    packets = make_packets(payload, 10, 200)
+
+    decoder = lt.decode.LtDecoder()
+    for packet in packets[:15]:
+        decoder.consume_block(packet)
+    assert not decoder.is_done()
+
+    state = json.loads(json.dumps(decoder.to_dict()))
+    resumed = lt.decode.LtDecoder.from_dict(state)
+    assert resumed.ratio() == decoder.ratio()
+    assert resumed.seeds == decoder.seeds
+
+    for packet in packets[15:]:
+        if resumed.consume_block(packet):
+            break
+    assert resumed.bytes_dump() == payload
+
+
+def test_merge():
+
+    payload = bytes(range(200))
+    packets = make_packets(payload, 10, 200)
+
+    first, second = lt.decode.LtDecoder(), lt.decode.LtDecoder()
+    for i, packet in enumerate(packets):
+        (first if i % 2 else second).consume_block(packet)
+        if first.is_done() or second.is_done():
+            break
+    first.merge(second)
+    assert first.is_done()
+    assert first.bytes_dump() == payload
+
+
+def test_merge_different_streams():
+
+    first, second = lt.decode.LtDecoder(), lt.decode.LtDecoder()
+    first.consume_block(make_packets(b"a" * 30, 10, 1)[0])
+    second.consume_block(make_packets(b"a" * 40, 10, 1)[0])
+    with pytest.raises(ValueError):
+        first.merge(second)
+
+
+def test_decode_fragments(df: pl.DataFrame, tmp_path):
+
+    payload = b"a payload spread over several fragments of the file"
+    algorithm = BitPool(data_size=8)
+    df_encoded = algorithm.encode(df, payload)
+
+    # Small fragments are not enough alone
+    fragments = [df_encoded[i : i + 1500] for i in range(0, 6000, 1500)]
+    assert not algorithm._decode(fragments[0])["success"]
+    assert algorithm.decode_fragments(fragments)["payload"] == payload
+
+    # Resume from a saved state, a fragment already scanned is skipped
+    result = algorithm._decode(fragments[0], source="0")
+    result["decoder"].save(tmp_path / "state.json")
+    decoder = lt.decode.LtDecoder.load(tmp_path / "state.json")
+    assert algorithm._decode(fragments[0], decoder=decoder, source="0")["block_count"] == 0
+    for i, fragment in enumerate(fragments[1:]):
+        result = algorithm._decode(fragment, decoder=decoder, source=str(i + 1))
+    assert result["success"]
+    assert result["payload"] == payload
+
+
+def test_batch_encoder():
+
+    # A payload longer than a read, padded in its last block
+    payload = bytes(range(256)) * 300 + b"end"
+    batches = lt.encode.batch_encoder(io.BytesIO(payload), 20, seed=42, size=100)
+    packets = [packet.tobytes() for _ in range(3) for packet in next(batches)]
+    encoder = lt.encode.encoder(io.BytesIO(payload), 20, seed=42)
+    assert packets == [next(encoder) for _ in range(300)]
+
+    decoder = lt.decode.LtDecoder()
+    for packet in lt.encode.encoder(io.BytesIO(payload), 20, seed=42):
+        if decoder.consume_block(lt.decode.block_from_bytes(packet)):
+            break
+    assert decoder.bytes_dump() == payload
@@ -0,0 +1,37 @@
+import polars as pl
+
+import steganodf.namespace  # noqa: F401
+from steganodf.algorithms.bitpool import BitPool
+
+
+def test_dataframe(df: pl.DataFrame):
+
+    df_encoded = df.stegano.encode(b"hello", password="secret")
+    assert df_encoded.stegano.decode(password="secret") == b"hello"
+    assert df.stegano.fingerprint(bit_per_row=3).equals(BitPool(bit_per_row=3).compute_hash(df)["hash"])
+
+
+def test_lazyframe(df: pl.DataFrame, tmp_path):
+
+    path = tmp_path / "data.parquet"
+    df.with_columns(c=pl.lit("unused")).write_parquet(path)
+
+    lf = pl.scan_parquet(path).stegano.encode(b"hello", columns=["a", "b"])
+    assert isinstance(lf, pl.LazyFrame)
+    df_encoded = lf.collect()
+    assert df_encoded.width == 3
+    assert BitPool(columns=["a", "b"]).decode(df_encoded) == b"hello"
+
+    # Only the key columns are read
+    plan = pl.scan_parquet(path).select(steganodf.namespace.fingerprint(["a"])).explain()
+    assert "1/3" in plan
+
+    df_encoded.write_parquet(path)
+    assert pl.scan_parquet(path).stegano.decode(columns=["a", "b"]) == b"hello"
+
+
+def test_expression_in_pipeline(df: pl.DataFrame):
+
+    lf = df.lazy().with_columns(total=pl.col("a") + pl.col("b")).stegano.fingerprint(["a", "b"])
+    result = lf.filter(pl.col("hash") == 1).collect(engine="streaming")
+    assert (BitPool().compute_hash(result.select("a", "b"))["hash"] == 1).all()
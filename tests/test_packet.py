@@ -0,0 +1,78 @@
+import sys
+
+import polars as pl
+import pytest
+
+from steganodf.__main__ import main
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.lt.decode import LtDecoder
+
+
+@pytest.mark.parametrize("crc_size", [1, 2, 4])
+def test_compact_packets(df: pl.DataFrame, crc_size: int):
+
+    algorithm = BitPool(bit_per_row=2, packet_version=2, crc_size=crc_size)
+    payload = b"hello world, this payload spans several blocks"
+    assert algorithm.decode(algorithm.encode(df, payload)) == payload
+
+    # The packet is 7 to 10 bytes smaller than version 1
+    assert BitPool().get_packet_size() - algorithm.get_packet_size() == 7 + 4 - crc_size
+
+
+def test_compact_packets_resume(df: pl.DataFrame):
+
+    algorithm = BitPool(packet_version=2, crc_size=2)
+    result = algorithm._decode(algorithm.encode(df, b"\x00hello\x00"))
+    decoder = LtDecoder.from_dict(result["decoder"].to_dict())
+    assert decoder.padded
+    assert decoder.bytes_dump() == b"\x00hello\x00"
+
+
+def test_versions_are_not_mixed(df: pl.DataFrame):
+
+    # Version 1 files keep decoding with the default parameters
+    stego = BitPool().encode(df, b"hello")
+    assert BitPool().decode(stego) == b"hello"
+    assert BitPool(packet_version=2).decode(stego) == b""
+
+
+def test_invalid_packet_parameters():
+
+    with pytest.raises(AlgorithmError):
+        BitPool(packet_version=3)
+    with pytest.raises(AlgorithmError):
+        BitPool(crc_size=5)
+
+
+def test_systematic_packets(df: pl.DataFrame):
+
+    payload = b"hello world, this payload spans several blocks"
+    algorithm = BitPool(packet_version=2, systematic=True)
+    stego = algorithm.encode(df, payload)
+
+    # An undamaged file decodes from the source blocks only
+    result = BitPool(packet_version=2)._decode(stego)
+    assert result["payload"] == payload
+    assert result["block_count"] == result["decoder"].K
+
+    # Without the source blocks, the repair packets are enough
+    window = algorithm.bytes_to_rows_count(bytes(algorithm.get_packet_size()))
+    assert BitPool(packet_version=2).decode(stego[window * result["decoder"].K :]) == payload
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "-m", "hello", "--packet-version", "2", "--crc-size", "2"]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+    # The packet format is read from the geometry file
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
+
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", str(source)])
+    with pytest.raises(SystemExit, match="no payload"):
+        main()
@@ -0,0 +1,41 @@
+import pytest
+import polars as pl
+
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.progress import Cancelled, CancelToken
+
+
+def test_progress(df: pl.DataFrame):
+
+    df_encoded = BitPool().encode(df, b"hello")
+    reports = []
+    result = BitPool(progress=lambda p: reports.append(p.windows_scanned)).decode(df_encoded)
+    assert result == b"hello"
+    assert reports and reports == sorted(reports)
+
+    snapshots = []
+    BitPool(progress=lambda p: snapshots.append((p.stage, p.rows_hashed, p.packets))).encode(df, b"hello")
+    assert ("hashing", len(df), 0) in snapshots
+    assert snapshots[-1][0] == "encoding" and snapshots[-1][2] > 0
+
+
+def test_cancel_decode(df: pl.DataFrame):
+
+    # Cancel a hopeless decoding after the first batch of windows
+    token = CancelToken()
+
+    def progress(p):
+        if p.windows_scanned > 0 and p.ratio == 0:
+            token.cancel()
+
+    algorithm = BitPool(progress=progress, cancel=token)
+    result = algorithm._decode(df, source="fragment")
+    assert result["cancelled"]
+    assert not result["success"]
+    assert "fragment" not in result["decoder"].sources
+
+
+def test_cancel_encode(df: pl.DataFrame):
+
+    with pytest.raises(Cancelled):
+        BitPool(cancel=CancelToken(timeout=0)).encode(df, b"hello")
@@ -0,0 +1,61 @@
+import sys
+
+import polars as pl
+import pytest
+
+from steganodf import rawcsv
+from steganodf.__main__ import main
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.rawcsv import decode_csv, encode_csv
+
+
+def test_roundtrip(df: pl.DataFrame, tmp_path):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+
+    assert encode_csv(source, target, b"hello", password="secret") > 0
+    assert decode_csv(target, password="secret") == b"hello"
+
+    # Same bytes, in another order
+    before, after = source.read_bytes().splitlines(), target.read_bytes().splitlines()
+    assert before[0] == after[0]
+    assert before != after
+    assert sorted(before) == sorted(after)
+
+
+def test_formatting_and_quotes(df: pl.DataFrame, tmp_path):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    lines = [f'{i},{a:.3e},"text ""{i}""\r\non two lines"' for i, a in enumerate(df["a"])]
+    source.write_bytes(("id,a,s\r\n" + "\r\n".join(lines)).encode())
+
+    encode_csv(source, target, b"hello", seed=1)
+    assert decode_csv(target) == b"hello"
+    assert len(target.read_bytes()) == len(source.read_bytes())
+    assert pl.read_csv(target).sort("id").equals(pl.read_csv(source))
+
+
+def test_errors(df: pl.DataFrame, tmp_path, monkeypatch):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    source.write_bytes(b"a,b\n")
+    with pytest.raises(AlgorithmError):
+        encode_csv(source, target, b"hello")
+
+    # An error while writing is not hidden when the file is closed
+    df.write_csv(source)
+    monkeypatch.setattr(rawcsv, "_permuted_lines", lambda *args: iter([1]))
+    with pytest.raises(TypeError):
+        encode_csv(source, target, b"hello")
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    monkeypatch.setattr(sys, "argv", ["steganodf", "encode", "--raw", "-m", "hello", str(source), str(target)])
+    main()
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", "--raw", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
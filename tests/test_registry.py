@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+import steganodf
+from steganodf.algorithms import ALGORITHMS, AlgorithmRegistry
+from steganodf.algorithms.bitpool import BitPool
+
+
+def test_registry():
+
+    assert ALGORITHMS["bitpool"] is BitPool
+    assert steganodf.BitPool is BitPool
+    assert {"bitpool", "bitchunk", "lowdigit"} <= set(ALGORITHMS)
+
+    registry = AlgorithmRegistry({"mine": "steganodf.algorithms.bitpool:BitPool"})
+    registry.register("other", BitPool)
+    assert registry["mine"] is registry["other"]
+    with pytest.raises(KeyError):
+        registry["unknown"]
+
+
+def test_cli_does_not_import_polars():
+
+    code = (
+        "import sys, steganodf.__main__ as m;"
+        "m.parse_cli(['decode', 'examples/simple.csv']);"
+        "assert 'polars' not in sys.modules, 'polars imported';"
+        "assert 'reedsolo' not in sys.modules, 'reedsolo imported'"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
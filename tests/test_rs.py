@@ -0,0 +1,69 @@
+import io
+import binascii
+import pytest
+import numpy as np
+import polars as pl
+from steganodf import lt
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.rs import BatchRSCodec
+
+reedsolo = pytest.importorskip("reedsolo")
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize("nsym", [1, 2, 4, 10, 16, 32])
+def test_encode_compatibility(rng, nsym):
+
+    messages = rng.integers(0, 256, (200, 36), dtype=np.uint8)
+    packets = BatchRSCodec(nsym).encode(messages)
+    rsc = reedsolo.RSCodec(nsym)
+    for message, packet in zip(messages, packets):
+        assert bytes(rsc.encode(bytes(message))) == packet.tobytes()
+
+
+@pytest.mark.parametrize("nsym", [2, 4, 10, 16])
+def test_decode_compatibility(rng, nsym):
+
+    codec = BatchRSCodec(nsym)
+    rsc = reedsolo.RSCodec(nsym)
+    messages = rng.integers(0, 256, (300, 36), dtype=np.uint8)
+    packets = codec.encode(messages)
+
+    # Up to nsym errors: both decoders must agree, even past the correction capacity
+    for i in range(len(packets)):
+        count = rng.integers(0, nsym + 1)
+        position = rng.choice(packets.shape[1], count, replace=False)
+        packets[i, position] ^= rng.integers(1, 256, count, dtype=np.uint8)
+
+    decoded, valid = codec.decode(packets)
+    for i, packet in enumerate(packets):
+        try:
+            expected = bytes(rsc.decode(bytes(packet))[0])
+        except reedsolo.ReedSolomonError:
+            expected = None
+        assert (expected is not None) == valid[i]
+        if valid[i]:
+            assert decoded[i].tobytes() == expected
+
+
+def test_file_compatibility(df: pl.DataFrame):
+    """A file packed with reedsolo is read by BitPool"""
+
+    algorithm = BitPool(bit_per_row=2)
+    payload = b"written by reedsolo"
+    rsc = reedsolo.RSCodec(10)
+    pool = algorithm.create_pool(algorithm.compute_hash(df)["hash"].to_list())
+    indexes = [0] * 4
+    rows = []
+    encoder = lt.encode.encoder(io.BytesIO(payload), 20)
+    for _ in range(5):
+        block = next(encoder)
+        block += binascii.crc32(block).to_bytes(4)
+        rows += algorithm.encode_chunk(bytes(rsc.encode(block)), pool, indexes)
+    rows += algorithm.get_remaining_indexes(pool, indexes)
+
+    assert algorithm.decode(df[rows]) == payload
@@ -0,0 +1,60 @@
+import sys
+
+import polars as pl
+import pytest
+
+from steganodf.__main__ import main
+from steganodf.algorithms.algorithm import AlgorithmError
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.algorithms.geometry import Geometry, sidecar_path
+from steganodf.packet import STREAM_SHIFT
+
+PAYLOADS = [b"recipient: alice", b"issued: 2024-06-01", b"license: LIC-000421"]
+
+
+def test_streams(df: pl.DataFrame):
+
+    stego = BitPool(packet_version=2).encode_streams(df, PAYLOADS)
+    for stream, payload in enumerate(PAYLOADS):
+        result = BitPool(packet_version=2, stream=stream)._decode(stego)
+        assert result["payload"] == payload
+        # The packets of the other streams are skipped
+        assert result["decoder"].flags >> STREAM_SHIFT == stream
+
+    assert BitPool(packet_version=2).decode_streams(stego) == dict(enumerate(PAYLOADS))
+    assert BitPool(packet_version=2, stream=5).decode(stego) == b""
+
+
+def test_streams_need_compact_packets(df: pl.DataFrame):
+
+    with pytest.raises(AlgorithmError):
+        BitPool(stream=1)
+    with pytest.raises(AlgorithmError):
+        BitPool().encode_streams(df, PAYLOADS)
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "--packet-version", "2", "-m", "alice", "-m", "2024"]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+    argv = ["steganodf", "decode", "--packet-version", "2", "--stream", "1", str(target)]
+    monkeypatch.setattr(sys, "argv", argv)
+    main()
+    assert capsys.readouterr().out.strip() == "2024"
+
+
+def test_cli_tuned_geometry(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target = tmp_path / "host.csv", tmp_path / "stegano.csv"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "--packet-version", "2", "--stream", "3", "--deletion-rate", "0.001"]
+    monkeypatch.setattr(sys, "argv", argv + ["-m", "hello", str(source), str(target)])
+    main()
+    # The stream is recorded with the tuned geometry
+    assert Geometry.load(sidecar_path(target)).params()["stream"] == 3
+    monkeypatch.setattr(sys, "argv", ["steganodf", "decode", str(target)])
+    main()
+    assert capsys.readouterr().out.strip() == "hello"
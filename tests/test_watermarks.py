@@ -0,0 +1,116 @@
+import sys
+
+import polars as pl
+
+from steganodf import formats
+from steganodf.__main__ import main
+from steganodf.algorithms.bitpool import BitPool
+from steganodf.watermarks import WatermarkRegistry
+
+
+def test_attribute(df: pl.DataFrame, tmp_path):
+
+    with WatermarkRegistry(tmp_path / "registry.db") as registry:
+        copies = {}
+        for name in ["alice", "bob", "carol"]:
+            copies[name], _ = registry.issue(df, name.encode(), label=name, password="secret")
+        registry.issue(df, b"dave", label="dave", password="secret", bit_per_row=2)
+
+    with WatermarkRegistry(tmp_path / "registry.db") as registry:
+        # Too few rows to decode the payload, but enough to find some packets
+        leak = copies["bob"].slice(3000, 1500)
+        candidates = registry.attribute(leak, password="secret")
+        assert candidates[0]["label"] == "bob"
+        assert candidates[0]["payload"] == b"bob"
+        assert all(c["label"] == "bob" for c in candidates)
+
+        assert registry.attribute(leak, password="wrong") == []
+
+
+def test_seeded_issues_share_a_scan(df: pl.DataFrame, tmp_path, monkeypatch):
+
+    registry = WatermarkRegistry(tmp_path / "registry.db")
+    copies = [registry.issue(df, f"copy {i}".encode(), seed=i)[0] for i in range(5)]
+
+    scans = []
+    find_packets = BitPool.find_packets
+
+    def spy(self, *args, **kwargs):
+        scans.append(self)
+        return find_packets(self, *args, **kwargs)
+
+    # The seed is not needed to find the packets, the copies are scanned once
+    monkeypatch.setattr(BitPool, "find_packets", spy)
+    assert registry.attribute(copies[3].head(3000))[0]["payload"] == b"copy 3"
+    assert len(scans) == 1
+
+
+def test_match_decoder(df: pl.DataFrame, tmp_path):
+
+    registry = WatermarkRegistry(tmp_path / "registry.db")
+    copy, issue = registry.issue(df, b"alice")
+    registry.issue(df, b"bob")
+
+    result = BitPool()._decode(copy.head(2000))
+    candidates = registry.match_decoder(result["decoder"])
+    assert [c["id"] for c in candidates] == [issue]
+
+
+def test_match_seeded_decoder(df: pl.DataFrame, tmp_path):
+
+    # The copies issued with the same seed have the same LT seeds
+    registry = WatermarkRegistry(tmp_path / "registry.db")
+    registry.issue(df, b"alice", seed=1)
+    copy, issue = registry.issue(df, b"carol", seed=1)
+
+    result = BitPool()._decode(copy.head(2000))
+    candidates = registry.match_decoder(result["decoder"])
+    assert [c["id"] for c in candidates] == [issue]
+
+
+def test_match_compact_decoder(df: pl.DataFrame, tmp_path):
+
+    registry = WatermarkRegistry(tmp_path / "registry.db")
+    params = {"packet_version": 2, "compression": "zlib", "data_size": 8}
+    registry.issue(df, b"alice@example.com", **params)
+    copy, issue = registry.issue(df, b"carol@example.com", **params)
+    registry.issue(df, b"carol@example.com", packet_version=2, data_size=8)
+
+    result = BitPool(packet_version=2, data_size=8)._decode(copy.head(500))
+    assert not result["success"]
+    candidates = registry.match_decoder(result["decoder"])
+    assert [c["id"] for c in candidates] == [issue]
+
+
+def test_cli(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source = tmp_path / "data.parquet"
+    registry = tmp_path / "registry.db"
+    formats.sink(df, source)
+    for name in ["alice", "bob"]:
+        target = tmp_path / f"{name}.parquet"
+        argv = ["steganodf", "encode", "-m", name, "-r", str(registry), "-l", name, str(source), str(target)]
+        monkeypatch.setattr(sys, "argv", argv)
+        main()
+
+    monkeypatch.setattr(sys, "argv", ["steganodf", "attribute", "-r", str(registry), str(tmp_path / "bob.parquet")])
+    main()
+    assert capsys.readouterr().out.splitlines()[0].endswith("\tbob\tbob")
+
+
+def test_cli_runtime_options(df: pl.DataFrame, tmp_path, monkeypatch, capsys):
+
+    source, target, registry = tmp_path / "data.csv", tmp_path / "alice.csv", tmp_path / "registry.db"
+    df.write_csv(source)
+    argv = ["steganodf", "encode", "-m", "alice", "-r", str(registry), "-l", "alice"]
+    argv += ["--fingerprint-cache", str(tmp_path / "fingerprints"), "--threads", "2"]
+    argv += ["--cache", str(tmp_path / "permutations"), "--seed", "1"]
+    monkeypatch.setattr(sys, "argv", argv + [str(source), str(target)])
+    main()
+
+    # Only the options needed to find the packets are recorded
+    with WatermarkRegistry(registry) as opened:
+        assert opened.configurations() == [{}]
+    monkeypatch.setattr(sys, "argv", ["steganodf", "attribute", "-r", str(registry), str(target)])
+    main()
+    assert capsys.readouterr().out.splitlines()[0].endswith("\talice\talice")